@@ -18,3 +18,70 @@
 # You should have received a copy of the GNU General Public License
 # along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
 #
+
+"""
+Unit tests of TODOs and their shared fixtures.
+"""
+
+
+###############################################################################
+####
+
+import os
+import tempfile
+import unittest
+import todos.logger
+import todos.search
+import todos.todos
+
+
+###############################################################################
+####
+
+class FilesTestCase(unittest.TestCase):
+    """
+    Base of the test cases that search the FILES in a temporary directory.
+    The other files of the tests like caches or outputs are stored next to
+    the searched root directory.
+    """
+
+    FILES = {}
+
+    # Modification time of the written files, None for the current time
+    MTIME = None
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = os.path.join(self.tmp_dir.name, 'root')
+        self.write(self.FILES)
+
+    def write(self, files):
+        for path, content in files.items():
+            path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as output_file:
+                output_file.write(content)
+
+            if self.MTIME is not None:
+                os.utime(path, (self.MTIME, self.MTIME))
+
+    def parse(self, argv=None):
+        return todos.todos.Todos().parse_command_line_arguments(
+                (argv or []) + ['--', self.root])
+
+    def create(self, argv=None, search_class=todos.search.CommentsSearch):
+        return search_class(self.parse(argv), todos.logger.Logger(False))
+
+    def search(self, argv=None, search_class=todos.search.CommentsSearch):
+        comments_search = self.create(argv, search_class)
+        comments_search.search()
+        return comments_search
+
+    def relative(self, path):
+        return os.path.relpath(path, self.root)
+
+    def dump(self, comments_search):
+        return [(self.relative(comment.path), comment.position,
+                comment.str_pattern, comment.lines)
+                for comment in comments_search.comments]
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Unit test of Automaton class.
+"""
+
+
+###############################################################################
+####
+
+import unittest
+import todos.automaton
+
+
+###############################################################################
+####
+
+class AutomatonTestCase(unittest.TestCase):
+    KEYWORDS = [('#', 1), ('//', 2), ('TODO', 4), ('TODO:', 8), ('ODO:X', 16),
+            ('/*', 32), ('<!--', 64)]
+
+    def create(self, keywords, substrings):
+        automaton = todos.automaton.Automaton(keywords)
+        automaton.substrings = substrings
+        return automaton
+
+    def test_scan(self):
+        for substrings in [True, False]:
+            automaton = self.create(self.KEYWORDS, substrings)
+            self.assertEqual(0, automaton.scan(''))
+            self.assertEqual(0, automaton.scan('x = 1 / 2'))
+            self.assertEqual(1 | 4, automaton.scan('# TODO'))
+            self.assertEqual(2 | 4 | 8 | 16, automaton.scan('//TODO:X'))
+            self.assertEqual(4 | 8, automaton.scan('TTODO: /'))
+            self.assertEqual(32 | 64, automaton.scan('<!<!-- /*'))
+
+    def test_overlapping(self):
+        # The failure links lead from 'ab' to 'b' and from 'abc' to 'bc'
+        keywords = [('abcd', 1), ('bc', 2), ('b', 4), ('cde', 8)]
+        for substrings in [True, False]:
+            automaton = self.create(keywords, substrings)
+            self.assertEqual(2 | 4, automaton.scan('abce'))
+            self.assertEqual(1 | 2 | 4 | 8, automaton.scan('abcde'))
+            self.assertEqual(1 | 2 | 4, automaton.scan('xabcd'))
+
+    def test_empty_keyword(self):
+        for substrings in [True, False]:
+            self.assertEqual(1, self.create([('', 1), ('#', 2)],
+                    substrings).scan('x'))
+            self.assertEqual(0, self.create([], substrings).scan('x'))
+
+    def test_many_keywords(self):
+        keywords = [('TAG{0}:'.format(index), 1 << index)
+                for index in range(64)]
+        automaton = todos.automaton.Automaton(keywords)
+        self.assertFalse(automaton.substrings)
+        self.assertEqual((1 << 1) | (1 << 10) | (1 << 63),
+                automaton.scan('TAG1: TAG10: TAG63:'))
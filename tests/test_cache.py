@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of ResultCache class.
+"""
+
+
+###############################################################################
+####
+
+import json
+import os
+import tests
+import todos.cache
+import todos.logger
+import todos.parallel
+
+
+###############################################################################
+####
+
+class ResultCacheTestCase(tests.FilesTestCase):
+    FILES = {
+        'a.py': '# TODO first\nx = 1\n',
+        'b.py': '# FIXME second\n',
+        'c.bin': '\0# TODO binary\n',
+    }
+
+    # Recently modified files are not cached
+    MTIME = 1000000000
+
+    def setUp(self):
+        tests.FilesTestCase.setUp(self)
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+        os.mkdir(self.cache_dir)
+
+    def parse(self, argv=None):
+        return tests.FilesTestCase.parse(self,
+                (argv or []) + ['--cache-dir', self.cache_dir])
+
+    def test_unchanged_files(self):
+        first = self.search()
+        self.assertEqual(0, first.cache.statistics.hits)
+        self.assertEqual(3, first.cache.statistics.misses)
+
+        second = self.search()
+        self.assertEqual(3, second.cache.statistics.hits)
+        self.assertEqual(self.dump(first), self.dump(second))
+        self.assertEqual(first.summary.per_file, second.summary.per_file)
+        self.assertEqual(2, second.summary.total_files)
+
+    def test_changed_file(self):
+        self.search()
+        self.write({'b.py': 'x = 1\n# TODO changed\n'})
+
+        comments_search = self.search()
+        self.assertEqual(2, comments_search.cache.statistics.hits)
+        self.assertEqual([
+                ('a.py', 1, r'\bTODO\b', ['# TODO first']),
+                ('b.py', 2, r'\bTODO\b', ['# TODO changed']),
+            ], self.dump(comments_search))
+
+    def test_parameters_invalidate(self):
+        self.search()
+        comments_search = self.search(['-A', '2'])
+        self.assertEqual(0, comments_search.cache.statistics.hits)
+        self.assertEqual(['# TODO first', 'x = 1'],
+                comments_search.comments[0].lines)
+
+    def test_eviction(self):
+        self.search(['--cache-size', '2'])
+        comments_search = self.search(['--cache-size', '2'])
+        self.assertEqual(2, comments_search.cache.statistics.hits)
+
+    def test_recently_used(self):
+        parameters = self.parse(['--cache-size', '2'])
+
+        def create():
+            return todos.cache.ResultCache(parameters,
+                    todos.logger.Logger(False))
+
+        result_cache = create()
+        for path in ['a.py', 'b.py']:
+            result_cache.store(path, (1, 0, 1), [])
+        result_cache.save()
+
+        # The run with only hits saves the new order
+        result_cache = create()
+        self.assertEqual((True, []), result_cache.lookup('a.py', (1, 0, 1)))
+        result_cache.save()
+
+        result_cache = create()
+        result_cache.store('c.py', (1, 0, 1), [])
+        result_cache.save()
+
+        result_cache = create()
+        self.assertEqual((True, []), result_cache.lookup('a.py', (1, 0, 1)))
+        self.assertEqual((False, None), result_cache.lookup('b.py', (1, 0, 1)))
+
+    def test_json(self):
+        first = self.search()
+        with open(first.cache.path, encoding='utf-8') as input_file:
+            items = json.load(input_file)
+        self.assertEqual([[r'\bTODO\b', 1, ['# TODO first']]], [results
+                for path, signature, results in items
+                if os.path.basename(path) == 'a.py'][0])
+
+        # The run with only hits doesn't rewrite the file
+        stat = os.stat(first.cache.path)
+        second = self.search()
+        self.assertEqual(3, second.cache.statistics.hits)
+        self.assertEqual((stat.st_ino, stat.st_mtime_ns),
+                (os.stat(first.cache.path).st_ino,
+                os.stat(first.cache.path).st_mtime_ns))
+
+    def test_corrupted(self):
+        path = self.search().cache.path
+        for content in ['not json', '{"a": 1}', '[[1, 2]]']:
+            with open(path, 'w') as output_file:
+                output_file.write(content)
+
+            comments_search = self.search()
+            self.assertEqual(0, comments_search.cache.statistics.hits)
+            self.assertEqual(3, comments_search.cache.statistics.misses)
+
+    def test_no_cache(self):
+        comments_search = self.search(['--no-cache'])
+        self.assertIsNone(comments_search.cache)
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+    def test_parallel(self):
+        serial = self.search()
+        parallel = self.search(['-j', '2'],
+                todos.parallel.ParallelCommentsSearch)
+        self.assertEqual(3, parallel.cache.statistics.hits)
+        self.assertEqual(self.dump(serial), self.dump(parallel))
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of the git sources of the files.
+"""
+
+
+###############################################################################
+####
+
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+import todos.dedup
+import todos.exceptions
+import todos.git
+import todos.logger
+import todos.revision
+import todos.search
+import todos.todos
+
+
+###############################################################################
+####
+
+@unittest.skipIf(shutil.which('git') is None, 'git is not installed')
+class GitTestCase(unittest.TestCase):
+    TRACKED = {
+        'a.py': '# TODO tracked\n',
+        'a-b/c.py': '# FIXME tracked\n',
+        'a/z.py': '# TODO tracked\n',
+        'CVS/x.py': '# TODO suppressed\n',
+    }
+
+    UNTRACKED = {
+        'build/out.py': '# TODO untracked\n',
+    }
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+
+        self.git('init', '-q')
+        self.git('config', 'user.email', 'todos@example.com')
+        self.git('config', 'user.name', 'TODOs')
+        self.write(self.TRACKED)
+        self.git('add', '.')
+        self.git('commit', '-q', '-m', 'Initial commit')
+        self.write(self.UNTRACKED)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def git(self, *args):
+        return subprocess.run(['git', '-C', self.root] + list(args),
+                check=True, stdout=subprocess.PIPE).stdout.decode()
+
+    def write(self, files):
+        for path, content in files.items():
+            path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as output_file:
+                output_file.write(content)
+
+    def relative(self, paths):
+        return [os.path.relpath(path, self.root) for path in paths]
+
+    def test_tracked_files(self):
+        parameters = argparse.Namespace(suppressed=['CVS'])
+        walker = todos.git.TrackedFilesWalker(parameters,
+                todos.logger.Logger(False))
+        paths = [path for path, entry in walker.walk([self.root])]
+        self.assertEqual(['a/z.py', 'a-b/c.py', 'a.py'], self.relative(paths))
+        self.assertEqual(1, walker.statistics.suppressed)
+
+        paths = [path for path, entry in walker.walk(
+                [os.path.join(self.root, 'a')])]
+        self.assertEqual(['a/z.py'], self.relative(paths))
+
+    def test_deleted_files(self):
+        os.unlink(os.path.join(self.root, 'a.py'))
+        parameters = argparse.Namespace(suppressed=['CVS'])
+        walker = todos.git.TrackedFilesWalker(parameters,
+                todos.logger.Logger(False))
+        paths = [path for path, entry in walker.walk([self.root])]
+        self.assertEqual(['a/z.py', 'a-b/c.py'], self.relative(paths))
+        self.assertEqual(1, walker.statistics.skipped)
+
+    def test_search(self):
+        parameters = todos.todos.Todos().parse_command_line_arguments(
+                ['--git-tracked', '-D', 'CVS', '--', self.root])
+        comments_search = todos.search.CommentsSearch(parameters,
+                todos.logger.Logger(False))
+        comments_search.search()
+        self.assertEqual(['a/z.py', 'a-b/c.py', 'a.py'], self.relative(
+                [comment.path for comment in comments_search.comments]))
+
+    def search(self, argv, search_class=None):
+        parameters = todos.todos.Todos().parse_command_line_arguments(
+                argv + ['-D', 'CVS', '.git', '--', self.root])
+        comments_search = (search_class or CountingCommentsSearch)(parameters,
+                todos.logger.Logger(False))
+        comments_search.search()
+        return comments_search
+
+    def dump(self, comments_search):
+        return [(os.path.relpath(comment.path, self.root), comment.position,
+                comment.str_pattern, comment.lines)
+                for comment in comments_search.comments]
+
+    def test_baseline(self):
+        report_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(report_dir.cleanup)
+        report = os.path.join(report_dir.name, 'report.xml')
+        todos.todos.Todos().main(['-A', '2', '-x', report, '-D', 'CVS', '.git',
+                '--', self.root])
+
+        self.write({'a.py': 'x\n# FIXME modified\n', 'new.py': '# TODO new\n'})
+        self.git('mv', 'a/z.py', 'a/renamed.py')
+        self.git('rm', '-q', 'a-b/c.py')
+        self.git('add', 'new.py')
+
+        incremental = self.search(['-A', '2', '--since', 'HEAD',
+                '--baseline', report])
+        full = self.search(['-A', '2'])
+        self.assertEqual(self.dump(full), self.dump(incremental))
+        self.assertEqual(full.summary.per_file, incremental.summary.per_file)
+        self.assertEqual(full.summary.total_files,
+                incremental.summary.total_files)
+        self.assertEqual(['a/renamed.py', 'a.py', 'build/out.py', 'new.py'],
+                self.relative(incremental.scanned))
+
+    def test_baseline_before_context(self):
+        self.write({'d.py': 'x\ny\n# TODO third\n'})
+        self.git('add', 'd.py')
+        self.git('commit', '-q', '-m', 'Second commit')
+
+        report_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(report_dir.cleanup)
+        report = os.path.join(report_dir.name, 'report.xml')
+        todos.todos.Todos().main(['-B', '1', '-x', report, '-D', 'CVS', '.git',
+                '--', self.root])
+
+        # The extra lines are dropped, the missing ones are searched
+        for argv, scanned in [(['-B', '0'], []), (['-B', '1'], []),
+                (['-B', '2'], ['d.py'])]:
+            incremental = self.search(argv + ['--since', 'HEAD',
+                    '--baseline', report])
+            self.assertEqual(self.dump(self.search(argv)),
+                    self.dump(incremental))
+            self.assertEqual(['build/out.py'] + scanned,
+                    sorted(self.relative(incremental.scanned)))
+
+    def test_baseline_after_context(self):
+        self.write({'d.py': 'x\n# TODO second\ny\nz\n'})
+        self.git('add', 'd.py')
+        self.git('commit', '-q', '-m', 'Second commit')
+
+        report_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(report_dir.cleanup)
+        report = os.path.join(report_dir.name, 'report.xml')
+        todos.todos.Todos().main(['-A', '2', '-x', report, '-D', 'CVS', '.git',
+                '--', self.root])
+
+        # The extra lines are dropped, the missing ones are searched, even
+        # at the end of the file
+        one_line = ['a-b/c.py', 'a.py', 'a/z.py']
+        for argv, scanned in [(['-A', '1'], []), (['-A', '2'], one_line),
+                (['-A', '3'], one_line + ['d.py'])]:
+            incremental = self.search(argv + ['--no-dedup', '--since',
+                    'HEAD', '--baseline', report])
+            self.assertEqual(self.dump(self.search(argv)),
+                    self.dump(incremental))
+            self.assertEqual(sorted(['build/out.py'] + scanned),
+                    sorted(self.relative(incremental.scanned)))
+
+    def test_baseline_timed_out(self):
+        self.write({'slow.py': '# TODO ' + 'a' * 40 + '!\n'})
+        self.git('add', 'slow.py')
+        self.git('commit', '-q', '-m', 'Slow file')
+
+        report_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(report_dir.cleanup)
+        report = os.path.join(report_dir.name, 'report.xml')
+        argv = ['--line-timeout', '0.2', '-e', r'TODO (a|aa)*b', r'\bTODO\b',
+                r'\bFIXME\b']
+        todos.todos.Todos().main(argv + ['-x', report, '-D', 'CVS', '.git',
+                '--', self.root])
+
+        # The comments of the timed out file are unknown, it is searched again
+        incremental = self.search(argv + ['--since', 'HEAD', '--baseline',
+                report])
+        self.assertEqual(['build/out.py', 'slow.py'],
+                sorted(self.relative(incremental.scanned)))
+        self.assertEqual(['slow.py'],
+                self.relative(incremental.summary.timed_out))
+
+    def test_blobs(self):
+        self.write({'a-b/c.py': '# FIXME modified\n'})
+
+        parameters = argparse.Namespace(suppressed=['CVS'])
+        walker = todos.git.TrackedFilesWalker(parameters,
+                todos.logger.Logger(False))
+        walker.blobs = {}
+        list(walker.walk([self.root]))
+
+        path = os.path.join(self.root, 'a.py')
+        with open(path, 'rb') as input_file:
+            blob_id = todos.dedup.get_blob_id(input_file.read())
+        self.assertEqual(self.git('hash-object', path).strip(), blob_id)
+        self.assertEqual(blob_id, walker.blobs[path])
+        self.assertNotIn(os.path.join(self.root, 'a-b/c.py'), walker.blobs)
+
+        # The same content is found by the blob id without reading the file
+        argv = ['--git-tracked']
+        comments_search = self.search(argv)
+        self.assertEqual(self.dump(self.search(argv + ['--no-dedup'])),
+                self.dump(comments_search))
+        self.assertEqual(['a/z.py', 'a-b/c.py'],
+                self.relative(comments_search.scanned))
+        self.assertEqual(1, comments_search.dedup.statistics.duplicates)
+
+    def test_revision(self):
+        self.git('rm', '-q', 'a/z.py')
+        self.write({'a.py': '# FIXME second\n', 'new.py': '# TODO new\n'})
+        self.git('add', 'a.py', 'new.py')
+        self.git('commit', '-q', '-m', 'Second commit')
+        os.symlink('a.py', os.path.join(self.root, 'link.py'))
+        self.git('add', 'link.py')
+        self.git('commit', '-q', '-m', 'Symlink')
+        self.write({'a.py': '# TODO modified\n'})
+
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        argv = ['--cache-dir', cache_dir.name]
+
+        # The work tree is not used, the symbolic link is not searched
+        first = self.search(argv + ['--git-rev', 'HEAD~2'],
+                CountingRevisionSearch)
+        self.assertEqual([
+                ('a/z.py', 1, r'\bTODO\b', ['# TODO tracked']),
+                ('a-b/c.py', 1, r'\bFIXME\b', ['# FIXME tracked']),
+                ('a.py', 1, r'\bTODO\b', ['# TODO tracked']),
+            ], self.dump(first))
+        self.assertEqual(['a/z.py', 'a-b/c.py'], self.relative(first.scanned))
+
+        # Only the changed blobs are read
+        second = self.search(argv + ['--git-rev', 'HEAD'],
+                CountingRevisionSearch)
+        self.assertEqual([
+                ('a-b/c.py', 1, r'\bFIXME\b', ['# FIXME tracked']),
+                ('a.py', 1, r'\bFIXME\b', ['# FIXME second']),
+                ('new.py', 1, r'\bTODO\b', ['# TODO new']),
+            ], self.dump(second))
+        self.assertEqual(['a.py', 'new.py'], self.relative(second.scanned))
+
+    def test_blob_reader(self):
+        blob_id = self.git('rev-parse', 'HEAD:a.py').strip()
+        reader = todos.git.BlobReader(self.root)
+        self.addCleanup(reader.close)
+        self.assertEqual(b'# TODO tracked\n', reader.read(blob_id))
+        with self.assertRaises(IOError):
+            reader.read('0' * 40)
+        self.assertEqual(b'# FIXME tracked\n', reader.read(
+                self.git('rev-parse', 'HEAD:a-b/c.py').strip()))
+
+    def test_not_repository(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(todos.exceptions.TodosFatalError):
+                todos.git.run_git(directory, ['ls-files'])
+
+
+###############################################################################
+####
+
+class CountingCommentsSearch(todos.search.CommentsSearch):
+    def __init__(self, parameters, logger):
+        super(CountingCommentsSearch, self).__init__(parameters, logger)
+        self.scanned = []
+
+    def search_data(self, path, data):
+        self.scanned.append(path)
+        return super(CountingCommentsSearch, self).search_data(path, data)
+
+
+class CountingRevisionSearch(todos.revision.RevisionCommentsSearch):
+    def __init__(self, parameters, logger):
+        super(CountingRevisionSearch, self).__init__(parameters, logger)
+        self.scanned = []
+
+    def search_data(self, path, data):
+        self.scanned.append(path)
+        return super(CountingRevisionSearch, self).search_data(path, data)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of the search with a time budget.
+"""
+
+
+###############################################################################
+####
+
+import io
+import json
+import os
+import unittest
+import unittest.mock
+import tests
+import todos.exceptions
+import todos.guard
+import todos.logger
+import todos.output_html
+import todos.output_json
+import todos.output_txt
+import todos.output_xml
+import todos.parallel
+import todos.search
+import todos.todos
+import todos.version
+
+
+###############################################################################
+####
+
+class GuardTestCase(tests.FilesTestCase):
+    FILES = {
+        'a.py': '# TODO first\nx = 1\n# FIXME second\n',
+        'b/slow.py': '# TODO ' + 'a' * 40 + '!\n',
+        'c.py': '# TODO last\n',
+    }
+
+    # Catastrophic backtracking in the line of slow.py
+    PATTERNS = [r'TODO (a|aa)*b', r'\bTODO\b', r'\bFIXME\b']
+
+    def test_same_results(self):
+        expected = self.search(['-A', '2'])
+        comments_search = self.search(['-A', '2', '--file-timeout', '60'])
+        self.assertEqual(self.dump(expected), self.dump(comments_search))
+        self.assertEqual(expected.summary.total_files,
+                comments_search.summary.total_files)
+        self.assertEqual([], comments_search.summary.timed_out)
+
+    def test_line_timeout(self):
+        for argv, search_class in [([], todos.search.CommentsSearch),
+                (['-j', '2'], todos.parallel.ParallelCommentsSearch)]:
+            comments_search = self.search(argv + ['--line-timeout', '0.2',
+                    '--stats', '-e'] + self.PATTERNS, search_class)
+
+            # The search continues with the next files
+            self.assertEqual([
+                    ('a.py', 1, r'\bTODO\b', ['# TODO first']),
+                    ('a.py', 3, r'\bFIXME\b', ['# FIXME second']),
+                    ('c.py', 1, r'\bTODO\b', ['# TODO last']),
+                ], self.dump(comments_search))
+            self.assertEqual(['b/slow.py'], [self.relative(path)
+                    for path in comments_search.summary.timed_out])
+            self.assertEqual(2, comments_search.summary.total_files)
+            self.assertEqual(1, comments_search.stats.skipped['timed out'])
+
+    def test_line_timeout_buffer(self):
+        # The pattern without a literal would be searched in the whole buffer
+        self.write({'b/slow.py': '# ' + 'a' * 32 + '!\n'})
+
+        comments_search = self.search(['--line-timeout', '0.2', '-e',
+                r'(a+)+$', r'\bTODO\b'])
+        self.assertEqual(['b/slow.py'], [self.relative(path)
+                for path in comments_search.summary.timed_out])
+        self.assertEqual(2, len(comments_search.comments))
+
+    def test_not_cached(self):
+        cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+
+        # The racy files are not cached, make them older
+        for path in self.FILES:
+            os.utime(os.path.join(self.root, path), (0, 0))
+
+        argv = ['--cache-dir', cache_dir, '--file-timeout', '0.2', '-e'] + \
+                self.PATTERNS
+        for run in range(2):
+            comments_search = self.search(argv)
+            self.assertEqual(['b/slow.py'], [self.relative(path)
+                    for path in comments_search.summary.timed_out])
+
+        self.assertEqual(2, comments_search.cache.statistics.hits)
+
+    def test_guard(self):
+        parameters = todos.todos.Todos().parse_command_line_arguments(
+                ['--file-timeout', '0.2', '-e'] + self.PATTERNS)
+        # The patterns are compiled by the search
+        todos.search.CommentsSearch(parameters, todos.logger.Logger(False))
+        guard = todos.guard.SearchGuard(parameters, todos.logger.Logger(False))
+        self.addCleanup(guard.close)
+
+        results, statistics = guard.search('a.py', b'# TODO first\n')
+        self.assertEqual([(r'\bTODO\b', 1, ['# TODO first'])], results)
+        self.assertIsNone(statistics)
+        process = guard.process
+
+        with self.assertRaises(todos.exceptions.TodosTimeoutError):
+            guard.search('slow.py', self.FILES['b/slow.py'].encode())
+        self.assertFalse(process.is_alive())
+
+        # A new worker is started
+        results, statistics = guard.search('c.py', b'# FIXME last\n')
+        self.assertEqual([(r'\bFIXME\b', 1, ['# FIXME last'])], results)
+        self.assertIsNot(process, guard.process)
+
+    def test_parameters(self):
+        for argv in [['--file-timeout', '0'], ['--line-timeout', '-1'],
+                ['--line-timeout', '1', '--profile'],
+                ['--file-timeout', '1', '--watch']]:
+            with self.assertRaises(todos.exceptions.TodosFatalError):
+                todos.todos.Todos().parse_command_line_arguments(argv)
+
+
+###############################################################################
+####
+
+class TimedOutOutputTestCase(unittest.TestCase):
+    def setUp(self):
+        self.parameters = todos.todos.Todos().parse_command_line_arguments([])
+        self.summary = todos.search.Summary(self.parameters)
+        self.summary.timed_out = ['dir/slow.py']
+
+    def write(self, formatter, comments=()):
+        out_stream = io.StringIO()
+        formatter.write_header(out_stream)
+        for comment in comments:
+            formatter.write_comment(out_stream, comment)
+        formatter.write_footer(out_stream, self.summary)
+        return out_stream.getvalue()
+
+    def test_txt(self):
+        self.assertEqual('dir/slow.py: timed out\n', self.write(
+                todos.output_txt.TxtFormatter(self.parameters)))
+
+    def test_xml(self):
+        self.assertTrue(self.write(todos.output_xml.XmlFormatter(
+                self.parameters)).endswith('.net" version="{0}">\n'
+                '\t<timed_out file="dir/slow.py" />\n</comments>\n'.format(
+                todos.version.TodosVersion.VERSION)))
+
+        comment = todos.search.Comment(r'\bTODO\b', 'a.py', 1, ['# TODO'])
+        self.assertIn('</comment>\n\t<timed_out file="dir/slow.py" />\n'
+                '</comments>\n', self.write(todos.output_xml.XmlFormatter(
+                self.parameters), [comment]))
+
+    def test_json(self):
+        document = json.loads(self.write(todos.output_json.JsonFormatter(
+                self.parameters)))
+        self.assertEqual(['dir/slow.py'], document['summary']['timed_out'])
+
+    def test_html(self):
+        with unittest.mock.patch.dict(os.environ, {'LOGNAME': 'todos'}):
+            html = self.write(todos.output_html.HtmlFormatter(self.parameters))
+        self.assertIn('<h3 id="timed_out">Timed Out Files</h3>', html)
+        self.assertIn('<td>Timed Out Files</td>\n<td>1</td>', html)
+        self.assertIn('<li><a href="#timed_out">Timed Out Files</a></li>', html)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of the history of the comments in the commits.
+"""
+
+
+###############################################################################
+####
+
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+import todos.git
+import todos.history
+import todos.logger
+import todos.output_history
+import todos.todos
+
+
+###############################################################################
+####
+
+@unittest.skipIf(shutil.which('git') is None, 'git is not installed')
+class HistoryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+
+        self.git('init', '-q')
+        self.git('config', 'user.email', 'todos@example.com')
+        self.git('config', 'user.name', 'TODOs')
+
+        # Three commits on two days, the second one changes only src
+        self.commit('2020-01-01T10:00:00Z', {
+            'a.py': '# TODO one\n',
+            'lib/b.py': '# TODO two\n# FIXME three\n',
+            'src/c.py': '# TODO four\n',
+            'CVS/x.py': '# TODO suppressed\n',
+        })
+        self.commit('2020-01-01T12:00:00Z', {
+            'src/c.py': '# TODO four\n# TODO five\n',
+            'src/deep/d.py': '# TODO one\n',
+        })
+        self.commit('2020-01-02T10:00:00Z', {
+            'a.py': 'x = 1\n',
+        })
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def git(self, *args, env=None):
+        return subprocess.run(['git', '-C', self.root] + list(args),
+                check=True, stdout=subprocess.PIPE, env=env).stdout.decode()
+
+    def commit(self, date, files):
+        for path, content in files.items():
+            path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as output_file:
+                output_file.write(content)
+
+        env = dict(os.environ, GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+        self.git('add', '.')
+        self.git('commit', '-q', '-m', date, env=env)
+
+    def history(self, argv):
+        parameters = todos.todos.Todos().parse_history_arguments(
+                argv + ['-D', 'CVS', '--', self.root])
+        history_search = todos.history.HistorySearch(parameters,
+                todos.logger.Logger(False))
+        return parameters, history_search, list(history_search.iterate())
+
+    def dump(self, points):
+        return [(todos.history.format_time(point.timestamp), point.total_files,
+                list(point.per_pattern.values()), point.per_directory)
+                for point in points]
+
+    def test_history(self):
+        parameters, history_search, points = self.history([])
+        self.assertEqual([
+                ('2020-01-01T10:00:00Z', 3, [3, 1],
+                        {'.': 1, 'lib': 2, 'src': 1}),
+                ('2020-01-01T12:00:00Z', 4, [5, 1],
+                        {'.': 1, 'lib': 2, 'src': 3}),
+                ('2020-01-02T10:00:00Z', 4, [4, 1],
+                        {'lib': 2, 'src': 3}),
+            ], self.dump(points))
+        self.assertEqual(self.git('rev-parse', 'HEAD').strip(),
+                points[-1].commit)
+
+        # Each distinct blob is searched once, d.py has the blob of a.py,
+        # the unchanged trees like lib are listed once
+        self.assertEqual(5, history_search.statistics.blobs)
+        self.assertEqual(2, history_search.statistics.reused)
+        self.assertEqual(7, history_search.statistics.trees)
+
+    def test_depth_and_subdirectory(self):
+        parameters, history_search, points = self.history(['--depth', '2'])
+        self.assertEqual({'.': 1, 'lib': 2, 'src': 2, 'src/deep': 1},
+                points[1].per_directory)
+
+        parameters = todos.todos.Todos().parse_history_arguments(
+                [os.path.join(self.root, 'src')])
+        history_search = todos.history.HistorySearch(parameters,
+                todos.logger.Logger(False))
+        self.assertEqual([(1, [1, 0], {'.': 1}), (2, [3, 0], {'.': 2, 'deep': 1}),
+                (2, [3, 0], {'.': 2, 'deep': 1})],
+                [(point.total_files, list(point.per_pattern.values()),
+                point.per_directory) for point in history_search.iterate()])
+
+    def test_period(self):
+        parameters, history_search, points = self.history(['--period', 'day'])
+        self.assertEqual(['2020-01-01T12:00:00Z', '2020-01-02T10:00:00Z'],
+                [todos.history.format_time(point.timestamp)
+                for point in points])
+
+        parameters, history_search, points = self.history(['--range',
+                'HEAD~1', '--period', 'month'])
+        self.assertEqual(['2020-01-01T12:00:00Z'],
+                [todos.history.format_time(point.timestamp)
+                for point in points])
+
+    def test_after(self):
+        parameters, history_search, points = self.history(['--after',
+                '2020-01-01T11:00:00Z'])
+        self.assertEqual(['2020-01-01T12:00:00Z', '2020-01-02T10:00:00Z'],
+                [todos.history.format_time(point.timestamp)
+                for point in points])
+
+    def test_period_key(self):
+        timestamp = 1577836800  # 2020-01-01, Wednesday
+        self.assertEqual('2020-01-01',
+                todos.history.get_period_key(timestamp, 'day'))
+        self.assertEqual('2020-W01',
+                todos.history.get_period_key(timestamp, 'week'))
+        self.assertEqual('2020-01',
+                todos.history.get_period_key(timestamp, 'month'))
+        self.assertIsNone(todos.history.get_period_key(timestamp, 'commit'))
+
+    def test_output(self):
+        parameters, history_search, points = self.history(['--period', 'day'])
+
+        out_stream = io.StringIO()
+        todos.output_history.CsvHistoryFormatter(parameters).write(out_stream,
+                points)
+        lines = out_stream.getvalue().splitlines()
+        self.assertEqual(r'commit,date,files,total,\bTODO\b,\bFIXME\b,'
+                './,lib/,src/', lines[0])
+        self.assertEqual(points[0].commit + ',2020-01-01T12:00:00Z,4,6,5,1,'
+                '1,2,3', lines[1])
+        self.assertEqual(points[1].commit + ',2020-01-02T10:00:00Z,4,5,4,1,'
+                '0,2,3', lines[2])
+
+        out_stream = io.StringIO()
+        todos.output_history.JsonHistoryFormatter(parameters).write(out_stream,
+                points)
+        history = json.loads(out_stream.getvalue())['history']
+        self.assertEqual([6, 5], [point['total'] for point in history])
+        self.assertEqual({'lib': 2, 'src': 3}, history[1]['per_directory'])
+
+    def test_parse_tree(self):
+        tree_id = self.git('rev-parse', 'HEAD^{tree}').strip()
+        reader = todos.git.BlobReader(self.root)
+        self.addCleanup(reader.close)
+        entries = todos.git.parse_tree(reader.read_object(tree_id, 'tree'),
+                len(tree_id) // 2)
+        self.assertEqual([(todos.git.MODE_TREE, 'CVS'), ('100644', 'a.py'),
+                (todos.git.MODE_TREE, 'lib'), (todos.git.MODE_TREE, 'src')],
+                [(mode, name) for mode, name, object_id in entries])
+        self.assertEqual(self.git('rev-parse', 'HEAD:a.py').strip(),
+                entries[1][2])
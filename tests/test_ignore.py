@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of the ignore rules.
+"""
+
+
+###############################################################################
+####
+
+import unittest
+import todos.ignore
+
+
+###############################################################################
+####
+
+class IgnoreRuleTestCase(unittest.TestCase):
+    def matches(self, line, path, is_dir=False):
+        rule = todos.ignore.IgnoreRule.parse(line)
+        return rule.matches(path, path.rsplit('/', 1)[-1], is_dir)
+
+    def test_parse(self):
+        parse = todos.ignore.IgnoreRule.parse
+        self.assertIsNone(parse('# comment\n'))
+        self.assertIsNone(parse('   \n'))
+        self.assertTrue(parse('!a').negated)
+        self.assertTrue(parse('a/').dir_only)
+        self.assertFalse(parse('a/').anchored)
+        self.assertTrue(parse('/a').anchored)
+        self.assertTrue(parse('a/b').anchored)
+
+    def test_name(self):
+        self.assertTrue(self.matches('*.o', 'x/y/z.o'))
+        self.assertFalse(self.matches('*.o', 'x/y/z.c'))
+        self.assertTrue(self.matches('build/', 'src/build', True))
+        self.assertFalse(self.matches('build/', 'src/build', False))
+        self.assertTrue(self.matches('\\#x', '#x'))
+        self.assertTrue(self.matches('a\\ ', 'a '))
+        self.assertTrue(self.matches('[!a-c]?', 'dx'))
+        self.assertFalse(self.matches('[!a-c]?', 'bx'))
+
+    def test_anchored(self):
+        self.assertTrue(self.matches('/build', 'build'))
+        self.assertFalse(self.matches('/build', 'src/build'))
+        self.assertTrue(self.matches('doc/*.txt', 'doc/a.txt'))
+        self.assertFalse(self.matches('doc/*.txt', 'doc/x/a.txt'))
+
+    def test_double_asterisk(self):
+        self.assertTrue(self.matches('**/foo', 'foo'))
+        self.assertTrue(self.matches('**/foo', 'a/b/foo'))
+        self.assertTrue(self.matches('a/**/b', 'a/b'))
+        self.assertTrue(self.matches('a/**/b', 'a/x/y/b'))
+        self.assertTrue(self.matches('a/**', 'a/x/y'))
+        self.assertFalse(self.matches('a/**', 'a'))
+        self.assertFalse(self.matches('a**b', 'a/b'))
+
+    def test_precedence(self):
+        rules = todos.ignore.IgnoreRules('root', '', [
+                todos.ignore.IgnoreRule.parse('*.log'),
+                todos.ignore.IgnoreRule.parse('!keep.log')])
+        self.assertTrue(rules.match('root/a.log', 'a.log', False))
+        self.assertFalse(rules.match('root/keep.log', 'keep.log', False))
+        self.assertIsNone(rules.match('root/a.txt', 'a.txt', False))
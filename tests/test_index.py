@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of the index of the comments.
+"""
+
+
+###############################################################################
+####
+
+import os
+import tests
+import todos.exceptions
+import todos.index
+import todos.logger
+import todos.parallel
+import todos.todos
+
+
+###############################################################################
+####
+
+class IndexTestCase(tests.FilesTestCase):
+    FILES = {
+        'a.py': '# TODO first JIRA-12\n# FIXME second\n',
+        'a-b/c.c': '/* FIXME third jira-7 */\n',
+        'a/z.py': '# TODO fourth\n',
+        'e.bin': '\0# TODO binary\n',
+    }
+
+    # Old enough to be trusted by the next run
+    MTIME = 0
+
+    def setUp(self):
+        tests.FilesTestCase.setUp(self)
+        self.db = os.path.join(self.tmp_dir.name, 'index.db')
+
+    def parse(self, argv=None):
+        return tests.FilesTestCase.parse(self,
+                (argv or []) + ['--index', self.db])
+
+    def query(self, argv=None):
+        parameters = todos.todos.Todos().parse_query_arguments(
+                (argv or []) + ['--index', self.db])
+        return todos.index.IndexQuery(parameters, todos.logger.Logger(False))
+
+    def dump(self, index_query):
+        return [(self.relative(comment.path), comment.position,
+                comment.lines) for comment in index_query.iterate()]
+
+    def test_incremental(self):
+        statistics = self.search().index.statistics
+        self.assertEqual((0, 4, 0), (statistics.hits, statistics.updated,
+                statistics.removed))
+
+        self.write({'a/z.py': '# FIXME changed\n'})
+        os.utime(os.path.join(self.root, 'a/z.py'), (0, 1))
+        os.unlink(os.path.join(self.root, 'a-b/c.c'))
+
+        comments_search = self.search(['-j', '2'],
+                todos.parallel.ParallelCommentsSearch)
+        statistics = comments_search.index.statistics
+        self.assertEqual((2, 1, 1), (statistics.hits, statistics.updated,
+                statistics.removed))
+        self.assertEqual(3, len(comments_search.comments))
+
+        index_query = self.query()
+        self.assertEqual([
+                ('a/z.py', 1, ['# FIXME changed']),
+                ('a.py', 1, ['# TODO first JIRA-12']),
+                ('a.py', 2, ['# FIXME second']),
+            ], self.dump(index_query))
+        self.assertEqual(2, index_query.summary.total_files)
+        self.assertEqual({r'\bTODO\b': 1, r'\bFIXME\b': 2},
+                index_query.summary.per_pattern)
+
+        # Different parameters reindex all files
+        statistics = self.search(['-A', '2']).index.statistics
+        self.assertEqual((0, 3, 0), (statistics.hits, statistics.updated,
+                statistics.removed))
+
+    def test_query(self):
+        self.search()
+
+        self.assertEqual([('a/z.py', 1), ('a-b/c.c', 1), ('a.py', 1),
+                ('a.py', 2)], [item[:2] for item in self.dump(self.query())])
+
+        self.assertEqual([('a-b/c.c', 1), ('a.py', 2)],
+                [item[:2] for item in self.dump(self.query(
+                ['-e', r'\bFIXME\b']))])
+
+        index_query = self.query(['--path', os.path.join(self.root, 'a')])
+        self.assertEqual([('a/z.py', 1)],
+                [item[:2] for item in self.dump(index_query)])
+        self.assertEqual(1, index_query.summary.total_files)
+
+        self.assertEqual([('a.py', 1)],
+                [item[:2] for item in self.dump(self.query(
+                ['--match', r'JIRA-\d+']))])
+
+        self.assertEqual([('a-b/c.c', 1), ('a.py', 1)],
+                [item[:2] for item in self.dump(self.query(
+                ['--match', r'JIRA-\d+', '-i']))])
+
+        self.assertEqual([
+                (os.path.join(self.root, 'a.py'), 2),
+                (os.path.join(self.root, 'a', 'z.py'), 1),
+            ], self.query(['--limit', '2']).count_by('file'))
+
+        self.assertEqual([(r'\bTODO\b', 2), (r'\bFIXME\b', 2)],
+                sorted(self.query().count_by('pattern'), reverse=True))
+
+        with self.assertRaises(todos.exceptions.TodosFatalError):
+            self.query(['-e', 'unknown'])
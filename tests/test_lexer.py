@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Unit test of the language-aware comment lexer.
+"""
+
+
+###############################################################################
+####
+
+import unittest
+import tests
+import todos.lexer
+
+
+###############################################################################
+####
+
+class LexerTestCase(unittest.TestCase):
+    def comments(self, path, buffer):
+        syntax = todos.lexer.get_syntax(path)
+        return [buffer[start:end] for start, end in
+                syntax.find_spans(buffer)[0]]
+
+    def test_c(self):
+        self.assertEqual(['// real', '/* block\n two */'], self.comments(
+                'a.cpp', 'x = "http://url # /*"; // real\n'
+                "c = '\"'; /* block\n two */ y = 1;\n"))
+
+    def test_unterminated(self):
+        self.assertEqual(['// after'], self.comments('a.c',
+                's = "open\n// after\n'))
+        self.assertEqual(['/* open'], self.comments('a.c', 'x;\n/* open'))
+
+    def test_python(self):
+        self.assertEqual(['# real'], self.comments('a.py',
+                's = """\n# doc\n""" + \'#\' + "\\"#"  # real\n'))
+
+    def test_shell(self):
+        self.assertEqual(['# count', '#x'], self.comments('run.sh',
+                'echo $# "#" ${#a} # count\n#x\n'))
+        self.assertEqual(['# rule'], self.comments('dir/Makefile',
+                'all: # rule\n'))
+
+    def test_shell_here_document(self):
+        # The apostrophe doesn't start a string hiding the next lines
+        self.assertEqual(['# TODO after'], self.comments('run.sh',
+                "cat <<EOF\nIt's here\nEOF\n# TODO after\n"))
+
+    def test_rust(self):
+        self.assertEqual(['// TODO after'], self.comments('a.rs',
+                "fn f<'a>(x: &'a str) -> char {\n"
+                "    let q = '\"'; let e = '\\''; '\\u{1F600}'\n"
+                "}\n// TODO after\n"))
+
+    def test_yaml_toml(self):
+        self.assertEqual(['# TODO x'], self.comments('a.yml',
+                "name: Bob's  # TODO x\n"))
+        self.assertEqual(['# TODO x'], self.comments('a.toml',
+                'name = "Bob\'s #1"  # TODO x\n'))
+
+    def test_markup(self):
+        # The scripts and the styles have their own comments
+        self.assertIsNone(todos.lexer.get_syntax('a.html'))
+        self.assertEqual(['<!-- x -->'], self.comments('a.xml',
+                '<a href="http://x"/><!-- x -->\n'))
+
+    def test_longest_marker(self):
+        self.assertEqual(['--[[ block\n]]', '-- line'], self.comments('a.lua',
+                '--[[ block\n]] x = 1 -- line\n'))
+
+    def test_parts(self):
+        # The buffer is lexed in parts ending at the line ends
+        for path, buffer in [
+                ('a.c', 'a; /* one\ntwo\nthree */ b; // x\n"s\\\n/*"; c\n'),
+                ('a.py', 'x = """\n# no\n"""  # yes\n\'\'\'\n\n\'\'\'\n'),
+                ('a.lua', '--[[\n\n]] -- y\n--[[ open\n'),
+                ('a.rs', "// y\nlet c = '\"'"),
+                ]:
+            syntax = todos.lexer.get_syntax(path)
+            lines = buffer.splitlines(True)
+
+            comments = []
+            state = None
+            offset = 0
+            for line in lines:
+                spans, state = syntax.find_spans(line, state)
+                comments.extend(buffer[offset + start:offset + end]
+                        for start, end in spans)
+                offset += len(line)
+
+            # The parts of the comments split by the lines
+            expected = []
+            for comment in self.comments(path, buffer):
+                expected.extend(comment.splitlines(True))
+            self.assertEqual(expected, comments)
+
+    def test_unknown(self):
+        self.assertIsNone(todos.lexer.get_syntax('a.txt'))
+        self.assertIsNotNone(todos.lexer.get_syntax('A.CPP'))
+
+    def test_get_text(self):
+        buffer = 'a /* x */ b /* y */\nc // z\n'
+        spans = todos.lexer.CommentSpans(buffer, todos.lexer.get_syntax('a.c'))
+        self.assertEqual('/* x */\n/* y */', spans.get_text(0, 20))
+        self.assertEqual('// z', spans.get_text(20, 27))
+        self.assertIsNone(spans.get_text(9, 12))
+        self.assertEqual(12, spans.get_next(9))
+        self.assertEqual(-1, spans.get_next(27))
+
+
+class LexerSearchTestCase(tests.FilesTestCase):
+    FILES = {
+        'a.c': 'url = "http://TODO"; // TODO real\n/* FIXME\n   TODO inside */\n',
+        'b.txt': 'text # TODO marker\n',
+    }
+
+    def dump(self, comments_search):
+        return [(self.relative(comment.path), comment.position,
+                comment.str_pattern) for comment in comments_search.comments]
+
+    def test_search(self):
+        expected = [
+            ('a.c', 1, r'\bTODO\b'),
+            ('a.c', 2, r'\bFIXME\b'),
+            ('a.c', 3, r'\bTODO\b'),
+            ('b.txt', 1, r'\bTODO\b'),
+        ]
+
+        self.assertEqual(expected, self.dump(self.search()))
+
+        # Patterns that can't be searched in the whole buffer
+        expected[1] = ('a.c', 2, r'(?<=\s)FIXME\b')
+        self.assertEqual(expected, self.dump(self.search(['-e', r'\bTODO\b',
+                r'(?<=\s)FIXME\b'])))
+
+    def test_html_script(self):
+        self.write({'c.html': '<script>// TODO script</script>\n'
+                '<!-- FIXME markup -->\n'})
+
+        self.assertEqual([('c.html', 1, r'\bTODO\b'),
+                ('c.html', 2, r'\bFIXME\b')],
+                [comment for comment in self.dump(self.search())
+                if comment[0] == 'c.html'])
+
+    def test_no_lexer(self):
+        self.assertEqual([
+                ('a.c', 1, r'\bTODO\b'),
+                ('a.c', 2, r'\bFIXME\b'),
+                ('b.txt', 1, r'\bTODO\b'),
+            ], self.dump(self.search(['--no-lexer'])))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of CombinedMatcher class.
+"""
+
+
+###############################################################################
+####
+
+import re
+import unittest
+import todos.matcher
+import todos.search
+
+
+###############################################################################
+####
+
+class CombinedMatcherTestCase(unittest.TestCase):
+    def create(self, str_patterns, flags=0):
+        patterns = [todos.search.Pattern(str_pattern,
+                re.compile(str_pattern, flags)) for str_pattern in str_patterns]
+        return todos.matcher.CombinedMatcher(patterns, flags)
+
+    def search(self, matcher, line):
+        pattern = matcher.search(line)
+        if pattern is None:
+            return None
+        return pattern.str_pattern
+
+    def test_list_order_wins(self):
+        matcher = self.create([r'\bTODO\b', r'\bFIXME\b', 'X'])
+        self.assertEqual(r'\bTODO\b', self.search(matcher, 'X FIXME TODO'))
+        self.assertEqual(r'\bFIXME\b', self.search(matcher, 'X FIXME'))
+        self.assertEqual('X', self.search(matcher, '# X'))
+        self.assertEqual(None, self.search(matcher, '# TODOs'))
+        self.assertEqual([], matcher.fallback_indexes)
+
+    def test_fallback(self):
+        matcher = self.create(['TODO', r'(a)\1', '(?i)fixme', '(?P<n>b)'])
+        self.assertEqual([1, 2], matcher.fallback_indexes)
+        self.assertEqual(r'(a)\1', self.search(matcher, 'b aa'))
+        self.assertEqual('(?i)fixme', self.search(matcher, 'b FixMe'))
+        self.assertEqual('TODO', self.search(matcher, 'FIXME aa TODO'))
+
+    def test_candidates(self):
+        matcher = self.create(['TODO', r'(a)\1', 'FIXME'])
+        self.assertEqual('FIXME', matcher.search('FIXME TODO', 0b100).
+                str_pattern)
+        self.assertEqual(r'(a)\1', matcher.search('aa TODO', 0b110).
+                str_pattern)
+        self.assertEqual('TODO', matcher.search('aa TODO', 0b111).str_pattern)
+        self.assertEqual([0b100, 0b110], sorted(matcher.subset_cache))
+
+    def test_ignore_case(self):
+        matcher = self.create(['TODO', 'FIXME'], re.IGNORECASE)
+        self.assertEqual('TODO', self.search(matcher, 'fixme todo'))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of XmlFormatter class.
+"""
+
+
+###############################################################################
+####
+
+import argparse
+import io
+import unittest
+import xml.etree.ElementTree as etree
+import todos.output_xml
+import todos.search
+import todos.version
+
+
+###############################################################################
+####
+
+class XmlFormatterTestCase(unittest.TestCase):
+    NS = '{http://todos.sourceforge.net}'
+
+    def write(self, comments):
+        formatter = todos.output_xml.XmlFormatter(argparse.Namespace())
+        out_stream = io.StringIO()
+        formatter.write_header(out_stream)
+        for comment in comments:
+            formatter.write_comment(out_stream, comment)
+        formatter.write_footer(out_stream, None)
+        return out_stream.getvalue()
+
+    def write_tree(self, comments):
+        # The pretty printed ElementTree document the Jenkins plugin parses
+        el_comments = etree.Element(self.NS + 'comments', attrib={
+                self.NS + 'version': todos.version.TodosVersion.VERSION})
+        el_comments.text = '\n\t'
+
+        el_comment = None
+        for comment in comments:
+            el_comment = etree.SubElement(el_comments, self.NS + 'comment',
+                    attrib={
+                        self.NS + 'pattern': comment.str_pattern,
+                        self.NS + 'file': comment.path,
+                        self.NS + 'line': str(comment.position)})
+            el_comment.text = '\n'.join(comment.lines)
+            el_comment.tail = '\n\t'
+
+        if el_comment is not None:
+            el_comment.tail = '\n'
+            el_comments.tail = '\n'
+        else:
+            el_comments.text = None
+
+        out_stream = io.StringIO()
+        etree.ElementTree(el_comments).write(out_stream, encoding='unicode',
+                xml_declaration=True,
+                default_namespace='http://todos.sourceforge.net')
+        return out_stream.getvalue()
+
+    def test_same_as_tree(self):
+        comments = [
+            todos.search.Comment(r'\bTODO\b', 'a&b.py', 1, ['# TODO <x>']),
+            todos.search.Comment('"q"\t', 'c\n.py', 2, ['a', 'b & "c"']),
+            todos.search.Comment('x', 'd.py', 3, []),
+            todos.search.Comment('x', 'e.py', 4, ['\r']),
+        ]
+        self.assertEqual(self.write_tree(comments), self.write(comments))
+
+    def test_empty(self):
+        self.assertEqual(self.write_tree([]), self.write([]))
+
+    def test_parse(self):
+        root = etree.fromstring(self.write([
+                todos.search.Comment('p', 'f', 7, ['a & b', 'c'])]))
+        self.assertEqual(self.NS + 'comments', root.tag)
+        self.assertEqual('a & b\nc', root[0].text)
+        self.assertEqual('7', root[0].get('line'))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of BytePrefilter class.
+"""
+
+
+###############################################################################
+####
+
+import argparse
+import re
+import unittest
+import todos.prefilter
+import todos.search
+
+
+###############################################################################
+####
+
+class BytePrefilterTestCase(unittest.TestCase):
+    def create(self, str_patterns, comments=('#', '//'), encoding='utf-8',
+            ignore_case=False, lexer=False):
+        parameters = argparse.Namespace(comments=list(comments),
+                encoding=encoding, ignore_case=ignore_case, lexer=lexer)
+        patterns = [todos.search.Pattern(str_pattern, re.compile(str_pattern))
+                for str_pattern in str_patterns]
+        return todos.prefilter.BytePrefilter(parameters, patterns)
+
+    def test_required_literal(self):
+        get = todos.prefilter.get_required_literal
+        self.assertEqual('TODO', get(r'\bTODO\b'))
+        self.assertEqual('JIRA-', get(r'JIRA-\d+'))
+        self.assertEqual('FIX', get(r'FIX(ME)?'))
+        self.assertEqual(None, get(r'TODO|FIXME'))
+        self.assertEqual(None, get(r'(?i)todo'))
+        self.assertEqual(None, get(r'\w+'))
+
+    def test_folded_literal(self):
+        get = todos.prefilter.get_required_literal
+        self.assertEqual('todo', get(r'\bTODO\b', re.IGNORECASE, folded=True))
+        self.assertEqual('todo', get(r'(?i)ToDo', folded=True))
+        self.assertEqual('strasse', get(r'STRAẞE', re.IGNORECASE, folded=True))
+        self.assertEqual('fixme', todos.prefilter.casefold('FıXME'))
+        self.assertEqual(None, get('İ', re.IGNORECASE, folded=True))
+
+    def test_candidate(self):
+        prefilter = self.create([r'\bTODO\b', r'\bFIXME\b'])
+        self.assertTrue(prefilter.is_candidate(b'x\n# TODO\n'))
+        self.assertTrue(prefilter.is_candidate(b'// FIXME'))
+        self.assertFalse(prefilter.is_candidate(b'TODO without comment'))
+        self.assertFalse(prefilter.is_candidate(b'# nothing'))
+
+    def test_lexer_markers(self):
+        prefilter = self.create([r'\bTODO\b'], lexer=True)
+        self.assertTrue(prefilter.is_candidate(b'-- TODO in SQL'))
+        self.assertFalse(prefilter.is_candidate(b'TODO without comment'))
+
+    def test_no_literal(self):
+        prefilter = self.create([r'\bTODO\b', r'\w+'])
+        self.assertIsNone(prefilter.pattern_atoms)
+        self.assertTrue(prefilter.is_candidate(b'# nothing'))
+
+    def test_ignore_case(self):
+        prefilter = self.create([r'\bTODO\b'], ignore_case=True)
+        self.assertTrue(prefilter.is_candidate(b'# todo'))
+
+    def test_encoding(self):
+        prefilter = self.create(['TODO'], encoding='utf-16')
+        self.assertIsNone(prefilter.comment_atoms)
+        self.assertIsNone(prefilter.pattern_atoms)
+
+        prefilter = self.create(['Ž'], encoding='ascii')
+        self.assertEqual([b'#', b'//'], prefilter.comment_atoms)
+        self.assertIsNone(prefilter.pattern_atoms)
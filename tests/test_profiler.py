@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of the profiler of the search.
+"""
+
+
+###############################################################################
+####
+
+import io
+import tests
+import todos.exceptions
+import todos.output_html
+import todos.todos
+
+
+###############################################################################
+####
+
+class ProfilerTestCase(tests.FilesTestCase):
+    FILES = {
+        'a.py': '# TODO first\nx = 1\n# FIXME second\n',
+        'b/c.c': '/* FIXME TODO both */\n// nothing\nTODO no comment\n',
+        'd.py': ''.join('# line {0}\n'.format(number)
+                for number in range(100)) + '# TODO last\n',
+    }
+
+    def test_profile(self):
+        expected = self.create(['-A', '2'])
+        expected.search()
+
+        comments_search = self.create(['-A', '2', '--profile',
+                '--profile-top', '2', '--profile-threshold', '0'])
+        comments_search.search()
+        self.assertEqual(self.dump(expected), self.dump(comments_search))
+
+        profiler = comments_search.profiler
+        self.assertEqual(3, profiler.total_files)
+        self.assertEqual(2, len(profiler.get_files()))
+
+        # Only the patterns whose literals are in the line are searched
+        patterns = dict(profiler.get_patterns())
+        self.assertEqual((3, 3), (patterns[r'\bTODO\b'].calls,
+                patterns[r'\bTODO\b'].matches))
+        self.assertEqual((2, 2), (patterns[r'\bFIXME\b'].calls,
+                patterns[r'\bFIXME\b'].matches))
+
+        # Every search is slower than zero, the slowest two are kept
+        self.assertEqual(5, profiler.slow_lines)
+        self.assertEqual(2, len(profiler.get_lines()))
+
+    def test_line_numbers(self):
+        comments_search = self.create(['--profile', '--profile-threshold',
+                '0', '--profile-top', '100', '-t', 'py'])
+        comments_search.STREAM_SIZE = 1
+        comments_search.CHUNK_SIZE = 64
+        comments_search.search()
+
+        # The lines of the large file are numbered across the chunks
+        self.assertEqual([('a.py', 1), ('a.py', 3), ('d.py', 101)],
+                sorted((self.relative(path), line)
+                for elapsed, path, line, str_pattern
+                in comments_search.profiler.get_lines()))
+
+    def test_no_literal(self):
+        # The pattern would be searched in the whole buffer by the combined
+        # expression, outside of the timed searches
+        self.write({'slow.py': '# ' + 'a' * 22 + '!\n'})
+
+        comments_search = self.create(['--profile', '--profile-threshold',
+                '0.01', '-e', r'(a+)+$', r'\bTODO\b'])
+        comments_search.search()
+
+        profiler = comments_search.profiler
+        self.assertEqual(r'(a+)+$', profiler.get_patterns()[0][0])
+        self.assertEqual([('slow.py', 1, r'(a+)+$')],
+                [(self.relative(path), line, str_pattern)
+                for elapsed, path, line, str_pattern in profiler.get_lines()])
+
+    def test_html(self):
+        comments_search = self.create(['--profile'])
+        comments_search.search()
+
+        formatter = todos.output_html.HtmlFormatter(comments_search.parameters)
+        formatter.profiler = comments_search.profiler
+        out_stream = io.StringIO()
+        formatter.write_profile(out_stream, comments_search.profiler)
+        html = out_stream.getvalue()
+
+        self.assertIn('<h2 id="profile">Profile</h2>', html)
+        self.assertIn(r'\bFIXME\b', html)
+        self.assertIn('Searches longer than 0.100 s: 0', html)
+
+        report = comments_search.profiler.format_report()
+        self.assertIn('Profiled files: 3', report)
+
+    def test_parameters(self):
+        for argv in [['--profile', '-j', '2'], ['--profile-top', '-1'],
+                ['--profile-threshold', '-1']]:
+            with self.assertRaises(todos.exceptions.TodosFatalError):
+                todos.todos.Todos().parse_command_line_arguments(argv)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of CommentsSearch class.
+"""
+
+
+###############################################################################
+####
+
+import os
+import re
+import unittest
+import tests
+import todos.parallel
+import todos.search
+
+
+###############################################################################
+####
+
+class CommentsSearchTestCase(tests.FilesTestCase):
+    FILES = {
+        'a.py': '# TODO first\nx = 1\n# FIXME second\n',
+        'b/c.c': '/* FIXME TODO both */\n// nothing\nTODO no comment\n',
+        'b/d.txt': '',
+        'e.bin': '\0# TODO binary\n',
+    }
+
+    def test_search(self):
+        comments_search = self.search(['-A', '2'])
+        self.assertEqual([
+                ('a.py', 1, r'\bTODO\b', ['# TODO first', 'x = 1']),
+                ('a.py', 3, r'\bFIXME\b', ['# FIXME second']),
+                ('b/c.c', 1, r'\bTODO\b', ['/* FIXME TODO both */',
+                        '// nothing']),
+            ], self.dump(comments_search))
+
+        summary = comments_search.summary
+        self.assertEqual(3, summary.total_files)
+        self.assertEqual(2, summary.total_directories)
+        self.assertEqual({r'\bTODO\b': 2, r'\bFIXME\b': 1}, summary.per_pattern)
+
+    def test_parallel(self):
+        serial = self.search()
+        parallel = self.search(['-j', '2'],
+                todos.parallel.ParallelCommentsSearch)
+        self.assertEqual(self.dump(serial), self.dump(parallel))
+        self.assertEqual(list(serial.summary.per_file.items()),
+                list(parallel.summary.per_file.items()))
+
+    def test_iterate(self):
+        comments_search = self.search()
+        iterated = self.create()
+        iterated.comments = list(iterated.iterate())
+        self.assertEqual(self.dump(comments_search), self.dump(iterated))
+        self.assertEqual(comments_search.summary.per_pattern,
+                iterated.summary.per_pattern)
+
+    def test_iterate_parallel_close(self):
+        comments_search = self.create(['-j', '2'],
+                todos.parallel.ParallelCommentsSearch)
+        generator = comments_search.iterate()
+        self.assertEqual(1, next(generator).position)
+        generator.close()
+        self.assertEqual(0, len(comments_search.comments))
+
+    def test_memory_mapped(self):
+        comments_search = self.create(['-A', '2'])
+        comments_search.MMAP_SIZE = 1
+        comments_search.search()
+        self.assertEqual(self.dump(self.search(['-A', '2'])),
+                self.dump(comments_search))
+
+    def test_new_lines(self):
+        with open(os.path.join(self.root, 'f.py'), 'wb') as output_file:
+            output_file.write(b'# TODO a\r\nb\r# FIXME c\r\n')
+
+        comments_search = self.search(['-A', '2', '--file-ext=py'])
+        self.assertEqual([
+                ('a.py', 1, r'\bTODO\b', ['# TODO first', 'x = 1']),
+                ('a.py', 3, r'\bFIXME\b', ['# FIXME second']),
+                ('f.py', 1, r'\bTODO\b', ['# TODO a', 'b']),
+                ('f.py', 3, r'\bFIXME\b', ['# FIXME c']),
+            ], self.dump(comments_search))
+
+    def test_before_context(self):
+        comments_search = self.search(['-B', '1', '-A', '2'])
+        self.assertEqual([
+                ('a.py', 1, r'\bTODO\b', ['# TODO first', 'x = 1']),
+                ('a.py', 3, r'\bFIXME\b', ['x = 1', '# FIXME second']),
+                ('b/c.c', 1, r'\bTODO\b', ['/* FIXME TODO both */',
+                        '// nothing']),
+            ], self.dump(comments_search))
+        self.assertEqual([0, 1, 0], [comment.before
+                for comment in comments_search.comments])
+
+        self.assertEqual(self.dump(comments_search),
+                self.dump(self.search(['-C', '1'])))
+
+    def test_stream(self):
+        with open(os.path.join(self.root, 'f.py'), 'wb') as output_file:
+            output_file.write('x = """\n# TODO in string\n"""\r\n'
+                    '# TODO ž\r\n\r\n{0} # FIXME long\ny\n# TODO last'.
+                    format('z' * 50).encode('utf-8'))
+
+        for argv in [[], ['-C', '2'], ['-B', '3', '-A', '1'], ['--no-lexer'],
+                ['-e', r'(\w)\1']]:
+            expected = self.search(argv)
+
+            for chunk_size in [1, 2, 3, 7, 64]:
+                comments_search = self.create(argv)
+                comments_search.STREAM_SIZE = 1
+                comments_search.CHUNK_SIZE = chunk_size
+                comments_search.search()
+                self.assertEqual(self.dump(expected),
+                        self.dump(comments_search))
+                self.assertEqual([comment.before
+                        for comment in expected.comments],
+                        [comment.before
+                        for comment in comments_search.comments])
+
+    def test_literals(self):
+        # The lines with the atoms and the lines without them are verified
+        # by the same patterns as without the atoms
+        for argv in [[], ['-i'], ['-e', r'TODO\s\w+'],
+                ['-i', '-e', r'todo\b']]:
+            comments_search = self.create(argv)
+            comments_search.literals.atoms = None
+            comments_search.search()
+            self.assertEqual(self.dump(comments_search),
+                    self.dump(self.search(argv)))
+
+    def test_many_markers(self):
+        # The markers are searched by the automaton, not one by one
+        markers = ['#', '//', '/*'] + ['REM{0}'.format(index)
+                for index in range(40)]
+        argv = ['--no-lexer', '-c'] + markers
+        comments_search = self.create(argv)
+        self.assertFalse(comments_search.automaton.substrings)
+        comments_search.search()
+        self.assertEqual(self.dump(self.search(['--no-lexer'])),
+                self.dump(comments_search))
+
+    def test_dedup(self):
+        content = self.FILES['a.py']
+        self.write({'b/copy.py': content, 'a.c': content})
+        os.link(os.path.join(self.root, 'a.py'),
+                os.path.join(self.root, 'b/link.py'))
+
+        expected = self.search(['--no-dedup'])
+
+        for argv, search_class in [([], todos.search.CommentsSearch),
+                (['-j', '2'], todos.parallel.ParallelCommentsSearch)]:
+            comments_search = self.search(argv, search_class)
+            self.assertEqual(self.dump(expected), self.dump(comments_search))
+            self.assertEqual(list(expected.summary.per_file.items()),
+                    list(comments_search.summary.per_file.items()))
+            self.assertEqual(expected.summary.total_files,
+                    comments_search.summary.total_files)
+
+        # The hash is not confused by the syntax, '#' isn't a comment in C
+        comments_search = self.search()
+        statistics = comments_search.dedup.statistics
+        self.assertEqual(1, statistics.links)
+        self.assertEqual(1, statistics.duplicates)
+        self.assertEqual(2 * len(content), statistics.saved_bytes)
+        self.assertEqual(2, comments_search.summary.per_file[
+                os.path.join(self.root, 'b/link.py')])
+        self.assertNotIn(os.path.join(self.root, 'a.c'),
+                comments_search.summary.per_file)
+
+    def test_multiline_candidate(self):
+        # The buffer match crosses the line end, the line itself must not match
+        comments_search = self.search(['-e', r'first\s+x'])
+        self.assertEqual([], self.dump(comments_search))
+
+    def test_empty_match_at_end(self):
+        # The last line has no new line, the empty match must not loop
+        self.write({'f.py': '# TODO a\n#b'})
+
+        for pattern in ['$', 'x*', '(TODO)?']:
+            comments_search = self.search(['--no-lexer', '--no-dedup',
+                    '-e', pattern])
+            self.assertEqual([1, 2], [position for path, position, str_pattern,
+                    lines in self.dump(comments_search) if path == 'f.py'])
+
+
+###############################################################################
+####
+
+class LiteralFilterTestCase(unittest.TestCase):
+    def create(self, str_patterns, ignore_case=False):
+        flags = re.IGNORECASE if ignore_case else 0
+        patterns = [todos.search.Pattern(str_pattern,
+                re.compile(str_pattern, flags)) for str_pattern in str_patterns]
+        return todos.search.LiteralFilter(patterns, ignore_case)
+
+    def test_atoms(self):
+        literals = self.create([r'\bTODO\b', r'TODO:', r'\bFIXME\b'])
+        self.assertEqual(['FIXME', 'TODO'], literals.atoms)
+        self.assertTrue(literals.is_candidate('# TODO'))
+        self.assertFalse(literals.is_candidate('# todo'))
+        self.assertFalse(literals.is_candidate('# nothing'))
+
+    def test_no_literal(self):
+        literals = self.create([r'\bTODO\b', r'\w+'])
+        self.assertIsNone(literals.atoms)
+        self.assertTrue(literals.is_candidate('# nothing'))
+        self.assertIsNone(literals.create_scanner('# nothing'))
+
+    def test_ignore_case(self):
+        literals = self.create([r'\bTODO\b', r'JIRA-\d+'], True)
+        self.assertEqual(['jira-', 'todo'], literals.atoms)
+        self.assertTrue(literals.is_candidate('# ToDo'))
+        self.assertTrue(literals.is_candidate('# Jıra-1'))
+        self.assertEqual(2, literals.create_scanner('# ToDo').
+                search_candidate(0))
+        self.assertIsNone(literals.create_scanner('# ToDo č'))
+
+    def test_scanner(self):
+        scanner = self.create(['TODO', 'FIXME']).create_scanner(
+                'FIXME TODO\nx\nTODO FIXME')
+        self.assertEqual(0, scanner.search_candidate(0))
+        self.assertEqual(6, scanner.search_candidate(1))
+        self.assertEqual(13, scanner.search_candidate(11))
+        self.assertEqual(18, scanner.search_candidate(14))
+        self.assertEqual(-1, scanner.search_candidate(19))
+
+
+###############################################################################
+####
+
+class LineIndexTestCase(unittest.TestCase):
+    def test_lines(self):
+        line_index = todos.search.LineIndex('a  \nb\n\nc')
+        self.assertEqual(4, line_index.count)
+        self.assertEqual('b\n', line_index.get_line(1))
+        self.assertEqual(['a', 'b'], line_index.get_lines(0, 2))
+        self.assertEqual(['', 'c'], line_index.get_lines(2, 5))
+        self.assertEqual(0, line_index.get_line_number(3))
+        self.assertEqual(1, line_index.get_line_number(4))
+        self.assertEqual(3, line_index.get_line_number(8))
+
+    def test_trailing_new_line(self):
+        line_index = todos.search.LineIndex('a\nb\n')
+        self.assertEqual(2, line_index.count)
+        self.assertEqual(2, line_index.get_line_number(4))
+        self.assertEqual(['b'], line_index.get_lines(1, 1))
+
+    def test_empty(self):
+        line_index = todos.search.LineIndex('')
+        self.assertEqual(0, line_index.count)
+        self.assertEqual([], line_index.get_lines(0, 1))
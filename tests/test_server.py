@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of the server with the results in memory.
+"""
+
+
+###############################################################################
+####
+
+import io
+import json
+import os
+import socket
+import threading
+import unittest
+import unittest.mock
+import tests
+import todos.exceptions
+import todos.logger
+import todos.server
+
+
+###############################################################################
+####
+
+class CountingCommentsSearch(todos.server.IndexedCommentsSearch):
+    def __init__(self, parameters, logger):
+        todos.server.IndexedCommentsSearch.__init__(self, parameters, logger)
+        self.scanned = []
+
+    def scan_file(self, path):
+        self.scanned.append(os.path.basename(path))
+        return todos.server.IndexedCommentsSearch.scan_file(self, path)
+
+
+class ServerTestCase(tests.FilesTestCase):
+    FILES = {
+        'a.py': '# TODO first\n# FIXME second\n',
+        'b/c.c': '/* TODO third */\n',
+        'bc.c': '/* TODO fourth */\n',
+    }
+
+    def create(self):
+        comments_search = CountingCommentsSearch(self.parse(),
+                todos.logger.Logger(False))
+        comments_search.refresh()
+        return comments_search
+
+    def dump(self, comments):
+        return [(self.relative(comment.path), comment.position)
+                for comment in comments]
+
+    def test_query(self):
+        comments_search = self.create()
+
+        comments, summary = comments_search.query()
+        self.assertEqual([('a.py', 1), ('a.py', 2), ('b/c.c', 1),
+                ('bc.c', 1)], self.dump(comments))
+        self.assertEqual(3, summary.total_files)
+
+        comments, summary = comments_search.query(
+                path=os.path.join(self.root, 'b'))
+        self.assertEqual([('b/c.c', 1)], self.dump(comments))
+        self.assertEqual(1, summary.total_files)
+
+        comments, summary = comments_search.query(pattern=r'\bFIXME\b')
+        self.assertEqual([('a.py', 2)], self.dump(comments))
+        self.assertEqual({r'\bTODO\b': 0, r'\bFIXME\b': 1},
+                summary.per_pattern)
+        self.assertEqual({os.path.join(self.root, 'a.py'): 1},
+                summary.per_file)
+
+        with self.assertRaises(todos.exceptions.TodosFatalError):
+            comments_search.query(pattern='unknown')
+
+    def test_refresh(self):
+        comments_search = self.create()
+        self.assertEqual(['a.py', 'c.c', 'bc.c'], comments_search.scanned)
+
+        # Make the signatures old enough to be trusted
+        for path in self.FILES:
+            os.utime(os.path.join(self.root, path), (0, 0))
+
+        comments_search.scanned = []
+        comments_search.refresh()
+        self.assertEqual(['a.py', 'c.c', 'bc.c'], comments_search.scanned)
+
+        comments_search.scanned = []
+        comments_search.refresh()
+        self.assertEqual([], comments_search.scanned)
+
+        self.write({'b/c.c': '/* FIXME changed */\n'})
+        os.unlink(os.path.join(self.root, 'bc.c'))
+
+        comments_search.scanned = []
+        comments_search.refresh()
+        self.assertEqual(['c.c'], comments_search.scanned)
+
+        comments, summary = comments_search.query()
+        self.assertEqual([('a.py', 1), ('a.py', 2), ('b/c.c', 1)],
+                self.dump(comments))
+        self.assertEqual({r'\bTODO\b': 1, r'\bFIXME\b': 2},
+                summary.per_pattern)
+
+    def test_refresh_loop(self):
+        comments_server = unittest.mock.Mock()
+        comments_server.parameters = self.parse(['--refresh-interval', '0.01'])
+        comments_server.stopped = threading.Event()
+
+        # The unexpected error doesn't stop the loop
+        def refresh():
+            if comments_server.comments_search.refresh.call_count == 1:
+                raise OSError('Disk failure')
+            comments_server.stopped.set()
+
+        comments_server.comments_search.refresh.side_effect = refresh
+        todos.server.CommentsServer.refresh_loop(comments_server)
+
+        self.assertEqual(2, comments_server.comments_search.refresh.call_count)
+        comments_server.logger.warn.assert_called_once_with(
+                'Refresh failed: OSError: Disk failure')
+
+    @unittest.skipIf(not hasattr(socket, 'AF_UNIX'),
+            'Unix sockets are not supported')
+    def test_socket(self):
+        socket_path = os.path.join(self.tmp_dir.name, 'todos.sock')
+        parameters = self.parse(['--socket', socket_path])
+
+        comments_server = todos.server.CommentsServer(parameters,
+                todos.logger.Logger(False))
+        thread = threading.Thread(target=comments_server.serve_forever)
+        thread.start()
+
+        try:
+            with self.assertRaises(todos.exceptions.TodosFatalError):
+                todos.server.remove_stale_socket(socket_path)
+
+            query = self.parse(['--socket', socket_path, '--query',
+                    '--query-format', 'json', '--query-path',
+                    os.path.join(self.root, 'b')])
+            out_stream = io.BytesIO()
+            todos.server.query(query, out_stream)
+
+            data = json.loads(out_stream.getvalue().decode('utf-8'))
+            self.assertEqual([os.path.join(self.root, 'b', 'c.c')],
+                    [comment['file'] for comment in data['comments']])
+            self.assertEqual(1, data['summary']['total_files'])
+
+            query = self.parse(['--socket', socket_path, '--query',
+                    '--query-pattern', 'unknown'])
+            with self.assertRaises(todos.exceptions.TodosFatalError):
+                todos.server.query(query, io.BytesIO())
+
+            # The malformed request is answered by an error
+            for request in [b'{"path": 1}\n', b'{"format": ["txt"]}\n']:
+                client_socket = socket.socket(socket.AF_UNIX,
+                        socket.SOCK_STREAM)
+                with client_socket:
+                    client_socket.connect(socket_path)
+                    client_socket.sendall(request)
+                    with client_socket.makefile('rb') as in_stream:
+                        status = json.loads(in_stream.readline())
+                self.assertEqual('error', status['status'])
+        finally:
+            comments_server.shutdown()
+            comments_server.server_close()
+            thread.join()
+
+        self.assertFalse(os.path.exists(socket_path))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of the statistics of the search.
+"""
+
+
+###############################################################################
+####
+
+import json
+import os
+import tests
+import todos.exceptions
+import todos.parallel
+import todos.stats
+import todos.todos
+
+
+###############################################################################
+####
+
+class ScanStatisticsTestCase(tests.FilesTestCase):
+    FILES = {
+        'a.py': '# TODO first\nx = 1\n# FIXME second\n',
+        'b/c.c': '/* FIXME TODO both */\n// nothing\nTODO no comment\n',
+        'b/d.txt': '',
+        'e.bin': '\0# TODO binary\n',
+        'f.txt': 'no comment\n',
+        'CVS/g.py': '# TODO suppressed\n',
+    }
+
+    def parse(self, argv=None):
+        return tests.FilesTestCase.parse(self, (argv or []) + ['-D', 'CVS'])
+
+    def test_counters(self):
+        comments_search = self.search(['--stats', '-t', 'py', 'c', 'bin',
+                'txt', 'md'])
+        statistics = comments_search.stats
+
+        self.assertEqual({
+                'bytes read': sum(len(content) for path, content
+                        in self.FILES.items() if not path.startswith('CVS')),
+                'files read': 5,
+                'files without candidate': 2,
+                'lines examined': 3,
+                'regex calls': 3,
+            }, dict(statistics.counters))
+        self.assertEqual({'binary file': 1, 'suppressed directory': 1},
+                dict(statistics.skipped))
+
+        for phase in ['process_directories', 'walk', 'read_file',
+                'is_file_binary']:
+            self.assertEqual(1 if phase in ['process_directories', 'walk']
+                    else 5, statistics.calls[phase])
+        self.assertEqual(2, statistics.calls['decode'])
+        self.assertEqual(3, statistics.calls['match_number'])
+        self.assertGreaterEqual(statistics.wall['process_directories'],
+                statistics.wall['read_file'])
+
+        comments_search = self.search(['--stats', '-t', 'py'])
+        self.assertEqual({'file extension': 4, 'suppressed directory': 1},
+                dict(comments_search.stats.skipped))
+
+    def test_disabled(self):
+        comments_search = self.search([])
+        self.assertIsNone(comments_search.stats)
+        self.assertNotIn('read_file', vars(comments_search))
+        self.assertNotIn('search', vars(comments_search.matcher))
+
+    def test_parallel(self):
+        serial = self.search(['--stats'])
+        parallel = self.search(['--stats', '-j', '2'],
+                todos.parallel.ParallelCommentsSearch)
+        self.assertEqual(serial.stats.counters, parallel.stats.counters)
+        self.assertEqual(serial.stats.skipped, parallel.stats.skipped)
+        self.assertEqual(serial.stats.calls['read_file'],
+                parallel.stats.calls['read_file'])
+
+    def test_json(self):
+        out_txt = os.path.join(self.tmp_dir.name, 'out.txt')
+        out_json = os.path.join(self.tmp_dir.name, 'stats.json')
+
+        todos.todos.Todos().main(['--stats-json', out_json, '-o', out_txt,
+                '--', self.root])
+
+        with open(out_json) as input_file:
+            document = json.load(input_file)
+
+        # The header, three comments and the footer
+        self.assertEqual(5, document['phases']['write TXT']['calls'])
+        self.assertEqual(1, document['phases']['process_directories']['calls'])
+        self.assertEqual(5, document['counters']['files read'])
+        self.assertEqual({'binary file': 1, 'suppressed directory': 1},
+                document['skipped'])
+
+        # The statistics file is an output file
+        with self.assertRaises(todos.exceptions.TodosFatalError):
+            todos.todos.Todos().parse_command_line_arguments(['--stats-json',
+                    out_json])
+
+    def test_time_generator(self):
+        closed = []
+
+        def generate():
+            try:
+                yield 1
+                yield 2
+            finally:
+                closed.append(True)
+
+        statistics = todos.stats.ScanStatistics()
+        generator = statistics.time_generator('generate', generate)()
+        self.assertEqual(1, next(generator))
+        generator.close()
+
+        self.assertEqual([True], closed)
+        self.assertEqual(1, statistics.calls['generate'])
+
+        statistics.add(statistics.take())
+        self.assertEqual(1, statistics.calls['generate'])
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of CommentStore class.
+"""
+
+
+###############################################################################
+####
+
+import unittest
+import todos.search
+import todos.store
+
+
+###############################################################################
+####
+
+class CommentStoreTestCase(unittest.TestCase):
+    def dump(self, comments):
+        return [(comment.str_pattern, comment.path, comment.position,
+                comment.lines, comment.before) for comment in comments]
+
+    def test_store(self):
+        comments = [
+            todos.search.Comment('TODO', 'a.py', 1, ['# TODO', 'x = 1']),
+            todos.search.Comment('FIXME', 'a.py', 7, []),
+            todos.search.Comment('TODO', 'b.py', 3, ['', '\udcff č'], 1),
+            todos.search.Comment('TODO', 'b.py', 4, ['']),
+        ]
+        comment_store = todos.store.CommentStore()
+        comment_store.extend(comments)
+
+        self.assertEqual(4, len(comment_store))
+        self.assertEqual(self.dump(comments), self.dump(comment_store))
+        self.assertEqual(self.dump(comments[-1:]), self.dump([comment_store[-1]]))
+        self.assertEqual(2, len(comment_store.paths))
+        self.assertEqual(2, len(comment_store.patterns))
+
+        with self.assertRaises(IndexError):
+            comment_store[4]
+
+    def test_intern(self):
+        table = todos.store.InternTable()
+        self.assertEqual(0, table.intern('a'))
+        self.assertEqual(1, table.intern('b'))
+        self.assertEqual(0, table.intern('a'))
+        self.assertEqual('b', table[1])
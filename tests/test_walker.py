@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of DirectoryWalker class.
+"""
+
+
+###############################################################################
+####
+
+import os
+import tempfile
+import unittest
+import argparse
+import todos.logger
+import todos.walker
+
+
+###############################################################################
+####
+
+class DirectoryWalkerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        root = self.tmp_dir.name
+
+        for path in ['b/z.py', 'b/a.py', 'a.py', '.git/x.py', 'c/d/e.py']:
+            path = os.path.join(root, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'w').close()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def walk(self, suppressed, respect_gitignore=False):
+        parameters = argparse.Namespace(suppressed=suppressed,
+                respect_gitignore=respect_gitignore)
+        walker = todos.walker.DirectoryWalker(parameters,
+                todos.logger.Logger(False))
+        paths = [os.path.relpath(path, self.tmp_dir.name)
+                for path, entry in walker.walk([self.tmp_dir.name])]
+        return paths, walker.statistics
+
+    def test_sorted_depth_first(self):
+        paths, statistics = self.walk(['.git'])
+        self.assertEqual(['a.py', 'b/a.py', 'b/z.py', 'c/d/e.py'], paths)
+        self.assertEqual(4, statistics.files)
+        self.assertEqual(4, statistics.directories)
+        self.assertEqual(1, statistics.suppressed)
+
+    def test_no_suppressed(self):
+        paths, statistics = self.walk(None)
+        self.assertIn('.git/x.py', paths)
+        self.assertEqual(0, statistics.suppressed)
+
+    def write(self, path, content):
+        with open(os.path.join(self.tmp_dir.name, path), 'w') as output_file:
+            output_file.write(content)
+
+    def test_gitignore(self):
+        self.write('.gitignore', 'b/\n*.py\n!a.py\n')
+        self.write('c/.ignore', '!e.py\n')
+        paths, statistics = self.walk(['.git'], True)
+        self.assertEqual(['.gitignore', 'a.py', 'c/.ignore', 'c/d/e.py'], paths)
+        self.assertEqual(1, statistics.ignored)
+
+        paths, statistics = self.walk(['.git'])
+        self.assertIn('b/z.py', paths)
+
+    def test_gitignore_parent(self):
+        self.write('.gitignore', '/c/d/\n')
+        parameters = argparse.Namespace(suppressed=None, respect_gitignore=True)
+        walker = todos.walker.DirectoryWalker(parameters,
+                todos.logger.Logger(False))
+        self.assertEqual([], list(walker.walk(
+                [os.path.join(self.tmp_dir.name, 'c')])))
+
+    @unittest.skipIf(not hasattr(os, 'symlink'), 'symlinks are not supported')
+    def test_symlink_loops(self):
+        root = self.tmp_dir.name
+        os.symlink(os.path.join(root, 'c'), os.path.join(root, 'b', 'x'))
+        os.symlink(os.path.join(root, 'b'), os.path.join(root, 'c', 'y'))
+        os.symlink('..', os.path.join(root, 'c', 'd', 'up'))
+
+        paths, statistics = self.walk(['.git'])
+        self.assertEqual(['a.py', 'b/a.py', 'b/x/d/e.py', 'b/z.py',
+                'c/d/e.py', 'c/y/a.py', 'c/y/z.py'], paths)
+        self.assertEqual(4, statistics.skipped)
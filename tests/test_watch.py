@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Unit test of the watch mode.
+"""
+
+
+###############################################################################
+####
+
+import os
+import stat
+import sys
+import unittest
+import tests
+import todos.logger
+import todos.watch
+
+
+###############################################################################
+####
+
+class WatchTestCase(tests.FilesTestCase):
+    FILES = {
+        'a.py': '# TODO first\n# FIXME second\n',
+        'b/c.c': '/* TODO third */\n',
+    }
+
+    def create(self, argv=None):
+        comments_search = todos.watch.WatchedCommentsSearch(self.parse(argv),
+                todos.logger.Logger(False))
+        comments_search.refresh()
+        return comments_search
+
+    def dump(self, comments_search):
+        return [(self.relative(comment.path), comment.position)
+                for comment in comments_search.iterate()]
+
+    def test_update_files(self):
+        comments_search = self.create()
+        self.assertEqual([self.root, os.path.join(self.root, 'b')],
+                comments_search.directories)
+
+        a_path = os.path.join(self.root, 'a.py')
+        c_path = os.path.join(self.root, 'b', 'c.c')
+
+        self.write({'a.py': '# FIXME changed\n'})
+        os.unlink(c_path)
+
+        self.assertTrue(comments_search.update_files({a_path, c_path,
+                os.path.join(self.root, 'gone.py')}))
+        self.assertEqual([('a.py', 1)], self.dump(comments_search))
+
+        summary = comments_search.summary
+        self.assertEqual(1, summary.total_files)
+        self.assertEqual({r'\bTODO\b': 0, r'\bFIXME\b': 1},
+                summary.per_pattern)
+        self.assertEqual({a_path: 1}, summary.per_file)
+
+        # A new file must be placed in the order of the traversal
+        self.write({'0.py': '# TODO new\n'})
+        self.assertIsNone(comments_search.update_files({
+                os.path.join(self.root, '0.py')}))
+
+        self.assertTrue(comments_search.refresh())
+        self.assertEqual([('0.py', 1), ('a.py', 1)],
+                self.dump(comments_search))
+
+    def test_atomic_output(self):
+        out_txt = os.path.join(self.tmp_dir.name, 'out.txt')
+        with open(out_txt, 'w') as output_file:
+            output_file.write('old\n')
+
+        comments_search = self.create(['-f', '-o', out_txt])
+        output_writer = todos.watch.AtomicOutputWriter(
+                comments_search.parameters, todos.logger.Logger(False))
+        output_writer.output(comments_search)
+
+        with open(out_txt) as input_file:
+            self.assertEqual(3, len(input_file.readlines()))
+
+        self.assertEqual(['out.txt', 'root'],
+                sorted(os.listdir(self.tmp_dir.name)))
+
+    def test_atomic_output_mode(self):
+        out_txt = os.path.join(self.tmp_dir.name, 'out.txt')
+        out_xml = os.path.join(self.tmp_dir.name, 'out.xml')
+        with open(out_txt, 'w') as output_file:
+            output_file.write('old\n')
+        os.chmod(out_txt, 0o640)
+
+        comments_search = self.create(['-f', '-o', out_txt, '-x', out_xml])
+        output_writer = todos.watch.AtomicOutputWriter(
+                comments_search.parameters, todos.logger.Logger(False))
+
+        # The existing file keeps its mode, the new one gets the default
+        umask = os.umask(0o022)
+        try:
+            output_writer.output(comments_search)
+        finally:
+            os.umask(umask)
+
+        self.assertEqual(0o640, stat.S_IMODE(os.stat(out_txt).st_mode))
+        self.assertEqual(0o644, stat.S_IMODE(os.stat(out_xml).st_mode))
+
+    @unittest.skipIf(not sys.platform.startswith('linux'),
+            'inotify is available only on Linux')
+    def test_inotify(self):
+        comments_search = self.create()
+
+        monitor = todos.watch.InotifyMonitor(todos.logger.Logger(False))
+        try:
+            monitor.update(comments_search.directories)
+            self.assertEqual((set(), False), monitor.wait(0))
+
+            self.write({'b/c.c': '// FIXME\n'})
+            self.assertEqual(({os.path.join(self.root, 'b', 'c.c')}, False),
+                    monitor.wait(1))
+
+            os.mkdir(os.path.join(self.root, 'd'))
+            self.assertEqual((set(), True), monitor.wait(1))
+        finally:
+            monitor.close()
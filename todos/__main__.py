@@ -28,6 +28,7 @@ Search TODO, FIXME and similar comments in project files.
 ###############################################################################
 ####
 
+import os
 import sys
 from . import todos
 from . import exceptions
@@ -40,6 +41,10 @@ if __name__ == '__main__':
     try:
         TODOS = todos.Todos()
         TODOS.main(sys.argv[1:])
+    except BrokenPipeError as pipe_exception:
+        # The reader of the output exited, e.g. todos.sh | head
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
     except KeyboardInterrupt as keyboard_exception:
         sys.exit('ERROR: Interrupted by user')
     except exceptions.TodosFatalError as todos_exception:
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Aho-Corasick automaton searching many keywords in one pass over a text.
+"""
+
+
+###############################################################################
+####
+
+import collections
+import re
+
+
+###############################################################################
+####
+
+class Automaton(object):
+    """
+    Aho-Corasick automaton of the keywords. Every keyword has a bit mask
+    and scan() returns the union of the masks of all keywords present
+    in the text. The failure links are resolved in advance, so each
+    character of the text is processed by one transition. The characters
+    that can't start a keyword are skipped by a regular expression while
+    no keyword is partially matched.
+
+    A few keywords are searched one by one by the substring search instead,
+    it runs in C and it is faster than the transitions in Python up to about
+    32 keywords, see utils/benchmark_automaton.py.
+    """
+
+    MAX_SUBSTRING_KEYWORDS = 32
+    # """ The keywords are searched one by one up to this count. """
+
+    def __init__(self, keywords):
+        """
+        Class constructor, build the automaton of (keyword, mask) tuples.
+        """
+        self.keywords = list(keywords)
+        # """ The (keyword, mask) tuples. """
+
+        self.substrings = len(self.keywords) <= self.MAX_SUBSTRING_KEYWORDS
+        # """ Flag to search the keywords one by one. """
+
+        self.transitions = [{}]
+        # """ The transitions of the states, mapping of the characters
+        # to the next states, the state 0 is the root. """
+
+        self.masks = [0]
+        # """ The union of the masks of the keywords ending in the states. """
+
+        self.full_mask = 0
+        # """ The union of the masks of all keywords. """
+
+        for keyword, mask in self.keywords:
+            self.add_keyword(keyword, mask)
+            self.full_mask |= mask
+
+        self.resolve_failures()
+
+        self.start = None
+        # """ The expression searching the first characters of the keywords
+        # or None if there is no non-empty keyword. """
+
+        if self.transitions[0]:
+            self.start = re.compile('[{0}]'.format(''.join(
+                    re.escape(char) for char in sorted(self.transitions[0]))))
+
+
+    def add_keyword(self, keyword, mask):
+        """
+        Add the path of the keyword to the trie.
+        """
+        state = 0
+
+        for char in keyword:
+            next_state = self.transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions.append({})
+                self.masks.append(0)
+                self.transitions[state][char] = next_state
+            state = next_state
+
+        self.masks[state] |= mask
+
+
+    def resolve_failures(self):
+        """
+        Compute the failure links in breadth first order and merge
+        the transitions of the failure states, the trie becomes
+        a deterministic automaton.
+        """
+        failures = [0] * len(self.transitions)
+        queue = collections.deque()
+
+        for state in self.transitions[0].values():
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            transitions = self.transitions[state]
+            failure_transitions = self.transitions[failures[state]]
+
+            for char, next_state in list(transitions.items()):
+                # The transitions of the failure state are already complete
+                failures[next_state] = failure_transitions.get(char, 0)
+                self.masks[next_state] |= self.masks[failures[next_state]]
+                queue.append(next_state)
+
+            for char, next_state in failure_transitions.items():
+                transitions.setdefault(char, next_state)
+
+
+    def scan(self, text):
+        """
+        Return the union of the masks of the keywords present in the text.
+        The scan stops as soon as all keywords are found.
+        """
+        if self.substrings:
+            return self.scan_substrings(text)
+
+        found = self.masks[0]
+        if found == self.full_mask or self.start is None:
+            return found
+
+        transitions = self.transitions
+        masks = self.masks
+        start = self.start.search
+        state = 0
+        pos = 0
+        length = len(text)
+
+        while pos < length:
+            if state == 0:
+                match = start(text, pos)
+                if match is None:
+                    break
+                pos = match.start()
+
+            state = transitions[state].get(text[pos], 0)
+            pos += 1
+
+            if masks[state]:
+                found |= masks[state]
+                if found == self.full_mask:
+                    break
+
+        return found
+
+
+    def scan_substrings(self, text):
+        """
+        Return the union of the masks of the keywords present in the text,
+        the keywords are searched one by one.
+        """
+        found = 0
+
+        for keyword, mask in self.keywords:
+            if keyword in text:
+                found |= mask
+                if found == self.full_mask:
+                    break
+
+        return found
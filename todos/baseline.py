@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Reuse of the results of a previous XML report for the unchanged files.
+"""
+
+
+###############################################################################
+####
+
+import os
+import xml.etree.ElementTree as etree
+
+from . import exceptions
+from . import git
+
+
+###############################################################################
+####
+
+NAMESPACE = '{http://todos.sourceforge.net}'
+# """ The namespace of the XML report, see todos.xsd. """
+
+
+###############################################################################
+####
+
+class Baseline(object):
+    """
+    Comments from an XML report created for a git revision. The comments of
+    the files that are tracked and not changed since the revision are taken
+    from the report, all other files have to be searched.
+    """
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor, load the report and the changes since the revision.
+        """
+        self.parameters = parameters
+        # """ The input parameters. """
+
+        self.logger = logger
+        # """ The logger to output messages. """
+
+        self.results = {}
+        # """ Mapping of the absolute paths to lists of (str_pattern,
+        # position, lines) tuples from the report. """
+
+        self.unchanged = set()
+        # """ Absolute paths of the tracked files unchanged since the
+        # revision. """
+
+        self.incomplete = set()
+        # """ Absolute paths of the files whose comments in the report have
+        # less lines of the before-context or of the after-context than
+        # requested. """
+
+        self.load_report(parameters.baseline)
+
+        for directory in parameters.directories:
+            self.load_unchanged(directory, parameters.since)
+
+        # The missing lines are not in the report, search the files again
+        self.unchanged -= self.incomplete
+
+
+    def load_report(self, path):
+        """
+        Load the comments from the XML report.
+        """
+        unknown = set()
+
+        try:
+            for event, element in etree.iterparse(path):
+                if element.tag == NAMESPACE + 'timed_out':
+                    # The comments are unknown, search the file again
+                    self.incomplete.add(os.path.abspath(element.get('file')))
+                    continue
+
+                if element.tag != NAMESPACE + 'comment':
+                    continue
+
+                str_pattern = element.get('pattern')
+                if str_pattern not in self.parameters.patterns:
+                    unknown.add(str_pattern)
+                    continue
+
+                lines = []
+                if element.text:
+                    lines = element.text.split('\n')
+
+                key = os.path.abspath(element.get('file'))
+                position = int(element.get('line'))
+
+                # Drop the extra lines of the before-context
+                before = int(element.get('before', 0))
+                wanted = min(self.parameters.before_context, position - 1)
+                if before < wanted:
+                    self.incomplete.add(key)
+                lines = lines[max(before - wanted, 0):]
+
+                # Drop the extra lines of the after-context, the missing ones
+                # may be also the end of the file
+                before = min(before, wanted)
+                if len(lines) - before < self.parameters.num_lines:
+                    self.incomplete.add(key)
+                lines = lines[:before + self.parameters.num_lines]
+
+                self.results.setdefault(key, []).append((str_pattern,
+                        position, lines))
+
+                element.clear()
+        except (IOError, etree.ParseError, TypeError, ValueError) as exception:
+            raise exceptions.TodosFatalError('Reading baseline failed: {0}, {1}'.
+                    format(path, exception))
+
+        for str_pattern in sorted(unknown):
+            self.logger.warn('Baseline pattern not searched, comments '
+                    'dropped: {0}'.format(str_pattern))
+
+
+    def load_unchanged(self, directory, revision):
+        """
+        Add the tracked files of the directory that were not added, modified,
+        renamed or deleted since the revision, including uncommitted changes.
+        """
+        tracked = git.split_records(git.run_git(directory,
+                ['ls-files', '-z', '--', '.']))
+
+        records = git.split_records(git.run_git(directory,
+                ['diff', '-z', '--name-status', '--relative', '-M', revision,
+                '--', '.']))
+
+        # Status records are followed by one path or by two paths
+        # for renames and copies
+        changed = set()
+        index = 0
+        while index < len(records):
+            count = 2 if records[index][:1] in ('R', 'C') else 1
+            changed.update(records[index+1:index+1+count])
+            index += 1 + count
+
+        for relative_path in tracked:
+            if relative_path not in changed:
+                self.unchanged.add(os.path.abspath(
+                        os.path.join(directory, relative_path)))
+
+
+    def lookup(self, path):
+        """
+        Return (True, results) if the file is unchanged, otherwise (False,
+        None). The results are list of (str_pattern, position, lines) tuples.
+        """
+        key = os.path.abspath(path)
+        if key not in self.unchanged:
+            return False, None
+
+        return True, self.results.get(key, [])
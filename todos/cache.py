@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Persistent cache of the search results of the unchanged files.
+"""
+
+
+###############################################################################
+####
+
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from . import version
+
+
+###############################################################################
+####
+
+def get_signature(path, entry=None):
+    """
+    Return the (size, mtime_ns, inode) stat signature of the file or None
+    if it is not available. The entry is the optional os.DirEntry from
+    the traversal.
+    """
+    try:
+        if entry is not None:
+            # The inode of os.DirEntry.stat() is not filled on Windows
+            stat = entry.stat()
+            inode = entry.inode()
+        else:
+            stat = os.stat(path)
+            inode = stat.st_ino
+    except OSError:
+        return None
+
+    return (stat.st_size, stat.st_mtime_ns, inode)
+
+
+def get_fingerprint(parameters, file_format):
+    """
+    Return hash of the format version and of all parameters that affect
+    content of the results.
+    """
+    data = repr((file_format, version.TodosVersion.VERSION,
+            parameters.patterns, parameters.comments, parameters.encoding,
+            parameters.ignore_case, parameters.num_lines,
+            parameters.before_context, parameters.lexer))
+
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+###############################################################################
+####
+
+class CacheStatistics(object):
+    """
+    Container to store counters of the cache usage.
+    """
+
+    def __init__(self):
+        """
+        Class constructor, initialize all members to zero.
+        """
+        self.hits = 0
+        # """ The number of the files served from the cache. """
+
+        self.misses = 0
+        # """ The number of the files that had to be searched. """
+
+        self.evicted = 0
+        # """ The number of the least recently used entries removed. """
+
+
+    def __str__(self):
+        """
+        Return a string representation of the statistics.
+        """
+        return 'hits: {0}, misses: {1}, evicted: {2}'.format(
+                self.hits, self.misses, self.evicted)
+
+
+###############################################################################
+####
+
+class ResultCache(object):
+    """
+    Cache of the comments found in the files, stored in a directory between
+    the runs. An entry is valid while the size, modification time and inode
+    of the file are unchanged. Each combination of the parameters that
+    affect the search results has its own cache file, so changing e.g.
+    the patterns invalidates all entries. The least recently used entries
+    are evicted when the number of the entries exceeds the limit.
+    The cache file is JSON, a cache directory shared with other users
+    can't execute code like a pickle could.
+    """
+
+    FORMAT = 2
+    # """ Version of the cache file format. """
+
+    RACY_INTERVAL_NS = 2 * 1000 * 1000 * 1000
+    # """ Files modified so short before the search are not stored, their
+    # later modification might not change the modification time. """
+
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor, load the cache file if it exists.
+        """
+        self.parameters = parameters
+        # """ The input parameters. """
+
+        self.logger = logger
+        # """ The logger to output messages. """
+
+        self.path = os.path.join(parameters.cache_dir,
+                '{0}.json'.format(self.get_fingerprint()))
+        # """ The cache file for the current parameters. """
+
+        self.entries = collections.OrderedDict()
+        # """ Mapping of absolute paths to (signature, results) tuples,
+        # ordered from the least recently used. """
+
+        self.statistics = CacheStatistics()
+        # """ The counters of the cache usage. """
+
+        self.start_ns = time.time_ns()
+        # """ The time when the search started. """
+
+        self.modified = False
+        # """ Flag to save the cache at the end, the entries changed. """
+
+        self.reordered = False
+        # """ Flag that a hit changed the order of the entries. """
+
+        self.load()
+
+
+    def get_fingerprint(self):
+        """
+        Return hash of all parameters that affect content of the results.
+        """
+        return get_fingerprint(self.parameters, self.FORMAT)
+
+
+    def load(self):
+        """
+        Load the entries from the cache file, a missing or corrupted file
+        means an empty cache. The file contains list of [path, signature,
+        results] lists ordered from the least recently used.
+        """
+        try:
+            with open(self.path, encoding='utf-8') as input_file:
+                items = json.loads(input_file.read())
+
+            # The results are lists of [str_pattern, position, lines] lists
+            entries = collections.OrderedDict((path, (tuple(signature),
+                    results)) for path, signature, results in items)
+        except FileNotFoundError:
+            return
+        except (IOError, TypeError, ValueError) as exception:
+            self.logger.warn('Reading cache failed: {0}, {1}'.
+                    format(self.path, exception))
+            return
+
+        self.entries = entries
+
+
+    def save(self):
+        """
+        Evict the least recently used entries and store the cache file.
+        The file is replaced atomically, concurrent runs can't corrupt it.
+        The file is not written if only the hits changed the order, unless
+        the cache is full and the order decides the next eviction.
+        """
+        while len(self.entries) > self.parameters.cache_size:
+            self.entries.popitem(last=False)
+            self.statistics.evicted += 1
+            self.modified = True
+
+        if not self.modified and not (self.reordered and
+                len(self.entries) >= self.parameters.cache_size):
+            return
+
+        try:
+            os.makedirs(self.parameters.cache_dir, exist_ok=True)
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.parameters.cache_dir,
+                    prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as output_file:
+                    output_file.write(json.dumps([[path, signature, results]
+                            for path, (signature, results)
+                            in self.entries.items()], separators=(',', ':')))
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except (IOError, OSError) as exception:
+            self.logger.warn('Writing cache failed: {0}, {1}'.
+                    format(self.path, exception))
+
+
+    def lookup(self, path, signature):
+        """
+        Return (True, results) if the file with the signature is in the cache,
+        otherwise (False, None). The results are the search.Comment-like
+        (str_pattern, position, lines) sequences or None for a skipped file.
+        """
+        if signature is not None:
+            key = os.path.abspath(path)
+            item = self.entries.get(key)
+
+            if item is not None and item[0] == signature:
+                # The new order of the entries is saved for the eviction
+                if next(reversed(self.entries)) != key:
+                    self.entries.move_to_end(key)
+                    self.reordered = True
+                self.statistics.hits += 1
+                return True, item[1]
+
+        self.statistics.misses += 1
+        return False, None
+
+
+    def store(self, path, signature, results):
+        """
+        Store the results of the file with the signature to the cache.
+        """
+        if signature is None:
+            return
+
+        # A racy file may change again without changing its signature
+        if signature[1] >= self.start_ns - self.RACY_INTERVAL_NS:
+            return
+
+        key = os.path.abspath(path)
+        self.entries[key] = (signature, results)
+        self.entries.move_to_end(key)
+        self.modified = True
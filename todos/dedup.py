@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Reuse of the search results for the files with identical content.
+"""
+
+
+###############################################################################
+####
+
+import hashlib
+
+
+###############################################################################
+####
+
+def get_blob_id(data):
+    """
+    Return the hash of the raw content of the file. It is the same as
+    the id of the git blob with the content, so the ids from the git index
+    can be used instead of reading the files.
+    """
+    blob = hashlib.sha1(b'blob %d\0' % len(data))
+    blob.update(data)
+    return blob.hexdigest()
+
+
+def get_link_key(stat, syntax):
+    """
+    Return the key of the file with several hardlinks in the table
+    of the hardlinks. The key contains also the size and the modification
+    time, a modified file doesn't match it.
+    """
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, syntax)
+
+
+###############################################################################
+####
+
+class DedupStatistics(object):
+    """
+    Container to store counters of the reused results.
+    """
+
+    def __init__(self):
+        """
+        Class constructor, initialize all members to zero.
+        """
+        self.links = 0
+        # """ The number of the hardlinks recognised without reading them. """
+
+        self.duplicates = 0
+        # """ The number of the files with the content already searched. """
+
+        self.saved_bytes = 0
+        # """ The size of the files that didn't have to be searched. """
+
+
+    def __str__(self):
+        """
+        Return a string representation of the statistics.
+        """
+        return 'hardlinks: {0}, duplicates: {1}, saved bytes: {2}'.format(
+                self.links, self.duplicates, self.saved_bytes)
+
+
+    def add(self, other):
+        """
+        Add the counters of other statistics, e.g. from a worker process.
+        """
+        self.links += other.links
+        self.duplicates += other.duplicates
+        self.saved_bytes += other.saved_bytes
+
+
+###############################################################################
+####
+
+class ContentTable(object):
+    """
+    Results of the searched files in the memory addressed by their content,
+    valid during one search. The keys contain also the syntax of the lexer,
+    the same content in files of different types may have different results.
+    """
+
+    def __init__(self):
+        """
+        Class constructor, create empty table.
+        """
+        self.links = {}
+        # """ Mapping of the keys of the files with several hardlinks, see
+        # get_link_key(), to the results. """
+
+        self.contents = {}
+        # """ Mapping of the (blob_id, syntax) keys to the results. """
+
+        self.statistics = DedupStatistics()
+        # """ The counters of the reused results. """
+
+
+    def lookup_link(self, key, size):
+        """
+        Return (True, results) if a hardlink of the file was already searched,
+        otherwise (False, None). The results are the search.Comment-like
+        (str_pattern, position, lines) tuples.
+        """
+        results = self.links.get(key)
+        if results is None:
+            return False, None
+
+        self.statistics.links += 1
+        self.statistics.saved_bytes += size
+        return True, results
+
+
+    def store_link(self, key, results):
+        """
+        Store the results of the file with several hardlinks. A skipped file
+        is not stored, e.g. an unreadable one.
+        """
+        if results is not None:
+            self.links[key] = results
+
+
+    def lookup_content(self, key, size):
+        """
+        Return (True, results) if a file with the same content was already
+        searched, otherwise (False, None).
+        """
+        results = self.contents.get(key)
+        if results is None:
+            return False, None
+
+        self.statistics.duplicates += 1
+        self.statistics.saved_bytes += size
+        return True, results
+
+
+    def store_content(self, key, results):
+        """
+        Store the results of the file with the content. A skipped file
+        is not stored, e.g. an unreadable one.
+        """
+        if results is not None:
+            self.contents[key] = results
@@ -57,3 +57,13 @@ class TodosFatalError(TodosException):
     Fatal error in TODOs.
     """
     pass
+
+
+###############################################################################
+####
+
+class TodosTimeoutError(TodosException):
+    """
+    Search of a file exceeded its time budget.
+    """
+    pass
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Access to git repositories.
+"""
+
+
+###############################################################################
+####
+
+import collections
+import os
+import subprocess
+import time
+
+from . import exceptions
+from . import walker
+
+
+###############################################################################
+####
+
+MODE_GITLINK = '160000'
+# """ Mode of a submodule in the index and in the trees. """
+
+MODE_SYMLINK = '120000'
+# """ Mode of a symbolic link, the blob contains the target path. """
+
+MODE_TREE = '40000'
+# """ Mode of a subtree in the tree objects. """
+
+BlobStat = collections.namedtuple('BlobStat',
+        ['st_size', 'st_mtime_ns', 'st_ino', 'st_dev', 'st_nlink'])
+# """ The part of os.stat_result available for a blob, the blob id is
+# the inode, so it is a part of the stat signature of the file. """
+
+
+def run_git(directory, args):
+    """
+    Run git command in the directory and return its standard output as bytes.
+    """
+    try:
+        process = subprocess.run(['git', '-C', directory] + args,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as os_exception:
+        raise exceptions.TodosFatalError('Running git failed: {0}'.
+                format(os_exception))
+
+    if process.returncode != 0:
+        raise exceptions.TodosFatalError('Git command failed: git {0}, {1}'.
+                format(' '.join(args), os.fsdecode(process.stderr).strip()))
+
+    return process.stdout
+
+
+def split_records(output):
+    """
+    Return list of the NUL terminated records of the git output as strings.
+    """
+    return [os.fsdecode(record) for record in output.split(b'\0') if record]
+
+
+def parse_tree(data, id_size):
+    """
+    Return list of the (mode, name, object_id) tuples of the entries
+    of the raw tree object. The id size is the number of bytes of the object
+    ids, 20 for SHA-1 and 32 for SHA-256 repositories.
+    """
+    entries = []
+    pos = 0
+
+    while pos < len(data):
+        space = data.index(b' ', pos)
+        end = data.index(b'\0', space)
+        entries.append((data[pos:space].decode('ascii'),
+                os.fsdecode(data[space+1:end]),
+                data[end+1:end+1+id_size].hex()))
+        pos = end + 1 + id_size
+
+    return entries
+
+
+def get_path_key(path):
+    """
+    Return the sort key of the relative path, the order is the same as of
+    the depth-first traversal with the entries sorted by name.
+    """
+    return path.split('/')
+
+
+###############################################################################
+####
+
+class TrackedFilesWalker(walker.DirectoryWalker):
+    """
+    Generate the files tracked in the git index instead of walking the file
+    system. Untracked and ignored files and directories are never listed.
+    """
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor.
+        """
+        walker.DirectoryWalker.__init__(self, parameters, logger)
+
+        self.blobs = None
+        # """ Mapping to store the blob ids of the tracked files unmodified
+        # in the work tree to or None. """
+
+
+    def walk(self, directories):
+        """
+        Generate (path, entry) tuples for all tracked files in the input
+        directories and their subdirectories. The entry is always None.
+        """
+        for directory in directories:
+            start = time.perf_counter()
+            files = self.list_tracked_files(directory)
+            self.statistics.time += time.perf_counter() - start
+
+            for path, entry in files:
+                self.statistics.files += 1
+                yield path, entry
+
+
+    def list_tracked_files(self, directory):
+        """
+        Return list of the (path, entry) tuples of the tracked files
+        in the directory sorted by the paths. Submodules and the files
+        in the suppressed directories are skipped.
+        """
+        if self.is_directory_suppressed(directory):
+            self.logger.verbose('Skipping directory (suppressed): {0}'.
+                    format(directory))
+            self.statistics.suppressed += 1
+            return []
+
+        entries = self.list_entries(directory)
+
+        result = []
+        suppressed = {}
+
+        for relative_path in sorted(entries, key=get_path_key):
+            path = os.path.join(directory, relative_path)
+            parent = os.path.dirname(path)
+
+            if parent not in suppressed:
+                suppressed[parent] = self.is_directory_suppressed(parent)
+
+                if suppressed[parent]:
+                    self.logger.verbose('Skipping directory (suppressed): {0}'.
+                            format(parent))
+                    self.statistics.suppressed += 1
+
+            if not suppressed[parent]:
+                result.append((path, entries[relative_path]))
+
+        self.statistics.directories += len(suppressed)
+
+        if self.listed is not None:
+            self.listed.append(directory)
+            self.listed.extend(parent for parent in sorted(suppressed)
+                    if not suppressed[parent] and parent != directory)
+
+        return result
+
+
+    def list_entries(self, directory):
+        """
+        Return mapping of the paths relative to the directory of the files
+        in the git index to their entries, the entries are None. The files
+        deleted from the work tree are skipped.
+        """
+        records = split_records(run_git(directory,
+                ['ls-files', '-z', '--stage', '--', '.']))
+
+        entries = {}
+        blobs = {}
+
+        for record in records:
+            info, relative_path = record.split('\t', 1)
+            mode, blob_id, stage = info.split(' ')
+            if mode == MODE_GITLINK:
+                self.statistics.skipped += 1
+                continue
+
+            # Merge conflicts list a path several times
+            entries[relative_path] = None
+
+            if stage == '0':
+                blobs[relative_path] = blob_id
+
+        # The files deleted from the work tree stay in the index
+        deleted = split_records(run_git(directory,
+                ['ls-files', '-z', '--deleted', '--', '.']))
+
+        for relative_path in deleted:
+            if entries.pop(relative_path, False) is None:
+                self.logger.verbose('Skipping file (deleted): {0}'.format(
+                        os.path.join(directory, relative_path)))
+                self.statistics.skipped += 1
+            blobs.pop(relative_path, None)
+
+        if self.blobs is not None:
+            self.record_blobs(directory, blobs)
+
+        return entries
+
+
+    def record_blobs(self, directory, blobs):
+        """
+        Store the blob ids of the files from the index that are not modified
+        in the work tree. The files listed by git diff-files may differ
+        from the index, their content must be hashed.
+        """
+        modified = split_records(run_git(directory,
+                ['diff-files', '-z', '--name-only', '--relative', '--', '.']))
+
+        for relative_path in modified:
+            blobs.pop(relative_path, None)
+
+        for relative_path, blob_id in blobs.items():
+            self.blobs[os.path.join(directory, relative_path)] = blob_id
+
+
+###############################################################################
+####
+
+class BlobReader(object):
+    """
+    Reader of the blobs and the other objects from the object store
+    of a repository. One long running git cat-file --batch process reads
+    all of them.
+    """
+
+    def __init__(self, directory):
+        """
+        Class constructor, the process is started by the first read.
+        """
+        self.directory = directory
+        # """ A directory inside of the repository. """
+
+        self.process = None
+        # """ The git cat-file process or None. """
+
+
+    def read(self, blob_id):
+        """
+        Return the content of the blob as bytes. Raise IOError if it can't
+        be read.
+        """
+        return self.read_object(blob_id, 'blob')
+
+
+    def read_object(self, object_id, object_type):
+        """
+        Return the content of the object of the type as bytes. Raise IOError
+        if it can't be read.
+        """
+        if self.process is None:
+            try:
+                self.process = subprocess.Popen(['git', '-C', self.directory,
+                        'cat-file', '--batch'], stdin=subprocess.PIPE,
+                        stdout=subprocess.PIPE)
+            except OSError as os_exception:
+                raise exceptions.TodosFatalError('Running git failed: {0}'.
+                        format(os_exception))
+
+        self.process.stdin.write(object_id.encode('ascii') + b'\n')
+        self.process.stdin.flush()
+
+        header = self.process.stdout.readline().split()
+        if len(header) != 3 or header[1] != object_type.encode('ascii'):
+            raise IOError('Object is not a {0}: {1}'.format(object_type,
+                    object_id))
+
+        size = int(header[2])
+        data = self.process.stdout.read(size)
+
+        # The content is terminated by a new line
+        if len(data) != size or self.process.stdout.read(1) != b'\n':
+            raise IOError('Reading object failed: {0}'.format(object_id))
+
+        return data
+
+
+    def close(self):
+        """
+        Stop the process.
+        """
+        if self.process is None:
+            return
+
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process.wait()
+        self.process = None
+
+
+###############################################################################
+####
+
+class BlobEntry(object):
+    """
+    The os.DirEntry-like entry of a blob in a tree of a revision.
+    """
+
+    def __init__(self, blob_id, size, reader):
+        """
+        Class constructor.
+        """
+        self.blob_id = blob_id
+        # """ The id of the blob. """
+
+        self.size = size
+        # """ The size of the blob. """
+
+        self.reader = reader
+        # """ The reader of the blobs of the repository. """
+
+
+    def stat(self):
+        """
+        Return the BlobStat of the blob.
+        """
+        return BlobStat(self.size, 0, self.blob_id, 0, 1)
+
+
+    def inode(self):
+        """
+        Return the blob id, it identifies the content like the inode.
+        """
+        return self.blob_id
+
+
+    def read(self):
+        """
+        Return the content of the blob. Raise IOError if it can't be read.
+        """
+        return self.reader.read(self.blob_id)
+
+
+###############################################################################
+####
+
+class RevisionWalker(TrackedFilesWalker):
+    """
+    Generate the files in the tree of a git revision, they are read from
+    the object store without a checkout. The entries are BlobEntry objects,
+    the paths are the paths in the tree relative to the input directories.
+    """
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor.
+        """
+        TrackedFilesWalker.__init__(self, parameters, logger)
+
+        self.readers = {}
+        # """ Mapping of the input directories to their blob readers,
+        # the owner of the walker closes them. """
+
+
+    def list_entries(self, directory):
+        """
+        Return mapping of the paths relative to the directory of the blobs
+        in the tree of the revision to their entries. Submodules and symbolic
+        links are skipped.
+        """
+        records = split_records(run_git(directory, ['ls-tree', '-r', '-z',
+                '-l', self.parameters.git_rev, '--', '.']))
+
+        if directory not in self.readers:
+            self.readers[directory] = BlobReader(directory)
+
+        entries = {}
+
+        for record in records:
+            info, relative_path = record.split('\t', 1)
+            mode, object_type, blob_id, size = info.split()
+            if object_type != 'blob' or mode == MODE_SYMLINK:
+                self.statistics.skipped += 1
+                continue
+
+            entries[relative_path] = BlobEntry(blob_id, int(size),
+                    self.readers[directory])
+
+            if self.blobs is not None:
+                self.blobs[os.path.join(directory, relative_path)] = blob_id
+
+        return entries
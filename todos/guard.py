@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Searching of the files in a supervised worker process with a time budget.
+
+A regular expression can't be interrupted in the process that runs it,
+a catastrophic backtracking would block the whole search. The guarded files
+are therefore searched in a worker process, the supervisor waits for its
+results and kills it when the time of the file or of one line is exceeded.
+A new worker is started for the next file.
+"""
+
+
+###############################################################################
+####
+
+import copy
+import multiprocessing
+import time
+
+from . import exceptions
+from . import logger
+from . import search
+
+
+###############################################################################
+#### Worker process
+
+def run_worker(parameters, connection, progress):
+    """
+    Search the (path, data) files received from the connection and send back
+    the (results, statistics) tuples until None is received or the connection
+    is closed. The start time of the searched line is stored to the progress.
+    """
+    worker_search = search.CommentsSearch(parameters,
+            logger.Logger(parameters.verbose))
+
+    # The combined expression searched in the whole buffer could backtrack
+    # outside of any line budget, the lines are matched one by one instead
+    worker_search.matcher.buffer_expression = None
+
+    match_number = worker_search.match_number
+
+    def guarded_match_number(line_index, number, spans):
+        progress.value = time.monotonic()
+        return match_number(line_index, number, spans)
+
+    worker_search.match_number = guarded_match_number
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+
+        if message is None:
+            return
+
+        path, data = message
+
+        results = worker_search.get_results(worker_search.search_data(path,
+                data))
+        progress.value = 0.0
+
+        statistics = None
+        if worker_search.stats is not None:
+            statistics = worker_search.stats.take()
+
+        connection.send((results, statistics))
+
+
+###############################################################################
+####
+
+class SearchGuard(object):
+    """
+    Supervisor of the worker process searching the files with a time budget
+    per file and per line. The worker is started on the first use.
+    """
+
+    POLL_INTERVAL = 0.01
+    # """ The interval of the checks of the budgets in seconds. """
+
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor.
+        """
+        self.parameters = parameters
+        # """ The input parameters. """
+
+        self.logger = logger
+        # """ The logger to output messages. """
+
+        self.process = None
+        # """ The worker process or None if it is not running. """
+
+        self.connection = None
+        # """ The connection to the worker process. """
+
+        self.progress = None
+        # """ The start time of the line searched by the worker, zero if
+        # no line is searched. """
+
+
+    def start(self):
+        """
+        Start the worker process. The caches, the profiler and the guard
+        are used only by the supervisor.
+        """
+        parameters = copy.copy(self.parameters)
+        parameters.cache_dir = None
+        parameters.baseline = None
+        parameters.index = None
+        parameters.dedup = False
+        parameters.profile = False
+        parameters.file_timeout = None
+        parameters.line_timeout = None
+
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.progress = multiprocessing.Value('d', 0.0, lock=False)
+
+        self.process = multiprocessing.Process(target=run_worker,
+                args=(parameters, child_connection, self.progress),
+                daemon=True)
+        self.process.start()
+        child_connection.close()
+
+
+    def stop(self):
+        """
+        Kill the worker process, a new one is started for the next file.
+        """
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+        self.process = None
+        self.connection = None
+
+
+    def close(self):
+        """
+        Let the worker process exit. A forked worker inherits the end
+        of the connection of the supervisor, so it is asked to exit instead
+        of waiting for the end of the connection.
+        """
+        if self.process is None:
+            return
+
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+
+        self.connection.close()
+        self.process.join()
+
+        self.process = None
+        self.connection = None
+
+
+    def search(self, path, data):
+        """
+        Return (results, statistics) tuple of the raw content of the file
+        searched by the worker, the results are (str_pattern, position,
+        lines) tuples or None for a skipped file, the statistics are
+        the statistics of the worker or None. Raise TodosTimeoutError
+        if the budget was exceeded.
+        """
+        if self.process is None:
+            self.start()
+
+        try:
+            self.connection.send((path, bytes(data)))
+            message = self.wait()
+        except (EOFError, OSError) as exception:
+            # The worker died, e.g. it was killed by the system
+            self.stop()
+            self.logger.warn('Search failed: {0}, {1}'.format(path,
+                    exception))
+            return None, None
+
+        if message is None:
+            self.stop()
+            raise exceptions.TodosTimeoutError(path)
+
+        return message
+
+
+    def wait(self):
+        """
+        Return the message of the worker or None if the time of the file
+        or of a line was exceeded.
+        """
+        file_timeout = self.parameters.file_timeout
+        line_timeout = self.parameters.line_timeout
+        start = time.monotonic()
+
+        while not self.connection.poll(self.POLL_INTERVAL):
+            now = time.monotonic()
+
+            if file_timeout is not None and now - start >= file_timeout:
+                return None
+
+            line_start = self.progress.value
+            if line_timeout is not None and line_start > 0 and \
+                    now - line_start >= line_timeout:
+                return None
+
+        return self.connection.recv()
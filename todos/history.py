@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+History of the numbers of the comments in the commits of a git repository.
+
+The trees of the commits are read from the object store. The numbers
+of the comments of each blob and of each subtree are memoized by their object
+ids, so only the blobs not seen before are searched and the unchanged subtrees
+are not even listed. The cost scales with the number of the distinct blobs
+and trees, not with the number of the commits times the number of the files.
+"""
+
+
+###############################################################################
+####
+
+import collections
+import datetime
+import os
+import time
+
+from . import git
+from . import search
+from . import walker
+
+
+###############################################################################
+####
+
+PERIODS = ['commit', 'day', 'week', 'month']
+# """ The periods of the sampling of the commits, the last commit of each
+# period is searched. """
+
+
+def get_period_key(timestamp, period):
+    """
+    Return the key of the period containing the Unix timestamp.
+    """
+    date = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+
+    if period == 'day':
+        return date.strftime('%Y-%m-%d')
+
+    if period == 'week':
+        return '{0:04d}-W{1:02d}'.format(*date.isocalendar()[:2])
+
+    if period == 'month':
+        return date.strftime('%Y-%m')
+
+    return None
+
+
+def format_time(timestamp):
+    """
+    Return the Unix timestamp as an ISO 8601 string in UTC.
+    """
+    return datetime.datetime.fromtimestamp(timestamp,
+            datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+###############################################################################
+####
+
+class TreeCounts(object):
+    """
+    Numbers of the comments in a tree and its subtrees.
+    """
+
+    def __init__(self):
+        """
+        Class constructor, initialize all members to zero.
+        """
+        self.total_files = 0
+        # """ The number of the searched files. """
+
+        self.per_pattern = collections.Counter()
+        # """ The numbers of the comments per pattern. """
+
+        self.per_directory = collections.Counter()
+        # """ The numbers of the comments per directory, the directories
+        # deeper than the history depth are counted in their parents. """
+
+
+    def add(self, other):
+        """
+        Add the numbers of other tree, e.g. a subtree.
+        """
+        self.total_files += other.total_files
+        self.per_pattern.update(other.per_pattern)
+        self.per_directory.update(other.per_directory)
+
+
+class HistoryPoint(object):
+    """
+    Numbers of the comments in one commit.
+    """
+
+    def __init__(self, commit, timestamp, counts, patterns):
+        """
+        Class constructor.
+        """
+        self.commit = commit
+        # """ The id of the commit. """
+
+        self.timestamp = timestamp
+        # """ The committer time as a Unix timestamp. """
+
+        self.total_files = counts.total_files
+        # """ The number of the searched files. """
+
+        self.per_pattern = dict((str_pattern, counts.per_pattern[str_pattern])
+                for str_pattern in patterns)
+        # """ The numbers of the comments per pattern in the order
+        # of the patterns. """
+
+        self.per_directory = dict(sorted(counts.per_directory.items()))
+        # """ The numbers of the comments per directory, only the directories
+        # with a comment are present. """
+
+
+    def get_total(self):
+        """
+        Return the number of all comments.
+        """
+        return sum(self.per_pattern.values())
+
+
+class HistoryStatistics(object):
+    """
+    Container to store counters of the history search.
+    """
+
+    def __init__(self):
+        """
+        Class constructor, initialize all members to zero.
+        """
+        self.commits = 0
+        # """ The number of the searched commits. """
+
+        self.trees = 0
+        # """ The number of the listed trees. """
+
+        self.blobs = 0
+        # """ The number of the searched blobs. """
+
+        self.reused = 0
+        # """ The number of the files whose blob was searched before. """
+
+        self.time = 0.0
+        # """ The duration of the search in seconds. """
+
+
+    def __str__(self):
+        """
+        Return a string representation of the statistics.
+        """
+        return 'commits: {0}, trees: {1}, blobs: {2}, reused: {3}, ' \
+                'time: {4:.3f} s'.format(self.commits, self.trees, self.blobs,
+                self.reused, self.time)
+
+
+###############################################################################
+####
+
+class HistorySearch(search.CommentsSearch):
+    """
+    Count the comments in the commits of a git repository. The files are
+    searched by the same pipeline as the files of the work tree.
+    """
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor, prepare the object for searching.
+        """
+        search.CommentsSearch.__init__(self, parameters, logger)
+
+        self.walker = walker.DirectoryWalker(parameters, logger)
+        # """ The walker deciding the suppressed directories. """
+
+        self.reader = None
+        # """ The reader of the objects of the repository. """
+
+        self.blob_counts = {}
+        # """ Mapping of the (blob_id, syntax) keys to the numbers
+        # of the comments per pattern or None for a skipped file. """
+
+        self.tree_counts = {}
+        # """ Mapping of the (tree_id, relative_path) keys to TreeCounts.
+        # The path is a part of the key, the suppressed directories and
+        # the directories in the counts depend on it. """
+
+        self.statistics = HistoryStatistics()
+        # """ The counters of the history search. """
+
+
+    def iterate(self):
+        """
+        Generate HistoryPoint objects of the sampled commits, the oldest
+        one first.
+        """
+        directory = self.parameters.directory
+        prefix = os.fsdecode(git.run_git(directory,
+                ['rev-parse', '--show-prefix'])).strip()
+        commits = self.list_commits(directory)
+
+        start = time.perf_counter()
+        self.reader = git.BlobReader(directory)
+
+        try:
+            for commit, timestamp, tree_id in commits:
+                self.logger.verbose('Searching commit: {0}'.format(commit))
+
+                tree_id = self.get_subtree(tree_id, prefix)
+
+                counts = TreeCounts()
+                if tree_id is not None:
+                    counts = self.count_tree(tree_id, '')
+
+                self.statistics.commits += 1
+                yield HistoryPoint(commit, timestamp, counts,
+                        self.parameters.patterns)
+        finally:
+            self.reader.close()
+            self.statistics.time += time.perf_counter() - start
+
+        self.logger.verbose('History: {0}'.format(self.statistics))
+
+
+    def list_commits(self, directory):
+        """
+        Return list of the (commit, timestamp, tree_id) tuples of the commits
+        in the range, the oldest one first. The first parents are followed,
+        only the last commit of each period is returned.
+        """
+        args = ['log', '--first-parent', '--format=%H %ct %T']
+        if self.parameters.history_after is not None:
+            args.append('--after=' + self.parameters.history_after)
+
+        lines = os.fsdecode(git.run_git(directory,
+                args + [self.parameters.history_range, '--'])).splitlines()
+
+        commits = []
+        periods = set()
+
+        # The newest commits are listed first
+        for line in lines:
+            commit, timestamp, tree_id = line.split()
+            timestamp = int(timestamp)
+
+            key = get_period_key(timestamp, self.parameters.period)
+            if key is not None:
+                if key in periods:
+                    continue
+                periods.add(key)
+
+            commits.append((commit, timestamp, tree_id))
+
+        commits.reverse()
+        return commits
+
+
+    def read_tree(self, tree_id):
+        """
+        Return list of the (mode, name, object_id) tuples of the tree.
+        """
+        return git.parse_tree(self.reader.read_object(tree_id, 'tree'),
+                len(tree_id) // 2)
+
+
+    def get_subtree(self, tree_id, prefix):
+        """
+        Return the id of the subtree at the path prefix relative to the root
+        of the repository or None if it doesn't exist in the tree.
+        """
+        for name in prefix.split('/'):
+            if not name:
+                continue
+
+            for mode, entry_name, object_id in self.read_tree(tree_id):
+                if entry_name == name and mode == git.MODE_TREE:
+                    tree_id = object_id
+                    break
+            else:
+                return None
+
+        return tree_id
+
+
+    def count_tree(self, tree_id, relative_path):
+        """
+        Return TreeCounts of the tree at the path relative to the input
+        directory, the unchanged trees are not listed again.
+        """
+        key = (tree_id, relative_path)
+        counts = self.tree_counts.get(key)
+        if counts is not None:
+            return counts
+
+        counts = TreeCounts()
+        self.statistics.trees += 1
+
+        for mode, name, object_id in self.read_tree(tree_id):
+            child = os.path.join(relative_path, name)
+            path = os.path.join(self.parameters.directory, child)
+
+            if mode == git.MODE_TREE:
+                if self.walker.is_directory_suppressed(path):
+                    self.logger.verbose('Skipping directory (suppressed): '
+                            '{0}'.format(path))
+                    continue
+
+                counts.add(self.count_tree(object_id, child))
+                continue
+
+            if mode in (git.MODE_GITLINK, git.MODE_SYMLINK):
+                continue
+
+            per_pattern = self.count_blob(path, object_id)
+            if per_pattern is None:
+                continue
+
+            counts.total_files += 1
+            counts.per_pattern.update(per_pattern)
+
+            total = sum(per_pattern.values())
+            if total:
+                counts.per_directory[self.get_directory(child)] += total
+
+        self.tree_counts[key] = counts
+        return counts
+
+
+    def count_blob(self, path, blob_id):
+        """
+        Return the numbers of the comments per pattern in the blob of the file
+        or None if the file is skipped. Each blob is searched only once.
+        """
+        if self.is_file_skipped(path):
+            return None
+
+        key = (blob_id, self.get_syntax(path))
+        if key in self.blob_counts:
+            self.statistics.reused += 1
+            return self.blob_counts[key]
+
+        try:
+            data = self.reader.read(blob_id)
+        except IOError as exception:
+            self.logger.warn('Reading from file failed: {0}, {1}'.
+                    format(path, exception))
+            return None
+
+        comments = self.scan_data(path, data)
+        self.statistics.blobs += 1
+
+        per_pattern = None
+        if comments is not None:
+            per_pattern = collections.Counter(comment.str_pattern
+                    for comment in comments)
+
+        self.blob_counts[key] = per_pattern
+        return per_pattern
+
+
+    def get_directory(self, relative_path):
+        """
+        Return the directory of the file relative to the input directory
+        that is used in the counts, the deeper directories are cut.
+        """
+        parts = os.path.dirname(relative_path).split('/')
+        parts = [part for part in parts if part][:self.parameters.depth]
+
+        return '/'.join(parts) or '.'
+
+
+    def is_output_file(self, path):
+        """
+        The output files are never in the trees of the commits.
+        """
+        return False
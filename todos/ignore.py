@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Matching of the paths against .gitignore and .ignore files.
+"""
+
+
+###############################################################################
+####
+
+import os
+import re
+
+
+###############################################################################
+####
+
+IGNORE_FILES = ['.gitignore', '.ignore']
+# """ The ignore files of each directory, the later ones take precedence. """
+
+
+###############################################################################
+####
+
+def translate(pattern):
+    """
+    Translate the gitignore glob pattern to a regular expression string.
+    A single '*' and '?' don't match '/', '**' between slashes matches any
+    number of directories.
+    """
+    result = []
+    i = 0
+    n = len(pattern)
+
+    while i < n:
+        c = pattern[i]
+
+        if c == '*':
+            j = i
+            while j < n and pattern[j] == '*':
+                j += 1
+
+            whole_segment = (i == 0 or pattern[i-1] == '/') and \
+                    (j == n or pattern[j] == '/')
+
+            if j - i >= 2 and whole_segment:
+                if j == n:
+                    result.append('.*')
+                else:
+                    # Zero or more directories, consume the slash
+                    result.append('(?:.*/)?')
+                    j += 1
+            else:
+                result.append('[^/]*')
+
+            i = j
+        elif c == '?':
+            result.append('[^/]')
+            i += 1
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] in '!^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+
+            if j >= n:
+                result.append(re.escape(c))
+                i += 1
+                continue
+
+            content = pattern[i+1:j]
+            negated = content[:1] in ('!', '^')
+            if negated:
+                content = content[1:]
+            content = content.replace('\\', '\\\\')
+
+            result.append('[{0}{1}]'.format('^/' if negated else '', content))
+            i = j + 1
+        elif c == '\\' and i + 1 < n:
+            result.append(re.escape(pattern[i+1]))
+            i += 2
+        else:
+            result.append(re.escape(c))
+            i += 1
+
+    return ''.join(result)
+
+
+###############################################################################
+####
+
+class IgnoreRule(object):
+    """
+    One line of an ignore file.
+    """
+
+    def __init__(self, regexp, negated, dir_only, anchored):
+        """
+        Class constructor, initialize all members.
+        """
+        self.regexp = regexp
+        # """ The compiled pattern, it must match the whole path or name. """
+
+        self.negated = negated
+        # """ The pattern starts with '!', it re-includes the matching path. """
+
+        self.dir_only = dir_only
+        # """ The pattern ends with '/', it matches only directories. """
+
+        self.anchored = anchored
+        # """ The pattern contains '/', it is matched against the path relative
+        # to the directory of the ignore file, otherwise against the name. """
+
+
+    @classmethod
+    def parse(cls, line):
+        """
+        Return the rule defined by the line of an ignore file or None for
+        an empty line, a comment or an invalid pattern.
+        """
+        line = line.rstrip('\n').rstrip('\r')
+
+        # Trailing spaces are ignored unless they are escaped
+        stripped = line.rstrip(' ')
+        if stripped.endswith('\\') and len(stripped) < len(line):
+            stripped += ' '
+        line = stripped
+
+        if not line or line.startswith('#'):
+            return None
+
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+
+        anchored = '/' in line
+        line = line.lstrip('/')
+
+        if not line:
+            return None
+
+        try:
+            regexp = re.compile(translate(line), re.DOTALL)
+        except re.error:
+            return None
+
+        return cls(regexp, negated, dir_only, anchored)
+
+
+    def matches(self, relative_path, name, is_dir):
+        """
+        Return true if the rule matches the path, otherwise false.
+        """
+        if self.dir_only and not is_dir:
+            return False
+
+        if self.anchored:
+            return self.regexp.fullmatch(relative_path) is not None
+
+        return self.regexp.fullmatch(name) is not None
+
+
+###############################################################################
+####
+
+class IgnoreRules(object):
+    """
+    Rules from the ignore files of one directory.
+    """
+
+    def __init__(self, base, prefix, rules):
+        """
+        Class constructor, initialize all members.
+        """
+        self.base_length = len(os.path.join(base, ''))
+        # """ Length of the traversal path of the directory including slash. """
+
+        self.prefix = prefix
+        # """ Path of the traversed directory relative to the directory of the
+        # ignore files, empty or ending with '/'. """
+
+        self.rules = rules
+        # """ The rules in the order of precedence, the last one wins. """
+
+
+    @classmethod
+    def load(cls, directory, logger, base=None, prefix=''):
+        """
+        Return the rules of the ignore files in the directory or None if there
+        are none. The rules are applied to the paths under the base directory
+        of the traversal, the prefix is its path relative to the directory.
+        """
+        rules = []
+
+        for name in IGNORE_FILES:
+            path = os.path.join(directory, name)
+
+            try:
+                with open(path, mode='r', encoding='utf-8',
+                        errors='surrogateescape') as input_file:
+                    lines = input_file.readlines()
+            except FileNotFoundError:
+                continue
+            except IOError as io_exception:
+                logger.warn('Reading from file failed: {0}, {1}'.
+                        format(path, io_exception))
+                continue
+
+            for line in lines:
+                rule = IgnoreRule.parse(line)
+                if rule is not None:
+                    rules.append(rule)
+
+        if not rules:
+            return None
+
+        return cls(directory if base is None else base, prefix, rules)
+
+
+    def match(self, path, name, is_dir):
+        """
+        Return True if the path is ignored, False if it is explicitly
+        re-included or None if no rule matches.
+        """
+        relative_path = self.prefix + path[self.base_length:]
+
+        for rule in reversed(self.rules):
+            if rule.matches(relative_path, name, is_dir):
+                return not rule.negated
+
+        return None
+
+
+###############################################################################
+####
+
+def is_ignored(chain, path, name, is_dir):
+    """
+    Return true if the path is ignored by the chain of the rules, the rules
+    of the deeper directories take precedence.
+    """
+    for rules in reversed(chain):
+        result = rules.match(path, name, is_dir)
+        if result is not None:
+            return result
+
+    return False
+
+
+def get_parent_chain(directory, logger):
+    """
+    Return the chain of the rules of the parent directories of the input
+    directory up to the root of its git repository. The rules are empty
+    if the directory is not inside of a git repository.
+    """
+    current = os.path.abspath(directory)
+    parents = []
+
+    while True:
+        parent = os.path.dirname(current)
+
+        if os.path.exists(os.path.join(current, '.git')):
+            break
+
+        if parent == current:
+            # No repository, the parent ignore files don't apply
+            return []
+
+        current = parent
+        parents.append(current)
+
+    absolute = os.path.abspath(directory)
+    chain = []
+
+    for parent in reversed(parents):
+        prefix = os.path.join(os.path.relpath(absolute, parent), '')
+        rules = IgnoreRules.load(parent, logger, directory, prefix)
+        if rules is not None:
+            chain.append(rules)
+
+    return chain
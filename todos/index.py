@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Index of the comments in a SQLite database and queries of the index.
+"""
+
+
+###############################################################################
+####
+
+import functools
+import json
+import os
+import re
+import sqlite3
+import time
+
+from . import cache
+from . import exceptions
+from . import search
+
+
+###############################################################################
+####
+
+FORMAT = 1
+# """ Version of the database schema. """
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    abs_path TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER,
+    inode INTEGER,
+    skipped INTEGER NOT NULL,
+    comments INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files (id),
+    pattern TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS comments_file ON comments (file_id, line);
+CREATE INDEX IF NOT EXISTS comments_pattern ON comments (pattern);
+
+CREATE TABLE IF NOT EXISTS patterns (
+    pattern TEXT PRIMARY KEY,
+    comments INTEGER NOT NULL
+);
+'''
+# """ The tables of the database. The stat signature of a file is NULL if
+# it must be searched again. """
+
+PARAMETERS = ['comments', 'lexer', 'patterns', 'extensions', 'suppressed',
+        'encoding', 'ignore_case', 'num_lines', 'before_context',
+        'directories']
+# """ The parameters stored in the index for the outputs of the queries. """
+
+
+###############################################################################
+####
+
+def to_text(value):
+    """
+    Return the string that can be stored in the database, undecodable
+    characters of the file names are replaced.
+    """
+    return value.encode('utf-8', 'surrogateescape').decode('utf-8', 'replace')
+
+
+def compare_paths(path1, path2):
+    """
+    Compare the paths in the order of the directory traversal.
+    """
+    key1 = path1.split(os.sep)
+    key2 = path2.split(os.sep)
+
+    return (key1 > key2) - (key1 < key2)
+
+
+@functools.lru_cache(maxsize=16)
+def compile_regexp(pattern, flags):
+    """
+    Return the compiled regular expression.
+    """
+    return re.compile(pattern, flags)
+
+
+def connect(path):
+    """
+    Open the database and register the functions used by the queries.
+    """
+    try:
+        connection = sqlite3.connect(path)
+    except sqlite3.Error as sqlite_exception:
+        raise exceptions.TodosFatalError('Opening index failed: {0}, {1}'.
+                format(path, sqlite_exception))
+
+    connection.create_collation('PATH', compare_paths)
+    connection.create_function('REGEXP', 2,
+            lambda pattern, text: compile_regexp(pattern, 0).search(text)
+                    is not None)
+    connection.create_function('IREGEXP', 2,
+            lambda pattern, text: compile_regexp(pattern, re.IGNORECASE).
+                    search(text) is not None)
+
+    return connection
+
+
+###############################################################################
+####
+
+class IndexStatistics(object):
+    """
+    Container to store counters of the index usage.
+    """
+
+    def __init__(self):
+        """
+        Class constructor, initialize all members to zero.
+        """
+        self.hits = 0
+        # """ The number of the unchanged files. """
+
+        self.updated = 0
+        # """ The number of the searched files. """
+
+        self.removed = 0
+        # """ The number of the files that don't exist anymore. """
+
+
+    def __str__(self):
+        """
+        Return a string representation of the statistics.
+        """
+        return 'hits: {0}, updated: {1}, removed: {2}'.format(self.hits,
+                self.updated, self.removed)
+
+
+###############################################################################
+####
+
+class CommentIndex(object):
+    """
+    Index of the comments in a SQLite database updated by the search.
+    The results of the files with unchanged stat signature are taken from
+    the index, the other files are searched and replaced in the index.
+    The files that were not found by the traversal are removed at the end.
+    """
+
+    RACY_INTERVAL_NS = cache.ResultCache.RACY_INTERVAL_NS
+    # """ Files modified so short before the search are stored without
+    # signature, they are searched again the next time. """
+
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor, open the database and load the signatures.
+        """
+        self.parameters = parameters
+        # """ The input parameters. """
+
+        self.logger = logger
+        # """ The logger to output messages. """
+
+        self.connection = connect(parameters.index)
+        # """ The connection to the database. """
+
+        self.files = {}
+        # """ Mapping of the absolute paths to (id, signature, skipped,
+        # comments) tuples of the indexed files. """
+
+        self.seen = set()
+        # """ The absolute paths of the files found by the traversal. """
+
+        self.statistics = IndexStatistics()
+        # """ The counters of the index usage. """
+
+        self.start_ns = time.time_ns()
+        # """ The time when the search started. """
+
+        try:
+            self.load()
+        except sqlite3.Error as sqlite_exception:
+            raise exceptions.TodosFatalError('Reading index failed: {0}, {1}'.
+                    format(parameters.index, sqlite_exception))
+
+
+    def load(self):
+        """
+        Create the tables if needed and load the signatures of the files.
+        The index is emptied if it was created with different parameters.
+        """
+        self.connection.executescript(SCHEMA)
+
+        fingerprint = cache.get_fingerprint(self.parameters, FORMAT)
+
+        row = self.connection.execute(
+                "SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+
+        if row is None or row[0] != fingerprint:
+            if row is not None:
+                self.logger.verbose('Index created with different parameters, '
+                        'reindexing all files: {0}'.format(
+                        self.parameters.index))
+
+            self.connection.execute('DELETE FROM comments')
+            self.connection.execute('DELETE FROM files')
+            self.connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)",
+                    (fingerprint,))
+
+        for row in self.connection.execute('SELECT id, abs_path, size, '
+                'mtime_ns, inode, skipped, comments FROM files'):
+            signature = None
+            if row[2] is not None:
+                signature = (row[2], row[3], row[4])
+
+            self.files[row[1]] = (row[0], signature, row[5], row[6])
+
+
+    def lookup(self, path, signature):
+        """
+        Return (True, results) if the file with the signature is in the index,
+        otherwise (False, None). The results are (str_pattern, position,
+        lines) tuples or None for a skipped file.
+        """
+        key = to_text(os.path.abspath(path))
+        item = self.files.get(key)
+
+        if signature is None or item is None or item[1] != signature:
+            return False, None
+
+        self.seen.add(key)
+        self.statistics.hits += 1
+
+        file_id, signature, skipped, count = item
+        if skipped:
+            return True, None
+
+        if count == 0:
+            return True, []
+
+        rows = self.connection.execute('SELECT pattern, line, text '
+                'FROM comments WHERE file_id = ? ORDER BY line, id',
+                (file_id,))
+
+        return True, [(str_pattern, position, text.split('\n') if text else [])
+                for str_pattern, position, text in rows]
+
+
+    def store(self, path, signature, results):
+        """
+        Replace the results of the file in the index.
+        """
+        abs_path = to_text(os.path.abspath(path))
+        self.seen.add(abs_path)
+        self.statistics.updated += 1
+
+        # A racy file may change again without changing its signature
+        if signature is None or \
+                signature[1] >= self.start_ns - self.RACY_INTERVAL_NS:
+            signature = (None, None, None)
+
+        skipped = results is None
+        count = len(results) if results is not None else 0
+
+        item = self.files.get(abs_path)
+        if item is not None:
+            file_id = item[0]
+            self.connection.execute('DELETE FROM comments WHERE file_id = ?',
+                    (file_id,))
+            self.connection.execute('UPDATE files SET path = ?, size = ?, '
+                    'mtime_ns = ?, inode = ?, skipped = ?, comments = ? '
+                    'WHERE id = ?', (to_text(path),) + signature +
+                    (skipped, count, file_id))
+        else:
+            file_id = self.connection.execute('INSERT INTO files (abs_path, '
+                    'path, size, mtime_ns, inode, skipped, comments) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)', (abs_path, to_text(path)) +
+                    signature + (skipped, count)).lastrowid
+
+        if count:
+            self.connection.executemany('INSERT INTO comments (file_id, '
+                    'pattern, line, text) VALUES (?, ?, ?, ?)',
+                    [(file_id, str_pattern, position, to_text('\n'.join(lines)))
+                    for str_pattern, position, lines in results])
+
+
+    def save(self, summary):
+        """
+        Remove the files that were not found, update the summaries
+        and commit the changes.
+        """
+        removed = [(item[0],) for key, item in self.files.items()
+                if key not in self.seen]
+        self.statistics.removed = len(removed)
+
+        try:
+            self.connection.executemany(
+                    'DELETE FROM comments WHERE file_id = ?', removed)
+            self.connection.executemany('DELETE FROM files WHERE id = ?',
+                    removed)
+
+            counts = dict(self.connection.execute(
+                    'SELECT pattern, COUNT(*) FROM comments GROUP BY pattern'))
+
+            self.connection.execute('DELETE FROM patterns')
+            self.connection.executemany('INSERT INTO patterns VALUES (?, ?)',
+                    [(str_pattern, counts.get(str_pattern, 0))
+                    for str_pattern in self.parameters.patterns])
+
+            parameters = dict((name, getattr(self.parameters, name))
+                    for name in PARAMETERS)
+            parameters['directories'] = [os.path.abspath(directory)
+                    for directory in parameters['directories']]
+
+            self.connection.executemany(
+                    'INSERT OR REPLACE INTO meta VALUES (?, ?)', [
+                    ('parameters', json.dumps(parameters)),
+                    ('total_directories', str(summary.total_directories)),
+                    ])
+
+            self.connection.commit()
+        except sqlite3.Error as sqlite_exception:
+            raise exceptions.TodosFatalError('Writing index failed: {0}, {1}'.
+                    format(self.parameters.index, sqlite_exception))
+        finally:
+            self.connection.close()
+
+
+###############################################################################
+####
+
+class IndexQuery(object):
+    """
+    Query of the comments in the index. The object provides iterate() and
+    summary like search.CommentsSearch, so the results can be written by
+    output.OutputWriter.
+    """
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor, open the index and complete the parameters
+        by the ones stored in the index.
+        """
+        self.parameters = parameters
+        # """ The query parameters. """
+
+        self.logger = logger
+        # """ The logger to output messages. """
+
+        if not os.path.exists(parameters.index):
+            raise exceptions.TodosFatalError('Index does not exist: {0}'.
+                    format(parameters.index))
+
+        self.connection = connect(parameters.index)
+        # """ The connection to the database. """
+
+        meta = dict(self.execute('SELECT key, value FROM meta', []))
+        if 'parameters' not in meta:
+            raise exceptions.TodosFatalError('Index is empty: {0}'.
+                    format(parameters.index))
+
+        # Missing in the indexes created before the option existed
+        parameters.before_context = 0
+
+        for name, value in json.loads(meta['parameters']).items():
+            setattr(parameters, name, value)
+
+        self.summary = search.Summary(parameters)
+        # """ The summary of the query, complete after iterate(). """
+
+        self.summary.total_directories = int(meta['total_directories'])
+
+        for str_pattern in parameters.query_patterns or []:
+            if str_pattern not in parameters.patterns:
+                raise exceptions.TodosFatalError('Pattern not indexed: {0}'.
+                        format(str_pattern))
+
+
+    def execute(self, sql, args):
+        """
+        Execute the SQL statement and return the cursor.
+        """
+        try:
+            return self.connection.execute(sql, args)
+        except sqlite3.Error as sqlite_exception:
+            raise exceptions.TodosFatalError('Query failed: {0}, {1}'.
+                    format(self.parameters.index, sqlite_exception))
+
+
+    def get_conditions(self, with_comments):
+        """
+        Return (sql, args) tuple with the WHERE conditions of the query.
+        The conditions of the comments are included only if requested.
+        """
+        conditions = ['NOT files.skipped']
+        args = []
+
+        if self.parameters.query_path is not None:
+            # Index friendly range of the paths under the directory
+            prefix = to_text(os.path.abspath(self.parameters.query_path))
+            conditions.append('(files.abs_path = ? OR (files.abs_path > ? '
+                    'AND files.abs_path < ?))')
+            args += [prefix, os.path.join(prefix, ''),
+                    prefix + chr(ord(os.sep) + 1)]
+
+        if with_comments and self.parameters.query_patterns:
+            conditions.append('comments.pattern IN ({0})'.format(
+                    ', '.join('?' * len(self.parameters.query_patterns))))
+            args += self.parameters.query_patterns
+
+        if with_comments and self.parameters.query_match is not None:
+            function = 'IREGEXP' if self.parameters.query_ignore_case \
+                    else 'REGEXP'
+            conditions.append('{0}(?, comments.text)'.format(function))
+            args.append(self.parameters.query_match)
+
+        return ' AND '.join(conditions), args
+
+
+    def iterate(self):
+        """
+        Generate the comments matching the query in the order of the traversal
+        and update the summary.
+        """
+        if self.parameters.query_match is not None:
+            try:
+                compile_regexp(self.parameters.query_match,
+                        re.IGNORECASE if self.parameters.query_ignore_case
+                        else 0)
+            except re.error as re_exception:
+                raise exceptions.TodosFatalError(
+                        'Pattern compilation failed: {0}, {1}'.
+                        format(self.parameters.query_match, re_exception))
+
+        where, args = self.get_conditions(False)
+        self.summary.total_files = self.execute('SELECT COUNT(*) FROM files '
+                'WHERE ' + where, args).fetchone()[0]
+
+        where, args = self.get_conditions(True)
+        sql = ('SELECT files.path, comments.pattern, comments.line, '
+                'comments.text FROM comments JOIN files '
+                'ON files.id = comments.file_id WHERE ' + where +
+                ' ORDER BY files.path COLLATE PATH, comments.line, comments.id')
+
+        if self.parameters.query_limit is not None:
+            sql += ' LIMIT ?'
+            args.append(self.parameters.query_limit)
+
+        for path, str_pattern, position, text in self.execute(sql, args):
+            self.summary.per_file[path] = self.summary.per_file.get(path, 0) + 1
+            self.summary.per_pattern[str_pattern] += 1
+
+            yield search.Comment(str_pattern, path, position,
+                    text.split('\n') if text else [],
+                    min(self.parameters.before_context, position - 1))
+
+
+    def count_by(self, column):
+        """
+        Return list of (key, count) tuples of the comments matching the query
+        grouped by file or pattern, sorted by the count.
+        """
+        key = {'file': 'files.path', 'pattern': 'comments.pattern'}[column]
+
+        where, args = self.get_conditions(True)
+        sql = ('SELECT {0}, COUNT(*) AS count FROM comments JOIN files '
+                'ON files.id = comments.file_id WHERE {1} GROUP BY {0} '
+                'ORDER BY count DESC, {0} COLLATE PATH'.format(key, where))
+
+        if self.parameters.query_limit is not None:
+            sql += ' LIMIT ?'
+            args.append(self.parameters.query_limit)
+
+        return self.execute(sql, args).fetchall()
+
+
+    def close(self):
+        """
+        Close the connection to the database.
+        """
+        self.connection.close()
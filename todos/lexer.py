@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Language-aware detection of the comments in the source files.
+"""
+
+
+###############################################################################
+####
+
+import bisect
+import os
+import re
+
+
+###############################################################################
+####
+
+class Syntax(object):
+    """
+    Comment and string syntax of a language. The strings are skipped,
+    so the comment markers inside of them don't start a comment.
+    """
+
+    def __init__(self, line_comments, block_comments, strings,
+            word_start=False, literals=()):
+        """
+        Class constructor, compile the expressions of the lexer.
+        The strings are (delimiter, multiline, escape) tuples, the literals
+        are expressions of the other tokens that are skipped like strings,
+        e.g. the character literals.
+        """
+        self.line_comments = line_comments
+        # """ The markers of the comments till the end of line. """
+
+        self.block_comments = block_comments
+        # """ The (start, end) markers of the block comments. """
+
+        self.strings = strings
+        # """ The (delimiter, multiline, escape) tuples of the strings. """
+
+        self.word_start = word_start
+        # """ The line comment must start at the beginning of a word,
+        # e.g. '$#' is not a comment in shell. """
+
+        self.literals = literals
+        # """ The expressions of the single line tokens that are skipped. """
+
+        self.continuations = {}
+        # """ Mapping of the group names of the block comments and of the
+        # string delimiters to (length, comment, expression) tuples, the length
+        # of the start marker, the comment flag and the expression matching
+        # the rest of the token after the marker, see find_spans(). """
+
+        alternatives = []
+
+        # Comments are captured by the named groups, strings are only skipped
+        for index, marker in enumerate(line_comments):
+            expression = re.escape(marker)
+            if word_start:
+                expression = r'(?<![^\s;|&()])' + expression
+            alternatives.append((marker, r'(?P<l{0}>{1}[^\n]*)'.format(index,
+                    expression)))
+
+        for index, (start, end) in enumerate(block_comments):
+            name = 'b{0}'.format(index)
+            rest = r'.*?(?:{0}|\Z)'
+            alternatives.append((start, r'(?P<{0}>{1}{2})'.format(name,
+                    re.escape(start), rest.format(re.escape(end)))))
+            self.continuations[name] = (len(start), True, re.compile(
+                    rest.format('(?P<end>{0})'.format(re.escape(end))),
+                    re.DOTALL))
+
+        for delimiter, multiline, escape in strings:
+            body = self.get_string_body(delimiter, multiline, escape)
+            alternatives.append((delimiter, r'{0}{1}*(?:{0})?'.format(
+                    re.escape(delimiter), body)))
+            self.continuations[delimiter] = (len(delimiter), False,
+                    re.compile(r'{0}*(?P<end>{1})?'.format(body,
+                    re.escape(delimiter)), re.DOTALL))
+
+        # The literals are always terminated, no continuation is needed
+        for expression in literals:
+            alternatives.append((expression[:1], expression))
+
+        # The longest markers first, e.g. '--[[' before '--'
+        alternatives.sort(key=lambda item: len(item[0]), reverse=True)
+
+        self.expression = re.compile('|'.join(expression
+                for marker, expression in alternatives), re.DOTALL)
+        # """ The expression matching the whole comments and strings, they
+        # are matched one after another like by a state machine. """
+
+        self.delimiters = sorted((delimiter for delimiter, multiline, escape
+                in strings), key=len, reverse=True)
+        # """ The string delimiters in the order of the alternatives. """
+
+
+    def get_string_body(self, delimiter, multiline, escape):
+        """
+        Return the expression matching one character or escape sequence
+        inside of the string. An unterminated string ends at the end
+        of the line or of the buffer.
+        """
+        excluded = re.escape(delimiter[0])
+        if escape:
+            excluded += r'\\'
+        if not multiline:
+            excluded += r'\n'
+
+        body = '[^{0}]'.format(excluded)
+        if len(delimiter) > 1:
+            body = '(?:{0}|{1}(?!{2}))'.format(body, re.escape(delimiter[0]),
+                    re.escape(delimiter[1:]))
+        if escape:
+            body = r'(?:{0}|\\.)'.format(body)
+
+        return body
+
+
+    def find_spans(self, buffer, state=None):
+        """
+        Return (spans, state) tuple, the spans are list of the (start, end)
+        offsets of the comments in the buffer, the comment markers are
+        included. A buffer may be a part of a file ending at a line end.
+        The state is None or the block comment or the string that is not
+        terminated at the end of the buffer, it continues in the next part
+        if the state is passed with it.
+        """
+        spans = []
+        pos = 0
+
+        if state is not None:
+            comment, expression = state
+            match = expression.match(buffer)
+            pos = match.end()
+
+            if comment and pos > 0:
+                spans.append((0, pos))
+
+            if match.group('end') is None and pos == len(buffer):
+                return spans, state
+
+        last = None
+        for match in self.expression.finditer(buffer, pos):
+            if match.lastgroup is not None:
+                spans.append(match.span())
+            last = match
+
+        state = None
+        if last is not None and last.end() == len(buffer):
+            state = self.get_state(last)
+
+        return spans, state
+
+
+    def get_state(self, match):
+        """
+        Return the state of the token matched at the end of the buffer,
+        None if it is terminated or it can't continue in the next part.
+        """
+        text = match.group()
+
+        if match.lastgroup is not None:
+            # Line comments end at the line end
+            name = match.lastgroup
+        else:
+            # None for a literal
+            name = next((delimiter for delimiter in self.delimiters
+                    if text.startswith(delimiter)), None)
+
+        if name not in self.continuations:
+            return None
+
+        length, comment, expression = self.continuations[name]
+        if expression.match(text, length).group('end') is not None:
+            return None
+
+        return comment, expression
+
+
+###############################################################################
+####
+
+C_STRINGS = [('"', False, True), ("'", False, True)]
+PYTHON_STRINGS = [('"""', True, True), ("'''", True, True)] + C_STRINGS
+# An apostrophe in a here-document would hide all comments after it
+SHELL_STRINGS = [('"', False, True), ("'", False, False)]
+SQL_STRINGS = [("'", True, False), ('"', True, False)]
+# """ The strings of the common languages. """
+
+RUST_CHARS = r"'(?:[^'\\\n]|\\.[^'\n]*)'"
+# """ The character literals of Rust, the lifetimes like 'a are not
+# terminated and they don't match. """
+
+C = Syntax(['//'], [('/*', '*/')], C_STRINGS)
+SCRIPT = Syntax(['#'], [], C_STRINGS, word_start=True)
+SHELL = Syntax(['#'], [], SHELL_STRINGS, word_start=True)
+# """ The syntaxes shared by several languages. """
+
+EXTENSIONS = {}
+# """ Mapping of the lower case file extensions to the syntaxes. """
+
+for extensions, syntax in [
+        (['.c', '.h', '.cc', '.cpp', '.cxx', '.hh', '.hpp', '.hxx', '.java',
+                '.cs', '.m', '.mm', '.scala', '.kt', '.kts', '.swift', '.dart',
+                '.groovy', '.gradle', '.proto'], C),
+        (['.js', '.jsx', '.mjs', '.ts', '.tsx'], Syntax(['//'], [('/*', '*/')],
+                C_STRINGS + [('`', True, True)])),
+        (['.go'], Syntax(['//'], [('/*', '*/')],
+                C_STRINGS + [('`', True, False)])),
+        (['.rs'], Syntax(['//'], [('/*', '*/')], [('"', True, True)],
+                literals=[RUST_CHARS])),
+        (['.php'], Syntax(['//', '#'], [('/*', '*/')], C_STRINGS)),
+        (['.py', '.pyw', '.pyi'], Syntax(['#'], [], PYTHON_STRINGS)),
+        (['.sh', '.bash', '.zsh', '.ksh'], SHELL),
+        (['.pl', '.pm', '.rb', '.r', '.cmake'], SCRIPT),
+        # The plain scalars may contain apostrophes, e.g. Bob's
+        (['.yml', '.yaml'], Syntax(['#'], [], [], word_start=True)),
+        (['.toml'], Syntax(['#'], [], [('"""', True, True),
+                ('"', False, True)])),
+        # HTML, XHTML, XSL and SVG may contain scripts and styles with their
+        # own comments, they are searched without the lexer
+        (['.xml', '.xsd'], Syntax([], [('<!--', '-->')], [])),
+        (['.css'], Syntax([], [('/*', '*/')], C_STRINGS)),
+        (['.scss', '.less'], C),
+        (['.sql'], Syntax(['--'], [('/*', '*/')], SQL_STRINGS)),
+        (['.lua'], Syntax(['--'], [('--[[', ']]')], C_STRINGS)),
+        (['.hs'], Syntax(['--'], [('{-', '-}')], [('"', False, True)])),
+        ]:
+    for extension in extensions:
+        EXTENSIONS[extension] = syntax
+
+FILE_NAMES = {
+    'Makefile': SHELL,
+    'makefile': SHELL,
+    'GNUmakefile': SHELL,
+    'CMakeLists.txt': SCRIPT,
+    'Dockerfile': SHELL,
+    'Jenkinsfile': C,
+}
+# """ Mapping of the file names without a known extension to the syntaxes. """
+
+
+###############################################################################
+####
+
+def get_syntax(path):
+    """
+    Return the syntax of the file or None if it is not known.
+    """
+    syntax = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if syntax is not None:
+        return syntax
+
+    return FILE_NAMES.get(os.path.basename(path))
+
+
+def get_markers():
+    """
+    Return the sorted list of the markers starting a comment in any
+    known language.
+    """
+    markers = set()
+
+    for syntax in list(EXTENSIONS.values()) + list(FILE_NAMES.values()):
+        markers.update(syntax.line_comments)
+        markers.update(start for start, end in syntax.block_comments)
+
+    return sorted(markers)
+
+
+###############################################################################
+####
+
+class CommentSpans(object):
+    """
+    The comments found by the lexer in a buffer with content of a file.
+    """
+
+    def __init__(self, buffer, syntax, state=None):
+        """
+        Class constructor, find the comments in the buffer. The state
+        of the lexer at the end of the previous part of the file is passed
+        if the file is searched in parts.
+        """
+        self.buffer = buffer
+        # """ The content of the file. """
+
+        spans, state = syntax.find_spans(buffer, state)
+
+        self.starts = [start for start, end in spans]
+        # """ The start offsets of the comments. """
+
+        self.ends = [end for start, end in spans]
+        # """ The end offsets of the comments. """
+
+        self.state = state
+        # """ The state of the lexer at the end of the buffer, see
+        # Syntax.find_spans(). """
+
+
+    def get_next(self, offset):
+        """
+        Return the offset if it is inside of a comment, otherwise the start
+        of the next comment or -1 if there is no comment after the offset.
+        """
+        index = bisect.bisect_right(self.ends, offset)
+        if index == len(self.starts):
+            return -1
+
+        return max(self.starts[index], offset)
+
+
+    def get_text(self, start, end):
+        """
+        Return the parts of the comments between the offsets joined by new
+        lines or None if there is no comment.
+        """
+        index = bisect.bisect_right(self.ends, start)
+
+        parts = []
+        while index < len(self.starts) and self.starts[index] < end:
+            parts.append(self.buffer[max(self.starts[index], start):
+                    min(self.ends[index], end)])
+            index += 1
+
+        if not parts:
+            return None
+
+        return '\n'.join(parts)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Matching of all search patterns at once.
+"""
+
+
+###############################################################################
+####
+
+import re
+
+
+###############################################################################
+####
+
+class CombinedMatcher(object):
+    """
+    Search all patterns in a line using one combined regular expression.
+    The patterns are joined to an alternation where each of them is enclosed
+    in its own named group, so a single scan tells which pattern matched.
+    The result is the same as if the patterns were searched one by one
+    in the list order and the first matching one was used.
+
+    Patterns that can't be embedded into the alternation, e.g. ones with
+    backreferences or with global inline flags, are searched separately.
+
+    If all patterns are combinable and don't contain lookarounds or string
+    anchors, the combined expression can be searched in a whole buffer
+    in multiline mode to quickly skip the lines without any match.
+    """
+
+    GROUP_NAME = '_todos_pattern_{0}'
+    # """ The name of the group enclosing a pattern in the alternation. """
+
+    RE_NOT_COMBINABLE = re.compile(r'\\[1-9]|\\g<|\(\?P=|\(\?\(')
+    # """ Backreferences and conditional groups depend on group numbers. """
+
+    RE_NOT_BUFFER_SAFE = re.compile(r'\\[AZ]|\(\?<?[=!]')
+    # """ Lookarounds and string anchors may see across the line ends. """
+
+
+    def __init__(self, patterns, flags=0):
+        """
+        Class constructor, compile the combined regular expression.
+        The patterns are the precompiled search.Pattern objects.
+        """
+        self.patterns = patterns
+        # """ All patterns, the order defines their priority. """
+
+        self.flags = flags
+        # """ The flags used for compilation of the patterns. """
+
+        self.combined_indexes = []
+        # """ Indexes of the patterns in the combined expression. """
+
+        self.fallback_indexes = []
+        # """ Indexes of the patterns that must be searched separately. """
+
+        self.combined = None
+        # """ The combined expression of all combinable patterns. """
+
+        self.group_to_index = {}
+        # """ Mapping of the group numbers in the combined expression. """
+
+        self.prefix_cache = {}
+        # """ Combined expressions of the patterns with a lower index. """
+
+        self.buffer_expression = None
+        # """ The combined expression to search a whole buffer or None. """
+
+        self.subset_cache = {}
+        # """ Matchers of the subsets of the patterns. """
+
+        for index, pattern in enumerate(patterns):
+            if self.is_combinable(index):
+                self.combined_indexes.append(index)
+            else:
+                self.fallback_indexes.append(index)
+
+        if self.combined_indexes:
+            self.combined = self.compile(self.combined_indexes)
+
+            for index in self.combined_indexes:
+                name = self.GROUP_NAME.format(index)
+                self.group_to_index[self.combined.groupindex[name]] = index
+
+        if not self.fallback_indexes and not any(
+                self.RE_NOT_BUFFER_SAFE.search(pattern.str_pattern)
+                for pattern in patterns):
+            self.buffer_expression = self.compile(self.combined_indexes,
+                    re.MULTILINE)
+
+
+    def compile(self, indexes, flags=0):
+        """
+        Compile alternation of the patterns with the specified indexes.
+        """
+        return re.compile('|'.join(
+                '(?P<{0}>{1})'.format(self.GROUP_NAME.format(index),
+                        self.patterns[index].str_pattern)
+                for index in indexes), self.flags | flags)
+
+
+    def is_combinable(self, index):
+        """
+        Return true if the pattern can be added to the combined expression,
+        otherwise false.
+        """
+        if self.RE_NOT_COMBINABLE.search(self.patterns[index].str_pattern):
+            return False
+
+        # Global inline flags, duplicate group names, etc.
+        try:
+            self.compile(self.combined_indexes + [index])
+        except re.error:
+            return False
+
+        return True
+
+
+    def get_prefix(self, limit):
+        """
+        Return combined expression of the combinable patterns with index lower
+        than the limit or None if there is no such pattern.
+        """
+        if limit not in self.prefix_cache:
+            indexes = [index for index in self.combined_indexes
+                    if index < limit]
+
+            if indexes:
+                self.prefix_cache[limit] = self.compile(indexes)
+            else:
+                self.prefix_cache[limit] = None
+
+        return self.prefix_cache[limit]
+
+
+    def get_subset(self, candidates):
+        """
+        Return matcher of the patterns whose bits are set in the candidates
+        mask, the bit 0 is the first pattern.
+        """
+        subset = self.subset_cache.get(candidates)
+
+        if subset is None:
+            subset = CombinedMatcher([pattern
+                    for index, pattern in enumerate(self.patterns)
+                    if candidates & (1 << index)], self.flags)
+            self.subset_cache[candidates] = subset
+
+        return subset
+
+
+    def search(self, line, candidates=None):
+        """
+        Return the first pattern in the list order that matches anywhere
+        in the line or None if no pattern matches. If the candidates mask
+        is specified, only the patterns with the bits set are searched,
+        the other ones are known not to match.
+        """
+        if candidates is not None and \
+                candidates != (1 << len(self.patterns)) - 1:
+            return self.get_subset(candidates).search(line)
+
+        best = len(self.patterns)
+
+        if self.combined is not None:
+            match = self.combined.search(line)
+
+            # The leftmost match wins in the alternation, a pattern with
+            # a lower index may still match later in the line
+            while match is not None:
+                best = self.group_to_index[match.lastindex]
+                prefix = self.get_prefix(best)
+                if prefix is None:
+                    break
+                match = prefix.search(line, match.start() + 1)
+
+        for index in self.fallback_indexes:
+            if index >= best:
+                break
+            if self.patterns[index].re_pattern.search(line):
+                best = index
+                break
+
+        if best < len(self.patterns):
+            return self.patterns[best]
+
+        return None
+
+
+    def search_candidate(self, buffer, pos):
+        """
+        Return offset of the first possible match in the buffer at or after
+        the position or -1 if there is none. Every line with a match of
+        a pattern contains a candidate, but the line must be verified using
+        search() because the match may continue across the line end.
+        The buffer_expression must not be None.
+        """
+        match = self.buffer_expression.search(buffer, pos)
+        if match is None:
+            return -1
+
+        return match.start()
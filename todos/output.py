@@ -28,6 +28,7 @@ Output the data.
 ###############################################################################
 ####
 
+import contextlib
 import sys
 import os.path
 
@@ -56,40 +57,66 @@ class OutputWriter(object):
         self.logger = logger
         # """ The logger to output messages. """
 
+        self.stats = None
+        # """ The statistics to measure the time of the formatters or None. """
+
+        self.profiler = None
+        # """ The profiler whose report is added to the HTML output or None. """
+
 
     def output(self, comments_search):
         """
         Determine which formats are requested and store them to the appropriate
         files. If no output file is specified, use the standard output stream.
+        The comments are written by all formatters as they are found.
         """
-        output_written = False
-
         self.logger.verbose('') # New line to split the output
 
+        with contextlib.ExitStack() as exit_stack:
+            outputs = self.open_outputs(exit_stack)
+
+            self.write_outputs(outputs, 'write_header')
+
+            for comment in comments_search.iterate():
+                self.write_outputs(outputs, 'write_comment', comment)
+
+            self.write_outputs(outputs, 'write_footer', comments_search.summary)
+
+
+    def open_outputs(self, exit_stack):
+        """
+        Open all requested output files, return list of (path, stream,
+        formatter) tuples. The path is None for the standard output stream.
+        """
+        outputs = []
+
         if self.parameters.out_txt is not None:
-            self.output_data_to_file(self.parameters.out_txt,
-                    output_txt.TxtFormatter(self.parameters), comments_search)
-            output_written = True
+            self.open_output(exit_stack, outputs, self.parameters.out_txt,
+                    output_txt.TxtFormatter(self.parameters))
 
         if self.parameters.out_xml is not None:
-            self.output_data_to_file(self.parameters.out_xml,
-                    output_xml.XmlFormatter(self.parameters), comments_search)
-            output_written = True
+            self.open_output(exit_stack, outputs, self.parameters.out_xml,
+                    output_xml.XmlFormatter(self.parameters))
 
         if self.parameters.out_html is not None:
-            self.output_data_to_file(self.parameters.out_html,
-                    output_html.HtmlFormatter(self.parameters), comments_search)
-            output_written = True
+            formatter = output_html.HtmlFormatter(self.parameters)
+            formatter.profiler = self.profiler
+            self.open_output(exit_stack, outputs, self.parameters.out_html,
+                    formatter)
 
         # Use stdout if no output method is explicitly specified
-        if output_written == False:
-            self.output_data(sys.stdout,
-                    output_txt.TxtFormatter(self.parameters), comments_search)
+        if self.parameters.out_txt is None and \
+                self.parameters.out_xml is None and \
+                self.parameters.out_html is None:
+            outputs.append((None, sys.stdout,
+                    output_txt.TxtFormatter(self.parameters)))
+
+        return outputs
 
 
-    def output_data_to_file(self, path, formatter, comments_search):
+    def open_output(self, exit_stack, outputs, path, formatter):
         """
-        Open the output file and write the data.
+        Open the output file and append it to the outputs.
         """
         self.logger.verbose('Writing {0} output: {1}'.
                 format(formatter.get_type(), path))
@@ -100,18 +127,30 @@ class OutputWriter(object):
             return
 
         try:
-            with open(path, mode='w', encoding=self.parameters.encoding) as out_stream:
-                self.output_data(out_stream, formatter, comments_search)
+            out_stream = exit_stack.enter_context(open(path, mode='w',
+                    encoding=self.parameters.encoding))
         except IOError as io_exception:
             raise exceptions.TodosFatalError('Output failed: {0}, {1}'.format(
                     path, io_exception))
 
+        outputs.append((path, out_stream, formatter))
+
 
-    def output_data(self, out_stream, formatter, comments_search):
+    def write_outputs(self, outputs, method, *args):
         """
-        Output the data to the opened stream and use the specified formatter.
+        Call the method of all formatters with their output streams.
         """
-        formatter.write_header(out_stream)
-        formatter.write_data(out_stream, comments_search.comments,
-                comments_search.summary)
-        formatter.write_footer(out_stream)
+        for path, out_stream, formatter in outputs:
+            function = getattr(formatter, method)
+            if self.stats is not None:
+                function = self.stats.time_function('write {0}'.format(
+                        formatter.get_type()), function)
+
+            try:
+                function(out_stream, *args)
+            except IOError as io_exception:
+                if path is None:
+                    raise
+
+                raise exceptions.TodosFatalError('Output failed: {0}, {1}'.
+                        format(path, io_exception))
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Output the history of the numbers of the comments in CSV, JSON and HTML
+formats.
+"""
+
+
+###############################################################################
+####
+
+import contextlib
+import csv
+import json
+import sys
+
+from . import history
+from . import output
+from . import output_html
+from . import version
+
+
+###############################################################################
+####
+
+class CsvHistoryFormatter(object):
+    """
+    CSV formatter, one row per commit. The columns of the patterns follow
+    the totals, the columns of the directories end with a slash.
+    """
+
+    def __init__(self, parameters):
+        """
+        Class constructor.
+        """
+        self.parameters = parameters
+        # """ The input parameters. """
+
+
+    def get_type(self):
+        """
+        Return type of the formatter.
+        """
+        return 'CSV'
+
+
+    def write(self, out_stream, points):
+        """
+        Write the history points to the output stream.
+        """
+        directories = sorted(set(directory for point in points
+                for directory in point.per_directory))
+
+        writer = csv.writer(out_stream, lineterminator='\n')
+        writer.writerow(['commit', 'date', 'files', 'total'] +
+                list(self.parameters.patterns) +
+                [directory + '/' for directory in directories])
+
+        for point in points:
+            writer.writerow([point.commit, history.format_time(point.timestamp),
+                    point.total_files, point.get_total()] +
+                    list(point.per_pattern.values()) +
+                    [point.per_directory.get(directory, 0)
+                    for directory in directories])
+
+
+class JsonHistoryFormatter(object):
+    """
+    JSON formatter, an array with one object per commit.
+    """
+
+    def __init__(self, parameters):
+        """
+        Class constructor.
+        """
+        self.parameters = parameters
+        # """ The input parameters. """
+
+
+    def get_type(self):
+        """
+        Return type of the formatter.
+        """
+        return 'JSON'
+
+
+    def write(self, out_stream, points):
+        """
+        Write the history points to the output stream.
+        """
+        out_stream.write('{{"version": {0}, "history": ['.format(
+                json.dumps(version.TodosVersion.VERSION)))
+
+        for index, point in enumerate(points):
+            if index > 0:
+                out_stream.write(',')
+
+            out_stream.write('\n')
+            out_stream.write(json.dumps({
+                    'commit': point.commit,
+                    'date': history.format_time(point.timestamp),
+                    'total_files': point.total_files,
+                    'total': point.get_total(),
+                    'per_pattern': point.per_pattern,
+                    'per_directory': point.per_directory,
+                }))
+
+        out_stream.write('\n]}\n')
+
+
+class HtmlHistoryFormatter(output_html.HtmlFormatter):
+    """
+    HTML formatter, a chart of the numbers of the comments per pattern
+    and a table of the commits.
+    """
+
+    CHART_WIDTH = 800
+    CHART_HEIGHT = 300
+    CHART_MARGIN = 40
+    # """ The size of the SVG chart in pixels. """
+
+    COLORS = ['black', '#C03030', '#3050C0', '#30A030', '#C08020', '#8030C0']
+    # """ The colors of the lines, the first one is the total. """
+
+
+    def __init__(self, parameters):
+        """
+        Class constructor.
+        """
+        output_html.HtmlFormatter.__init__(self, parameters)
+
+        self.points = []
+        # """ The history points to write. """
+
+
+    def write(self, out_stream, points):
+        """
+        Write the history points to the output stream.
+        """
+        self.points = points
+
+        self.write_header(out_stream)
+        self.write_footer(out_stream, None)
+
+
+    def write_data(self, out_stream, comments, summary):
+        """
+        Write the history to the output stream.
+        """
+        self.writeln('<div id="sidebar">', out_stream)
+        self.write_toc(out_stream)
+        self.writeln('</div><!-- id="sidebar" -->', out_stream)
+
+        self.writeln('<div id="page">', out_stream)
+        self.writeln('<h1 id="historyReport">History Report</h1>', out_stream)
+
+        self.writeln('<h2 id="inputParameters">Input Parameters</h2>\n',
+                out_stream)
+        self.write_input_parameters(out_stream)
+
+        self.writeln('<h2 id="chart">Chart</h2>\n', out_stream)
+        self.write_chart(out_stream)
+
+        self.writeln('<h2 id="commits">Commits</h2>\n', out_stream)
+        self.write_commits(out_stream)
+
+        self.writeln('</div><!-- id="page" -->', out_stream)
+
+
+    def write_toc(self, out_stream):
+        """
+        Write table of contents as menu.
+        """
+        self.writeln('''
+<div class="menu_title">Menu</div>
+
+<ul>
+<li><a href="#historyReport">History Report</a>
+    <ul>
+    <li><a href="#inputParameters">Input Parameters</a></li>
+    <li><a href="#chart">Chart</a></li>
+    <li><a href="#commits">Commits</a></li>
+    </ul>
+</li>
+</ul>
+''', out_stream)
+
+
+    def write_chart(self, out_stream):
+        """
+        Write SVG chart with the total and the per pattern numbers
+        of the comments in time.
+        """
+        series = [('Total', [point.get_total() for point in self.points])]
+        series.extend((str_pattern, [point.per_pattern[str_pattern]
+                for point in self.points])
+                for str_pattern in self.parameters.patterns)
+
+        times = [point.timestamp for point in self.points]
+        low, high = min(times, default=0), max(times, default=0)
+        maximum = max([max(values, default=0) for name, values in series] +
+                [1])
+
+        width = self.CHART_WIDTH - 2 * self.CHART_MARGIN
+        height = self.CHART_HEIGHT - 2 * self.CHART_MARGIN
+
+        def get_x(timestamp):
+            if high == low:
+                return self.CHART_MARGIN + width / 2
+            return self.CHART_MARGIN + width * (timestamp - low) / (high - low)
+
+        def get_y(value):
+            return self.CHART_MARGIN + height * (1 - value / maximum)
+
+        self.writeln('<svg xmlns="http://www.w3.org/2000/svg" width="{0}" '
+                'height="{1}">'.format(self.CHART_WIDTH, self.CHART_HEIGHT),
+                out_stream)
+        self.writeln('<rect x="{0}" y="{0}" width="{1}" height="{2}" '
+                'fill="none" stroke="silver" />'.format(self.CHART_MARGIN,
+                width, height), out_stream)
+        self.writeln('<text x="{0}" y="{1}" font-size="10">{2}</text>'.format(
+                2, self.CHART_MARGIN, maximum), out_stream)
+
+        for index, (name, values) in enumerate(series):
+            color = self.COLORS[index % len(self.COLORS)]
+            coordinates = ' '.join('{0:.1f},{1:.1f}'.format(get_x(timestamp),
+                    get_y(value)) for timestamp, value in zip(times, values))
+
+            self.writeln('<polyline points="{0}" fill="none" stroke="{1}" />'.
+                    format(coordinates, color), out_stream)
+            self.writeln('<text x="{0}" y="{1}" font-size="10" fill="{2}">'
+                    '{3}</text>'.format(self.CHART_MARGIN + 10 + 150 * index,
+                    self.CHART_HEIGHT - 10, color,
+                    self.html_special_chars(name)), out_stream)
+
+        for timestamp in sorted(set([low, high])):
+            self.writeln('<text x="{0:.1f}" y="{1}" font-size="10" '
+                    'text-anchor="middle">{2}</text>'.format(get_x(timestamp),
+                    self.CHART_MARGIN + height + 12,
+                    history.format_time(timestamp)[:10]), out_stream)
+
+        self.writeln('</svg>\n', out_stream)
+
+
+    def write_commits(self, out_stream):
+        """
+        Write table of the commits with the numbers of the comments.
+        """
+        rows = []
+
+        for point in self.points:
+            rows.append([point.commit[:12], history.format_time(
+                    point.timestamp), point.total_files, point.get_total()] +
+                    list(point.per_pattern.values()))
+
+        self.html_table(out_stream, ['Commit', 'Date', 'Files', 'Total'] +
+                [self.html_special_chars(str_pattern)
+                for str_pattern in self.parameters.patterns], rows)
+
+
+###############################################################################
+####
+
+class HistoryOutputWriter(output.OutputWriter):
+    """
+    Write the history to the output files in the specified formats.
+    """
+
+    def output(self, points):
+        """
+        Write the history points to all requested files. If no output file
+        is specified, CSV is written to the standard output stream.
+        """
+        self.logger.verbose('') # New line to split the output
+
+        with contextlib.ExitStack() as exit_stack:
+            outputs = []
+
+            if self.parameters.out_csv is not None:
+                self.open_output(exit_stack, outputs, self.parameters.out_csv,
+                        CsvHistoryFormatter(self.parameters))
+
+            if self.parameters.out_json is not None:
+                self.open_output(exit_stack, outputs, self.parameters.out_json,
+                        JsonHistoryFormatter(self.parameters))
+
+            if self.parameters.out_html is not None:
+                self.open_output(exit_stack, outputs, self.parameters.out_html,
+                        HtmlHistoryFormatter(self.parameters))
+
+            if self.parameters.out_csv is None and \
+                    self.parameters.out_json is None and \
+                    self.parameters.out_html is None:
+                outputs.append((None, sys.stdout,
+                        CsvHistoryFormatter(self.parameters)))
+
+            self.write_outputs(outputs, 'write', points)
@@ -34,6 +34,7 @@ import socket
 from operator import itemgetter
 from time import localtime, strftime
 
+from . import store
 from . import version
 
 
@@ -53,6 +54,12 @@ class HtmlFormatter(object):
         self.parameters = parameters
         # """ The input parameters. """
 
+        self.comments = store.CommentStore()
+        # """ The comments to write, the summary precedes them. """
+
+        self.profiler = None
+        # """ The profiler of the search whose report is written or None. """
+
 
     def get_type(self):
         """
@@ -124,7 +131,7 @@ tr:hover    { background-color: #C0C0FF; }
         """
         self.writeln('<div id="sidebar">', out_stream)
 
-        self.write_toc(out_stream)
+        self.write_toc(out_stream, summary)
 
         self.writeln('</div><!-- id="sidebar" -->', out_stream)
 
@@ -152,6 +159,15 @@ tr:hover    { background-color: #C0C0FF; }
 
         self.write_per_file(out_stream, summary.per_file)
 
+        if summary.timed_out:
+            self.writeln('<h3 id="timed_out">Timed Out Files</h3>\n',
+                    out_stream)
+
+            self.write_timed_out(out_stream, summary.timed_out)
+
+        if self.profiler is not None:
+            self.write_profile(out_stream, self.profiler)
+
         self.writeln('<h2 id="details">Details</h2>\n', out_stream)
 
         self.write_comments(out_stream, comments)
@@ -159,7 +175,7 @@ tr:hover    { background-color: #C0C0FF; }
         self.writeln('</div><!-- id="page" -->', out_stream)
 
 
-    def write_toc(self, out_stream):
+    def write_toc(self, out_stream, summary):
         """
         Write table of contents as menu.
         """
@@ -174,10 +190,25 @@ tr:hover    { background-color: #C0C0FF; }
         <ul>
         <li><a href="#general">General</a></li>
         <li><a href="#per_patterns">Per Patterns</a></li>
-        <li><a href="#per_files">Per Files</a></li>
+        <li><a href="#per_files">Per Files</a></li>''', out_stream)
+
+        if summary.timed_out:
+            self.writeln('        <li><a href="#timed_out">Timed Out Files'
+                    '</a></li>', out_stream)
+
+        self.writeln('''        </ul>
+    </li>''', out_stream)
+
+        if self.profiler is not None:
+            self.writeln('''    <li><a href="#profile">Profile</a>
+        <ul>
+        <li><a href="#slowest_files">Slowest Files</a></li>
+        <li><a href="#expensive_patterns">Expensive Patterns</a></li>
+        <li><a href="#slow_lines">Slow Lines</a></li>
         </ul>
-    </li>
-    <li><a href="#details">Details</a></li>
+    </li>''', out_stream)
+
+        self.writeln('''    <li><a href="#details">Details</a></li>
     </ul>
 </li>
 </ul>
@@ -219,6 +250,8 @@ tr:hover    { background-color: #C0C0FF; }
                         str(self.parameters.ignore_case))],
                 ['Number of Lines', self.html_special_chars(
                         str(self.parameters.num_lines))],
+                ['Lines Before', self.html_special_chars(
+                        str(self.parameters.before_context))],
                 ['Output TXT File', self.html_special_chars(
                         str(self.parameters.out_txt))],
                 ['Output XML File', self.html_special_chars(
@@ -237,15 +270,11 @@ tr:hover    { background-color: #C0C0FF; }
         """
         Write summary as a table.
         """
-        num_files_with_matches = 0
-        for count in summary.per_file.values():
-            if count != 0:
-                num_files_with_matches += 1
-
         rows = [['Searched Patterns', len(summary.per_pattern)],
-                ['Files with Matches', num_files_with_matches],
+                ['Files with Matches', len(summary.per_file)],
                 ['Total Files', summary.total_files],
-                ['Total Directories', summary.total_directories]
+                ['Total Directories', summary.total_directories],
+                ['Timed Out Files', len(summary.timed_out)]
         ]
         self.html_table(out_stream, ['Parameter', 'Value'], rows)
 
@@ -279,6 +308,56 @@ tr:hover    { background-color: #C0C0FF; }
         self.html_table(out_stream, ['File', 'Occurrences'], rows)
 
 
+    def write_timed_out(self, out_stream, timed_out):
+        """
+        Write table of the files whose search exceeded the time budget.
+        """
+        rows = [[self.html_link(os.path.abspath(path), path)]
+                for path in timed_out]
+        self.html_table(out_stream, ['File'], rows)
+
+
+    def write_profile(self, out_stream, profiler):
+        """
+        Write tables of the slowest files, of the most expensive patterns
+        and of the slowest searches of the patterns in the lines.
+        """
+        self.writeln('<h2 id="profile">Profile</h2>\n', out_stream)
+
+        self.writeln('<p>Profiled files: {0}, time: {1:.3f} s</p>\n'.format(
+                profiler.total_files, profiler.total_time), out_stream)
+
+        self.writeln('<h3 id="slowest_files">Slowest Files</h3>\n', out_stream)
+
+        rows = [[self.html_link(os.path.abspath(path), path),
+                '{0:.3f}'.format(elapsed), '{0:.3f}'.format(match_time)]
+                for elapsed, match_time, path in profiler.get_files()]
+        self.html_table(out_stream, ['File', 'Time [s]', 'Match [s]'], rows)
+
+        self.writeln('<h3 id="expensive_patterns">Expensive Patterns</h3>\n',
+                out_stream)
+
+        rows = [[self.html_special_chars(str_pattern),
+                '{0:.3f}'.format(profile.time),
+                '{0:.3f}'.format(profile.max_time * 1000), profile.calls,
+                profile.matches]
+                for str_pattern, profile in profiler.get_patterns()]
+        self.html_table(out_stream, ['Pattern', 'Time [s]', 'Max [ms]',
+                'Calls', 'Matches'], rows)
+
+        self.writeln('<h3 id="slow_lines">Slow Lines</h3>\n', out_stream)
+
+        self.writeln('<p>Searches longer than {0:.3f} s: {1}</p>\n'.format(
+                self.parameters.profile_threshold, profiler.slow_lines),
+                out_stream)
+
+        rows = [[self.html_link(os.path.abspath(path), path), line,
+                self.html_special_chars(str_pattern), '{0:.3f}'.format(elapsed)]
+                for elapsed, path, line, str_pattern in profiler.get_lines()]
+        self.html_table(out_stream, ['File', 'Line', 'Pattern', 'Time [s]'],
+                rows)
+
+
     def write_comments(self, out_stream, comments):
         """
         Write table of all occurrences with all details.
@@ -296,10 +375,19 @@ tr:hover    { background-color: #C0C0FF; }
                 rows)
 
 
-    def write_footer(self, out_stream):
+    def write_comment(self, out_stream, comment):
+        """
+        Store one comment, it is written in the footer after the summary.
+        """
+        self.comments.append(comment)
+
+
+    def write_footer(self, out_stream, summary):
         """
-        Write the footer to the output stream.
+        Write the data and the footer to the output stream.
         """
+        self.write_data(out_stream, self.comments, summary)
+
         self.writeln('<p id="footer">', out_stream)
         self.writeln('Page generated: {0}, {1} {2}'.format(
                 strftime("%Y-%m-%d %H:%M:%S", localtime()),
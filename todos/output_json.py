@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Output the data in JSON format.
+"""
+
+
+###############################################################################
+####
+
+import json
+
+from . import version
+
+
+###############################################################################
+####
+
+class JsonFormatter(object):
+    """
+    JSON formatter. The comments are written one by one as items of an array,
+    the summary follows them.
+    """
+
+
+    def __init__(self, parameters):
+        """
+        Class constructor.
+        """
+        self.parameters = parameters
+        # """ The input parameters. """
+
+        self.empty = True
+        # """ Flag that no comment was written yet. """
+
+
+    def get_type(self):
+        """
+        Return type of the formatter.
+        """
+        return 'JSON'
+
+
+    def write_header(self, out_stream):
+        """
+        Write the header to the output stream.
+        """
+        out_stream.write('{{"version": {0}, "comments": ['.format(
+                json.dumps(version.TodosVersion.VERSION)))
+
+
+    def write_comment(self, out_stream, comment):
+        """
+        Write one comment to the output stream.
+        """
+        if not self.empty:
+            out_stream.write(',')
+        self.empty = False
+
+        out_stream.write('\n')
+        out_stream.write(json.dumps({
+                'pattern': comment.str_pattern,
+                'file': comment.path,
+                'line': comment.position,
+                'lines': comment.lines,
+                'before': comment.before,
+            }))
+
+
+    def write_footer(self, out_stream, summary):
+        """
+        Write the summary and the footer to the output stream.
+        """
+        out_stream.write('\n], "summary": ')
+        out_stream.write(json.dumps({
+                'total_files': summary.total_files,
+                'total_directories': summary.total_directories,
+                'per_pattern': summary.per_pattern,
+                'per_file': summary.per_file,
+                'timed_out': summary.timed_out,
+            }))
+        out_stream.write('}\n')
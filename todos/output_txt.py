@@ -57,39 +57,47 @@ class TxtFormatter(object):
         return 'TXT'
 
 
-    def write_header(self, out_stream):
+    def is_multiline(self):
         """
-        Write the header to the output stream.
+        Return true if more lines are written per comment, otherwise false.
         """
-        # Empty
-        pass
+        return self.parameters.num_lines > 1 or \
+                self.parameters.before_context > 0
 
 
-    def write_data(self, out_stream, comments, summary):
+    def write_header(self, out_stream):
         """
-        Write the data to the output stream.
+        Write the header to the output stream.
         """
-        if self.parameters.num_lines > 1:
+        if self.is_multiline():
             self.writeln(self.MULTILINE_DELIMITER, out_stream)
 
-        for comment in comments:
-            position = comment.position
 
-            for line in comment.lines:
-                self.writeln('{0}:{1}: {2}'.format(
-                        comment.path, position, line), out_stream)
-                position += 1
+    def write_comment(self, out_stream, comment):
+        """
+        Write one comment to the output stream.
+        """
+        position = comment.position - comment.before
+
+        for line in comment.lines:
+            self.writeln('{0}:{1}: {2}'.format(
+                    comment.path, position, line), out_stream)
+            position += 1
 
-            if self.parameters.num_lines > 1:
-                self.writeln(self.MULTILINE_DELIMITER, out_stream)
+        if self.is_multiline():
+            self.writeln(self.MULTILINE_DELIMITER, out_stream)
 
 
-    def write_footer(self, out_stream):
+    def write_footer(self, out_stream, summary):
         """
-        Write the footer to the output stream.
+        Write the footer to the output stream, the files whose search timed
+        out are listed, their comments are unknown.
         """
-        # Empty
-        pass
+        if summary is None:
+            return
+
+        for path in summary.timed_out:
+            self.writeln('{0}: timed out'.format(path), out_stream)
 
 
     def writeln(self, data, out_stream):
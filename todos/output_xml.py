@@ -28,8 +28,6 @@ Output the data in XML format.
 ###############################################################################
 ####
 
-import xml.etree.ElementTree as etree
-
 from . import version
 
 
@@ -38,9 +36,14 @@ from . import version
 
 class XmlFormatter(object):
     """
-    XML formatter.
+    XML formatter. The document is written incrementally one comment at
+    a time, the output is the same as of the pretty printed ElementTree
+    that was used in the past.
     """
 
+    NAMESPACE = 'http://todos.sourceforge.net'
+    # """ The namespace of the document, see todos.xsd. """
+
 
     def __init__(self, parameters):
         """
@@ -49,6 +52,9 @@ class XmlFormatter(object):
         self.parameters = parameters
         # """ The input parameters. """
 
+        self.empty = True
+        # """ Flag that no comment was written yet. """
+
 
     def get_type(self):
         """
@@ -59,65 +65,77 @@ class XmlFormatter(object):
 
     def write_header(self, out_stream):
         """
-        Write the header to the output stream.
+        Write the header to the output stream. The start tag of the root
+        element is left open, an empty element is closed in the footer.
         """
-        pass
+        # Declare the encoding of the stream, default to UTF-8 like ElementTree
+        encoding = getattr(out_stream, 'encoding', None) or 'utf-8'
+
+        out_stream.write("<?xml version='1.0' encoding='{0}'?>\n".format(
+                encoding))
+        out_stream.write('<comments xmlns="{0}" version="{1}"'.format(
+                self.escape_attribute(self.NAMESPACE),
+                self.escape_attribute(version.TodosVersion.VERSION)))
+
+
+    def write_comment(self, out_stream, comment):
+        """
+        Write one comment to the output stream.
+        """
+        if self.empty:
+            out_stream.write('>')
+            self.empty = False
+
+        out_stream.write('\n\t<comment pattern="{0}" file="{1}" line="{2}"'.
+                format(self.escape_attribute(comment.str_pattern),
+                        self.escape_attribute(comment.path),
+                        comment.position))
 
+        if comment.before > 0:
+            out_stream.write(' before="{0}"'.format(comment.before))
 
-    def write_data(self, out_stream, comments, summary):
+        text = '\n'.join(comment.lines)
+        if text:
+            out_stream.write('>{0}</comment>'.format(self.escape_text(text)))
+        else:
+            out_stream.write(' />')
+
+
+    def write_footer(self, out_stream, summary):
         """
-        Write the data to the output stream.
+        Write the footer to the output stream, the files whose search timed
+        out follow the comments.
         """
-        el_comments = etree.Element('{http://todos.sourceforge.net}comments',
-                attrib = {
-                    '{http://todos.sourceforge.net}version':
-                            version.TodosVersion.VERSION,
-                })
-
-        for comment in comments:
-            el_comment = etree.SubElement(
-                el_comments, '{http://todos.sourceforge.net}comment',
-                attrib = {
-                    '{http://todos.sourceforge.net}pattern':comment.str_pattern,
-                    '{http://todos.sourceforge.net}file':comment.path,
-                    '{http://todos.sourceforge.net}line':str(comment.position)
-                }
-            )
-
-            el_comment.text = '\n'.join(comment.lines)
-
-        self.indent(el_comments)
-        tree = etree.ElementTree(el_comments)
-
-        tree.write(out_stream,
-            encoding="unicode",
-            xml_declaration=True,
-            default_namespace='http://todos.sourceforge.net',
-            method="xml")
-
-
-    def write_footer(self, out_stream):
+        if summary is not None:
+            for path in summary.timed_out:
+                if self.empty:
+                    out_stream.write('>')
+                    self.empty = False
+
+                out_stream.write('\n\t<timed_out file="{0}" />'.format(
+                        self.escape_attribute(path)))
+
+        if self.empty:
+            out_stream.write(' />')
+        else:
+            out_stream.write('\n</comments>\n')
+
+
+    def escape_text(self, text):
         """
-        Write the footer to the output stream.
+        Replace the special characters in the element content by the XML
+        entities and return a new string.
         """
-        pass
+        return text.replace('&', '&amp;').replace('<', '&lt;').\
+                replace('>', '&gt;')
 
 
-    def indent(self, elem, level=0):
+    def escape_attribute(self, text):
         """
-        Pretty print the XML document.
-        http://effbot.org/zone/element-lib.htm#prettyprint
+        Replace the special characters in the attribute value by the XML
+        entities and return a new string. White characters are escaped too,
+        they would be normalized to spaces by the XML parser.
         """
-        i = '\n' + level*'\t'
-        if len(elem):
-            if not elem.text or not elem.text.strip():
-                elem.text = i + '\t'
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-            for elem in elem:
-                self.indent(elem, level+1)
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-        else:
-            if level and (not elem.tail or not elem.tail.strip()):
-                elem.tail = i
+        return self.escape_text(text).replace('"', '&quot;').\
+                replace('\r', '&#13;').replace('\n', '&#10;').\
+                replace('\t', '&#09;')
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Parallel searching of the comments in a pool of worker processes.
+"""
+
+
+###############################################################################
+####
+
+import collections
+import concurrent.futures
+import copy
+import os
+
+from . import dedup
+from . import exceptions
+from . import logger
+from . import search
+
+
+###############################################################################
+#### Worker process
+
+_WORKER_SEARCH = None
+# """ The search object of the worker process, created once per worker. """
+
+
+def init_worker(parameters):
+    """
+    Initialize the worker process, compile the patterns only once.
+    """
+    global _WORKER_SEARCH
+
+    # The cache and the baseline are used only by the main process
+    parameters = copy.copy(parameters)
+    parameters.cache_dir = None
+    parameters.baseline = None
+    parameters.index = None
+
+    _WORKER_SEARCH = search.CommentsSearch(parameters,
+            logger.Logger(parameters.verbose))
+
+
+def scan_batch(files):
+    """
+    Search comments in a batch of (path, blob_id) files, return (results,
+    timed_out, statistics, scan_statistics) tuple. The results are in the same
+    order as the input files, the timed out are the paths of the files whose
+    search exceeded the time budget, their results are None. The statistics
+    are the counters of the results reused by the worker or None, the scan
+    statistics are the time and the counters of the batch or None.
+    """
+    statistics = None
+    if _WORKER_SEARCH.dedup is not None:
+        _WORKER_SEARCH.dedup.statistics = dedup.DedupStatistics()
+        statistics = _WORKER_SEARCH.dedup.statistics
+
+    results = []
+    timed_out = set()
+
+    for path, blob_id in files:
+        try:
+            results.append(_WORKER_SEARCH.search_file(path, blob_id=blob_id))
+        except exceptions.TodosTimeoutError:
+            results.append(None)
+            timed_out.add(path)
+
+    scan_statistics = None
+    if _WORKER_SEARCH.stats is not None:
+        scan_statistics = _WORKER_SEARCH.stats.take()
+
+    return results, timed_out, statistics, scan_statistics
+
+
+###############################################################################
+####
+
+class ParallelCommentsSearch(search.CommentsSearch):
+    """
+    Search comments in the source files using a pool of worker processes.
+    The files are sent to the workers in batches and the results are merged
+    in the order of the traversal, the output is the same as of the serial
+    search. The hardlinks and the files with the git blob ids searched before
+    are not sent, the other duplicates are recognised by the workers, each
+    one has its own content table.
+    """
+
+    BATCH_FILES = 256
+    # """ The maximal number of files in one batch. """
+
+    BATCH_BYTES = 4 * 1024 * 1024
+    # """ The batch is closed when the size of its files exceeds the limit. """
+
+    PENDING_PER_JOB = 4
+    # """ The number of batches per worker that may wait for merging. """
+
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor, prepare the object for searching.
+        """
+        super(ParallelCommentsSearch, self).__init__(parameters, logger)
+
+        self.jobs = parameters.jobs or os.cpu_count() or 1
+        # """ The number of the worker processes. """
+
+        self.sent = set()
+        # """ The keys of the files sent to the workers, see get_dedup_keys(),
+        # the next files with the same keys reuse their results. """
+
+
+    def process_directories(self):
+        """
+        Process all directories, the files are searched by the workers.
+        Generate the found comments.
+        """
+        directory_walker = self.create_walker()
+        files = directory_walker.walk(self.parameters.directories)
+
+        with concurrent.futures.ProcessPoolExecutor(self.jobs,
+                initializer=init_worker,
+                initargs=(self.parameters,)) as executor:
+            pending = collections.deque()
+
+            try:
+                for batch in self.make_batches(files):
+                    sent = [(path, self.get_blob_id(path))
+                            for path, signature, known, keys, alias in batch
+                            if known is None and not alias]
+
+                    future = None
+                    if sent:
+                        future = executor.submit(scan_batch, sent)
+
+                    pending.append((batch, future))
+
+                    if len(pending) >= self.jobs * self.PENDING_PER_JOB:
+                        yield from self.merge_batch(*pending.popleft())
+
+                while pending:
+                    yield from self.merge_batch(*pending.popleft())
+            except GeneratorExit:
+                # The consumer stopped reading, don't wait for the batches
+                executor.shutdown(cancel_futures=True)
+                raise
+
+        self.summary.total_directories += directory_walker.statistics.directories
+        self.logger.verbose('Directory traversal: {0}'.format(
+                directory_walker.statistics))
+
+
+    def make_batches(self, files):
+        """
+        Group the (path, entry) tuples from the traversal to batches of
+        (path, signature, known, keys, alias) tuples. The known item is
+        a (comments,) tuple if the results are in the cache, the index or
+        the baseline, otherwise None and the file is sent to a worker unless
+        the alias flag is set. The alias file has the same keys in the content
+        table as a file sent before, it reuses its results. Many small files
+        are sent together to hide the communication overhead, large files are
+        sent in smaller batches to balance the workers.
+        """
+        batch = []
+        batch_bytes = 0
+
+        for path, entry in files:
+            signature = None
+            known = None
+            keys = (None, None)
+            alias = False
+
+            if self.has_known_results():
+                signature, known = self.lookup_file(path, entry)
+
+            if known is None and self.dedup is not None and \
+                    not self.is_file_skipped(path):
+                size, keys = self.get_dedup_keys(path, entry)
+                alias = any(key in self.sent for key in keys
+                        if key is not None)
+                self.sent.update(key for key in keys if key is not None)
+
+            batch.append((path, signature, known, keys, alias))
+
+            if known is None and not alias:
+                try:
+                    if entry is not None:
+                        batch_bytes += entry.stat().st_size
+                    else:
+                        batch_bytes += os.stat(path).st_size
+                except OSError:
+                    pass
+
+            if len(batch) >= self.BATCH_FILES or batch_bytes >= self.BATCH_BYTES:
+                yield batch
+                batch = []
+                batch_bytes = 0
+
+        if batch:
+            yield batch
+
+
+    def merge_batch(self, batch, future):
+        """
+        Wait for the results of the batch, merge them to the summary and
+        generate the comments.
+        """
+        results = iter([])
+        timed_out = set()
+        if future is not None:
+            results, timed_out, statistics, scan_statistics = future.result()
+            results = iter(results)
+
+            if statistics is not None:
+                self.dedup.statistics.add(statistics)
+
+            if scan_statistics is not None:
+                self.stats.add(scan_statistics)
+
+        for path, signature, known, keys, alias in batch:
+            if known is not None:
+                comments = known[0]
+            else:
+                if alias:
+                    try:
+                        comments = self.search_alias(path, keys)
+                    except exceptions.TodosTimeoutError:
+                        yield from self.add_timed_out(path)
+                        continue
+                else:
+                    comments = next(results)
+
+                    if path in timed_out:
+                        yield from self.add_timed_out(path)
+                        continue
+
+                    if self.dedup is not None:
+                        self.store_dedup(keys, comments)
+
+                self.store_results(path, signature, comments)
+
+            yield from self.add_file_result(path, comments)
+
+
+    def get_blob_id(self, path):
+        """
+        Return the git blob id of the file or None if it is not known.
+        """
+        if self.blobs is None:
+            return None
+
+        return self.blobs.get(path)
+
+
+    def search_alias(self, path, keys):
+        """
+        Return the comments of the file that has the same keys in the content
+        table as a file merged before. The file is searched in this process
+        if the results are not available, e.g. the other file was unreadable.
+        """
+        size = 0
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            pass
+
+        hit, results = self.lookup_dedup(path, size, keys)
+        if hit:
+            return self.create_comments(path, results)
+
+        return self.scan_file(path)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Fast rejection of the files that can't contain any comment.
+"""
+
+
+###############################################################################
+####
+
+import re
+
+from . import lexer
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+
+###############################################################################
+####
+
+def casefold(text):
+    """
+    Return the text folded for case-insensitive comparison. Dotless i is
+    folded to i, the regular expressions match them with IGNORECASE.
+    """
+    return text.casefold().replace('\u0131', 'i')
+
+
+def get_required_literal(str_pattern, flags=0, folded=False):
+    """
+    Return the longest literal string that is present in every match of the
+    pattern or None if there is no such string or if it can't be determined.
+    Only the top level sequence of the pattern is examined. The literal of
+    a case-insensitive pattern is returned folded by casefold() if folded
+    is true, otherwise None is returned for such pattern.
+    """
+    try:
+        parsed = sre_parse.parse(str_pattern, flags)
+    except (re.error, RecursionError):
+        return None
+
+    ignore_case = parsed.state.flags & re.IGNORECASE
+    if ignore_case and not folded:
+        return None
+
+    best = ''
+    current = []
+
+    for op, av in list(parsed) + [(None, None)]:
+        if op == sre_parse.LITERAL:
+            current.append(chr(av))
+            continue
+
+        if len(current) > len(best):
+            best = ''.join(current)
+        current = []
+
+    if ignore_case:
+        # Capital I with dot matches plain i, its folding doesn't
+        if '\u0130' in best:
+            return None
+        best = casefold(best)
+
+    return best or None
+
+
+###############################################################################
+####
+
+class BytePrefilter(object):
+    """
+    Check whether the raw content of a file contains the encoded comment
+    markers and the required literals of the patterns. A file without them
+    can't contain any comment, so it doesn't have to be decoded at all.
+    """
+
+    def __init__(self, parameters, patterns):
+        """
+        Class constructor, encode the literals. The patterns are
+        the precompiled search.Pattern objects.
+        """
+        self.comment_atoms = None
+        # """ The encoded comment markers, one of them must be present
+        # or None to accept all files. """
+
+        self.pattern_atoms = None
+        # """ The encoded required literals of the patterns, one of them must
+        # be present or None to accept all files. """
+
+        comments = parameters.comments
+        if parameters.lexer:
+            comments = comments + lexer.get_markers()
+
+        self.comment_atoms = self.encode_atoms(comments, parameters.encoding)
+
+        if not parameters.ignore_case:
+            literals = [get_required_literal(pattern.str_pattern)
+                    for pattern in patterns]
+
+            if None not in literals:
+                self.pattern_atoms = self.encode_atoms(literals,
+                        parameters.encoding)
+
+
+    def encode_atoms(self, literals, encoding):
+        """
+        Return list of the unique encoded literals or None if they can't be
+        searched in the encoded content.
+        """
+        atoms = set()
+
+        for literal in literals:
+            try:
+                atom = literal.encode(encoding)
+
+                # Byte order marks, shift states, etc.
+                if (literal + literal).encode(encoding) != atom + atom:
+                    return None
+            except UnicodeError:
+                # The literal can't be present in a valid file
+                continue
+            except LookupError:
+                return None
+
+            if not atom:
+                return None
+
+            atoms.add(atom)
+
+        if not atoms:
+            return None
+
+        return sorted(atoms)
+
+
+    def is_candidate(self, data):
+        """
+        Return true if the content of the file may contain a comment,
+        otherwise false. The data are bytes or a memory mapped file.
+        """
+        if self.comment_atoms is not None and not any(
+                data.find(atom) != -1 for atom in self.comment_atoms):
+            return False
+
+        if self.pattern_atoms is not None and not any(
+                data.find(atom) != -1 for atom in self.pattern_atoms):
+            return False
+
+        return True
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Profiling of the search, the slowest files, the most expensive patterns
+and the lines where a single search of a pattern was slow.
+"""
+
+
+###############################################################################
+####
+
+import collections
+import heapq
+import time
+
+
+###############################################################################
+####
+
+class PatternProfile(object):
+    """
+    Container to store the counters of one pattern.
+    """
+
+    def __init__(self):
+        """
+        Class constructor, initialize all members to zero.
+        """
+        self.calls = 0
+        # """ The number of the searches of the pattern. """
+
+        self.matches = 0
+        # """ The number of the searches that found a match. """
+
+        self.time = 0.0
+        # """ The total time of the searches in seconds. """
+
+        self.max_time = 0.0
+        # """ The time of the slowest search in seconds. """
+
+
+###############################################################################
+####
+
+class Profiler(object):
+    """
+    Profiler of the time spent in the files and in the patterns. Each pattern
+    is searched separately in the candidate lines and every search is timed,
+    so the profiled search is slower than the normal one, which searches
+    the combined expression. The results are the same, the first matching
+    pattern in the list order wins. Only the top slowest files and lines are
+    kept, memory doesn't grow with the number of the files.
+    """
+
+    def __init__(self, parameters):
+        """
+        Class constructor, initialize all members.
+        """
+        self.parameters = parameters
+        # """ The input parameters. """
+
+        self.patterns = collections.OrderedDict((str_pattern,
+                PatternProfile()) for str_pattern in parameters.patterns)
+        # """ Mapping of the patterns to their PatternProfile. """
+
+        self.files = []
+        # """ Heap of the (time, match_time, path) tuples of the slowest
+        # files. """
+
+        self.lines = []
+        # """ Heap of the (time, path, line, str_pattern) tuples of the slowest
+        # searches longer than the threshold. """
+
+        self.slow_lines = 0
+        # """ The number of the searches longer than the threshold. """
+
+        self.total_files = 0
+        # """ The number of the profiled files. """
+
+        self.total_time = 0.0
+        # """ The total time of the profiled files in seconds. """
+
+        self.path = None
+        # """ The file that is being searched. """
+
+        self.line = 0
+        # """ The one-based number of the line that is being searched. """
+
+        self.match_time = 0.0
+        # """ The time of the searches of the patterns in the current file. """
+
+
+    def attach(self, comments_search):
+        """
+        Wrap the methods of the search object by the profiler, the patterns
+        are searched by search(). The combined expression is not searched
+        in the whole buffer, its time couldn't be charged to the patterns
+        and to the lines.
+        """
+        search_data = comments_search.search_data
+        match_number = comments_search.match_number
+
+        def profiled_search_data(path, data):
+            return self.profile_file(search_data, path, data)
+
+        def profiled_match_number(line_index, number, spans):
+            self.line = line_index.first + number + 1
+            return match_number(line_index, number, spans)
+
+        comments_search.search_data = profiled_search_data
+        comments_search.match_number = profiled_match_number
+        comments_search.matcher.search = self.search
+        comments_search.matcher.buffer_expression = None
+
+
+    def profile_file(self, search_data, path, data):
+        """
+        Search the file by the function and record its time.
+        """
+        self.path = path
+        self.line = 0
+        self.match_time = 0.0
+
+        start = time.perf_counter()
+        try:
+            return search_data(path, data)
+        finally:
+            elapsed = time.perf_counter() - start
+
+            self.total_files += 1
+            self.total_time += elapsed
+            self.push(self.files, (elapsed, self.match_time, path))
+
+
+    def search(self, line, candidates=None):
+        """
+        Return the first pattern in the list order that matches anywhere
+        in the line or None, like matcher.CombinedMatcher.search(). All
+        candidate patterns are searched, so each one is charged for its time.
+        """
+        perf_counter = time.perf_counter
+        found = None
+
+        for index, pattern in enumerate(self.parameters.compiled_patterns):
+            if candidates is not None and not candidates & (1 << index):
+                continue
+
+            start = perf_counter()
+            match = pattern.re_pattern.search(line)
+            elapsed = perf_counter() - start
+
+            profile = self.patterns[pattern.str_pattern]
+            profile.calls += 1
+            profile.time += elapsed
+            profile.max_time = max(profile.max_time, elapsed)
+            self.match_time += elapsed
+
+            if elapsed >= self.parameters.profile_threshold:
+                self.slow_lines += 1
+                self.push(self.lines, (elapsed, self.path, self.line,
+                        pattern.str_pattern))
+
+            if match is not None:
+                profile.matches += 1
+                if found is None:
+                    found = pattern
+
+        return found
+
+
+    def push(self, heap, item):
+        """
+        Add the item to the heap, only the top largest items are kept.
+        """
+        if len(heap) < self.parameters.profile_top:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+
+    def get_files(self):
+        """
+        Return the (time, match_time, path) tuples of the slowest files,
+        the slowest one first.
+        """
+        return sorted(self.files, reverse=True)
+
+
+    def get_patterns(self):
+        """
+        Return the (str_pattern, PatternProfile) tuples sorted by the total
+        time, the most expensive pattern first.
+        """
+        return sorted(self.patterns.items(),
+                key=lambda item: item[1].time, reverse=True)
+
+
+    def get_lines(self):
+        """
+        Return the (time, path, line, str_pattern) tuples of the slowest
+        searches longer than the threshold, the slowest one first.
+        """
+        return sorted(self.lines, reverse=True)
+
+
+    def format_report(self):
+        """
+        Return the profile formatted as a text report.
+        """
+        lines = ['Profiled files: {0}, time: {1:.3f} s'.format(
+                self.total_files, self.total_time), '']
+
+        lines.append('{0:>10} {1:>10}  {2}'.format('Time [s]', 'Match [s]',
+                'Slowest Files'))
+        for elapsed, match_time, path in self.get_files():
+            lines.append('{0:>10.3f} {1:>10.3f}  {2}'.format(elapsed,
+                    match_time, path))
+
+        lines.append('')
+        lines.append('{0:>10} {1:>10} {2:>10} {3:>10}  {4}'.format('Time [s]',
+                'Max [ms]', 'Calls', 'Matches', 'Patterns'))
+        for str_pattern, profile in self.get_patterns():
+            lines.append('{0:>10.3f} {1:>10.3f} {2:>10} {3:>10}  {4}'.format(
+                    profile.time, profile.max_time * 1000, profile.calls,
+                    profile.matches, str_pattern))
+
+        lines.append('')
+        lines.append('Slow lines (>= {0:.3f} s): {1}'.format(
+                self.parameters.profile_threshold, self.slow_lines))
+        for elapsed, path, line, str_pattern in self.get_lines():
+            lines.append('{0:>10.3f}  {1}:{2}  {3}'.format(elapsed, path, line,
+                    str_pattern))
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Searching of the comments in a git revision without a checkout.
+"""
+
+
+###############################################################################
+####
+
+from . import git
+from . import search
+
+
+###############################################################################
+####
+
+class RevisionCommentsSearch(search.CommentsSearch):
+    """
+    Search comments in the files of a git revision, the blobs are read from
+    the object store by one git cat-file process per input directory. The stat
+    signature of a file contains the blob id, so the cache and the index
+    reuse the results of the unchanged blobs of a nearby revision.
+    """
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor, prepare the object for searching.
+        """
+        search.CommentsSearch.__init__(self, parameters, logger)
+
+        self.readers = {}
+        # """ Mapping of the input directories to their blob readers. """
+
+        if self.dedup is not None:
+            self.blobs = {}
+
+
+    def create_walker(self):
+        """
+        Return the walker generating the files in the tree of the revision.
+        """
+        directory_walker = git.RevisionWalker(self.parameters, self.logger)
+        directory_walker.readers = self.readers
+        directory_walker.blobs = self.blobs
+        return directory_walker
+
+
+    def process_directories(self):
+        """
+        Process all directories, generate the found comments. The git
+        processes are stopped at the end.
+        """
+        try:
+            yield from search.CommentsSearch.process_directories(self)
+        finally:
+            for reader in self.readers.values():
+                reader.close()
+
+            self.readers.clear()
+
+
+    def is_output_file(self, path):
+        """
+        The output files are never in the tree of the revision.
+        """
+        return False
+
+
+    def read_file(self, path, entry=None):
+        """
+        Return the content of the blob of the file or None if reading failed.
+        """
+        try:
+            return entry.read()
+        except IOError as exception:
+            self.logger.warn('Reading from file failed: {0}, {1}'.
+                    format(path, exception))
+            self.count_skipped('read error')
+            return None
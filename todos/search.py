@@ -28,10 +28,31 @@ Searching of the comments.
 ###############################################################################
 ####
 
+import bisect
+import codecs
+import collections
+import functools
+import itertools
+import mmap
 import os
 import re
 
+from . import automaton
+from . import baseline
+from . import cache
+from . import dedup
 from . import exceptions
+from . import git
+from . import guard
+from . import index
+from . import lexer
+from . import matcher
+from . import prefilter
+from . import profiler
+from . import stats
+from . import store
+from . import stream
+from . import walker
 
 
 ###############################################################################
@@ -42,7 +63,7 @@ class Comment(object):
     Container to store one comment that was found.
     """
 
-    def __init__(self, str_pattern, path, position, lines):
+    def __init__(self, str_pattern, path, position, lines, before=0):
         """
         Class constructor, initialize all members.
         """
@@ -56,7 +77,11 @@ class Comment(object):
         # """ The position in the file. """
 
         self.lines = lines
-        # """ The matching line and optionally several lines after it. """
+        # """ The matching line and optionally several lines before
+        # and after it. """
+
+        self.before = before
+        # """ The number of the lines before the matching line. """
 
 
 ###############################################################################
@@ -108,12 +133,230 @@ class Summary(object):
         # """ Summary per pattern. """
 
         self.per_file = {}
-        # """ Summary per file. """
+        # """ Summary per file, only the files with a comment are present. """
+
+        self.timed_out = []
+        # """ The files whose search exceeded the time budget, their comments
+        # are unknown. """
 
         for str_pattern in parameters.patterns:
             self.per_pattern[str_pattern] = 0
 
 
+###############################################################################
+####
+
+class LineIndex(object):
+    """
+    Offsets of the lines in a buffer with content of a file. Lines are
+    separated by '\\n' as returned by readlines() in text mode.
+    """
+
+    def __init__(self, buffer, first=0):
+        """
+        Class constructor, find the beginnings of all lines. The first is
+        the number of the lines before the buffer if it is a part of a file.
+        """
+        self.buffer = buffer
+        # """ The content of the file. """
+
+        self.first = first
+        # """ The number of the lines of the file before the buffer. """
+
+        parts = buffer.split('\n')
+
+        self.starts = list(itertools.accumulate(
+                map((1).__add__, map(len, parts)), initial=0))
+        # """ Offsets of the line beginnings and of the buffer end. """
+
+        # The buffer ending with a new line has no extra empty line
+        if parts[-1] == '':
+            self.starts.pop()
+        else:
+            self.starts[-1] = len(buffer)
+
+        self.count = len(self.starts) - 1
+        # """ The number of the lines. """
+
+
+    def get_line_number(self, offset):
+        """
+        Return zero-based number of the line containing the offset. The number
+        is equal to count for the end of the buffer ending with a new line.
+        """
+        number = bisect.bisect_right(self.starts, offset) - 1
+
+        # The end of the buffer belongs to the last line without a new line
+        if number == self.count and number > 0 and \
+                not self.buffer.endswith('\n'):
+            number -= 1
+
+        return number
+
+
+    def get_line_end(self, number):
+        """
+        Return offset of the end of the line, including its '\\n'.
+        """
+        return self.starts[number + 1]
+
+
+    def get_line(self, number):
+        """
+        Return the line including its '\\n'.
+        """
+        return self.buffer[self.starts[number]:self.starts[number + 1]]
+
+
+    def get_lines(self, number, count):
+        """
+        Return content of the specified number of lines starting at the line
+        with the zero-based number, trailing white characters are stripped.
+        """
+        last_line = min(number + count, self.count)
+        if last_line <= number:
+            return []
+
+        lines = self.buffer[self.starts[number]:self.starts[last_line]].\
+                split('\n')
+
+        # The last line either ends with a new line or the buffer ends
+        if lines[-1] == '':
+            lines.pop()
+
+        return [line.rstrip() for line in lines]
+
+
+###############################################################################
+####
+
+class LiteralFilter(object):
+    """
+    Analyzer of the literal substrings required by the patterns. Every match
+    of a pattern contains the required literal of the pattern, so a line
+    without any of these atoms is rejected by a plain substring search before
+    any regular expression runs. The atoms are case-folded if the case
+    is ignored.
+    """
+
+    def __init__(self, patterns, ignore_case):
+        """
+        Class constructor, extract the atoms. The patterns are
+        the precompiled search.Pattern objects.
+        """
+        self.ignore_case = ignore_case
+        # """ The atoms and the lines are compared case-folded. """
+
+        self.atoms = None
+        # """ The atoms, one of them must be present in a matching line,
+        # or None if a pattern has no required literal. """
+
+        self.literals = None
+        # """ The required literals in the order of the patterns or None
+        # if a pattern has no required literal. """
+
+        flags = 0
+        if ignore_case:
+            flags = re.IGNORECASE
+
+        literals = [prefilter.get_required_literal(pattern.str_pattern,
+                flags, folded=ignore_case) for pattern in patterns]
+
+        if literals and None not in literals:
+            self.literals = literals
+
+            literals = set(literals)
+            # The line containing 'TODO' is a candidate even for 'TODO:'
+            self.atoms = sorted(literal for literal in literals
+                    if not any(other != literal and other in literal
+                            for other in literals))
+
+
+    def is_candidate(self, line):
+        """
+        Return true if the line contains an atom, otherwise false.
+        """
+        if self.atoms is None:
+            return True
+
+        if self.ignore_case:
+            line = prefilter.casefold(line)
+
+        for atom in self.atoms:
+            if atom in line:
+                return True
+
+        return False
+
+
+    def create_scanner(self, buffer):
+        """
+        Return scanner of the atoms in the buffer or None if the atoms can't
+        be searched in the whole buffer. A case-folded buffer must have
+        the same offsets as the original one, so only ASCII content is folded.
+        """
+        if self.atoms is None:
+            return None
+
+        if not self.ignore_case:
+            return LiteralScanner(buffer, self.atoms)
+
+        if buffer.isascii():
+            return LiteralScanner(buffer.lower(), self.atoms)
+
+        return None
+
+
+###############################################################################
+####
+
+class LiteralScanner(object):
+    """
+    Search of the atoms in a buffer. The next occurrence of each atom is
+    remembered, so the buffer is searched for every atom only once
+    in total, not once per candidate.
+    """
+
+    def __init__(self, buffer, atoms):
+        """
+        Class constructor, find the first occurrences of the atoms.
+        """
+        self.buffer = buffer
+        # """ The content of the file, case-folded if the case is ignored. """
+
+        self.atoms = []
+        # """ The atoms that are still present in the buffer. """
+
+        self.positions = []
+        # """ The offsets of the next occurrences of the atoms. """
+
+        for atom in atoms:
+            position = buffer.find(atom)
+            if position != -1:
+                self.atoms.append(atom)
+                self.positions.append(position)
+
+
+    def search_candidate(self, pos):
+        """
+        Return offset of the first atom in the buffer at or after
+        the position or -1 if there is none.
+        """
+        best = -1
+
+        for index, atom in enumerate(self.atoms):
+            position = self.positions[index]
+
+            if position != -1 and position < pos:
+                position = self.buffer.find(atom, pos)
+                self.positions[index] = position
+
+            if position != -1 and (best == -1 or position < best):
+                best = position
+
+        return best
+
+
 ###############################################################################
 ####
 
@@ -122,6 +365,19 @@ class CommentsSearch(object):
     Search comments in the source files.
     """
 
+    MMAP_SIZE = 1024 * 1024
+    # """ Files of this size and larger are memory mapped. """
+
+    STREAM_SIZE = 16 * 1024 * 1024
+    # """ Files of this size and larger are decoded and searched in chunks. """
+
+    CHUNK_SIZE = 1024 * 1024
+    # """ The size of the chunks of the large files. """
+
+    COMMENT_MASK = 1
+    # """ The mask of the comment markers in the automaton, the patterns
+    # follow it. """
+
     def __init__(self, parameters, logger):
         """
         Class constructor, prepare the object for searching.
@@ -132,8 +388,9 @@ class CommentsSearch(object):
         self.logger = logger
         # """ The logger to output messages. """
 
-        self.comments = []
-        # """ The comments that was found during the searching. """
+        self.comments = store.CommentStore()
+        # """ The comments that was found by search(), iterate() doesn't store
+        # them. """
 
         self.summary = Summary(parameters)
         # """ The summary of the searching. """
@@ -153,62 +410,176 @@ class CommentsSearch(object):
                         'Pattern compilation failed: {0}, {1}'.
                         format(str_pattern, re_exception))
 
+        self.matcher = matcher.CombinedMatcher(
+                self.parameters.compiled_patterns, flags)
+        # """ The matcher of all patterns at once. """
 
-    def search(self):
+        self.prefilter = prefilter.BytePrefilter(self.parameters,
+                self.parameters.compiled_patterns)
+        # """ The filter of the files that can't contain any comment. """
+
+        self.literals = LiteralFilter(self.parameters.compiled_patterns,
+                self.parameters.ignore_case)
+        # """ The filter of the lines that can't match any pattern. """
+
+        self.automaton = self.create_automaton()
+        # """ The automaton searching the comment markers and, if the case
+        # is not ignored, the required literals in one pass over a line. """
+
+        self.cache = None
+        # """ The cache of the results of the unchanged files or None. """
+
+        if self.parameters.cache_dir is not None:
+            self.cache = cache.ResultCache(self.parameters, self.logger)
+
+        self.baseline = None
+        # """ The results of a previous report for the unchanged files or
+        # None. """
+
+        if self.parameters.baseline is not None:
+            self.baseline = baseline.Baseline(self.parameters, self.logger)
+
+        self.index = None
+        # """ The index of the comments in a database or None. """
+
+        if self.parameters.index is not None:
+            self.index = index.CommentIndex(self.parameters, self.logger)
+
+        self.dedup = None
+        # """ The results of the searched files addressed by their content
+        # or None. """
+
+        self.blobs = None
+        # """ Mapping of the paths of the tracked files unmodified in the work
+        # tree to their git blob ids or None. """
+
+        if self.parameters.dedup:
+            self.dedup = dedup.ContentTable()
+
+            if self.parameters.git_tracked:
+                self.blobs = {}
+
+        self.profiler = None
+        # """ The profiler of the files and of the patterns or None. """
+
+        if self.parameters.profile:
+            self.profiler = profiler.Profiler(self.parameters)
+            self.profiler.attach(self)
+
+        self.stats = None
+        # """ The time spent in the phases of the search and the counters
+        # of the processed data or None. """
+
+        if self.parameters.stats:
+            self.stats = stats.ScanStatistics()
+            self.instrument()
+
+        self.guard = None
+        # """ The supervisor of the worker process searching the files with
+        # a time budget or None. """
+
+        if self.parameters.file_timeout is not None or \
+                self.parameters.line_timeout is not None:
+            self.guard = guard.SearchGuard(self.parameters, self.logger)
+
+
+    def instrument(self):
         """
-        Recursively search the comments according to the input parameters.
+        Wrap the methods of the phases of the search by the timers
+        of the statistics. The methods of the object are replaced, the class
+        is untouched and the search without the statistics is not slowed down.
         """
-        self.process_directories()
+        self.process_directories = self.stats.time_generator(
+                'process_directories', self.process_directories)
 
+        for phase in ['read_file', 'is_file_binary', 'decode', 'scan_stream']:
+            setattr(self, phase, self.stats.time_function(phase,
+                    getattr(self, phase)))
 
-    def process_directories(self):
+        # One examined line is one call
+        self.match_number = self.stats.count_calls('lines examined',
+                self.stats.time_function('match_number', self.match_number))
+
+        self.matcher.search = self.stats.count_calls('regex calls',
+                self.matcher.search)
+        self.matcher.search_candidate = self.stats.count_calls('regex calls',
+                self.matcher.search_candidate)
+
+        create_walker = self.create_walker
+
+        def create_timed_walker():
+            directory_walker = create_walker()
+            self.stats.time_walker(directory_walker)
+            return directory_walker
+
+        self.create_walker = create_timed_walker
+
+
+    def count_skipped(self, reason):
         """
-        Process all directories.
+        Count the skipped file in the statistics if they are enabled.
         """
-        for directory in self.parameters.directories:
-            self.process_directory(directory)
+        if self.stats is not None:
+            self.stats.skipped[reason] += 1
 
 
-    def is_directory_suppressed(self, directory):
+    def search(self):
         """
-        Return true if the input directory should be skipped, otherwise false.
+        Recursively search the comments according to the input parameters
+        and store all of them.
         """
-        if self.parameters.suppressed is None:
-            return False
+        self.comments.extend(self.iterate())
 
-        # Add slash at the end, the suppresed one from user may contain it
-        directory_with_slash = os.path.join(directory, '')
 
-        for dir in self.parameters.suppressed:
-            if dir in directory_with_slash:
-                return True
+    def iterate(self):
+        """
+        Recursively search the comments according to the input parameters and
+        generate them in the order they are found. The summary is updated
+        incrementally, it is complete when the generator is exhausted.
+        """
+        try:
+            yield from self.process_directories()
+        finally:
+            if self.guard is not None:
+                self.guard.close()
 
-        return False
+        if self.cache is not None:
+            self.cache.save()
+            self.logger.verbose('Cache: {0}'.format(self.cache.statistics))
 
+        if self.index is not None:
+            self.index.save(self.summary)
+            self.logger.verbose('Index: {0}'.format(self.index.statistics))
 
-    def process_directory(self, directory):
-        '''
-        Recursively search files in the input directory.
-        '''
-        if not os.path.isdir(directory):
-            self.logger.verbose('Skipping directory (not a directory): {0}'.
-                    format(directory))
-            return
+        if self.dedup is not None:
+            self.logger.verbose('Dedup: {0}'.format(self.dedup.statistics))
 
-        if self.is_directory_suppressed(directory):
-            self.logger.verbose('Skipping directory (suppressed): {0}'.
-                    format(directory))
-            return
 
-        self.summary.total_directories += 1
+    def create_walker(self):
+        """
+        Return the walker generating the input files.
+        """
+        if self.parameters.git_tracked:
+            directory_walker = git.TrackedFilesWalker(self.parameters,
+                    self.logger)
+            directory_walker.blobs = self.blobs
+            return directory_walker
 
-        for item in os.listdir(directory):
-            path = os.path.join(directory, item)
+        return walker.DirectoryWalker(self.parameters, self.logger)
 
-            if os.path.isfile(path):
-                self.process_file(path)
-            else:
-                self.process_directory(path)
+
+    def process_directories(self):
+        """
+        Process all directories, generate the found comments.
+        """
+        directory_walker = self.create_walker()
+
+        for path, entry in directory_walker.walk(self.parameters.directories):
+            yield from self.process_file(path, entry)
+
+        self.summary.total_directories += directory_walker.statistics.directories
+        self.logger.verbose('Directory traversal: {0}'.format(
+                directory_walker.statistics))
 
 
     def is_file_extension_allowed(self, path):
@@ -246,22 +617,14 @@ class CommentsSearch(object):
         return False
 
 
-    def is_file_binary(self, path):
+    def is_file_binary(self, data):
         """
-        Return true if the input file is considered as binary, otherwise false.
-        Note the return value may be incorrect, only beginning of the file is
-        examined for '\0' character.
+        Return true if the content of the input file is considered as binary,
+        otherwise false. Note the return value may be incorrect, only
+        beginning of the file is examined for '\0' character.
         """
         const_chunk_size = 1024
 
-        try:
-            with open(path, 'rb') as input_file:
-                chunk = input_file.read(const_chunk_size)
-        except IOError as io_exception:
-            self.logger.warn('Reading from file failed: {0}, {1}'.
-                    format(path, io_exception))
-            return True
-
         # If the beginning of the file contains a null byte, guess that the
         # file is binary. GNU grep works similarly, see file_is_binary()
         # in its source codes.
@@ -272,88 +635,707 @@ class CommentsSearch(object):
         #
         # Note UTF-16 encoded text files will be clasified as binary,
         # is it correct/incorrect?
-        # 0 means '\0' here
-        return 0 in chunk
+        return data.find(b'\0', 0, const_chunk_size) != -1
+
+
+    def read_file(self, path, entry=None):
+        """
+        Return the raw content of the input file or None if reading failed.
+        Large files are memory mapped, they are copied to the memory only
+        if they have to be decoded. The returned mmap object must be closed.
+        The entry is the optional os.DirEntry of the file from the traversal.
+        """
+        try:
+            with open(path, 'rb') as input_file:
+                size = os.fstat(input_file.fileno()).st_size
+
+                if size >= self.MMAP_SIZE:
+                    return mmap.mmap(input_file.fileno(), 0,
+                            access=mmap.ACCESS_READ)
+
+                return input_file.read()
+        except (IOError, ValueError) as exception:
+            # ValueError: the file was truncated before it was mapped
+            self.logger.warn('Reading from file failed: {0}, {1}'.
+                    format(path, exception))
+            self.count_skipped('read error')
+            return None
+
+
+    def decode(self, data):
+        """
+        Decode the raw content of the input file, the new lines are translated
+        to '\n' like in the text mode of the files.
+        """
+        buffer = codecs.decode(data, self.parameters.encoding)
+
+        if '\r' in buffer:
+            buffer = buffer.replace('\r\n', '\n').replace('\r', '\n')
+
+        return buffer
+
+
+    def process_file(self, path, entry=None):
+        '''
+        Process all lines of the input file and return list of the found
+        comments. The entry is the optional os.DirEntry of the file from
+        the traversal. The results of a timed out file are not stored.
+        '''
+        try:
+            if not self.has_known_results():
+                return self.add_file_result(path, self.search_file(path, entry))
+
+            signature, known = self.lookup_file(path, entry)
+            if known is not None:
+                comments = known[0]
+            else:
+                comments = self.search_file(path, entry)
+                self.store_results(path, signature, comments)
+        except exceptions.TodosTimeoutError:
+            return self.add_timed_out(path)
+
+        return self.add_file_result(path, comments)
+
+
+    def has_known_results(self):
+        '''
+        Return true if the results of some files may be known without
+        searching them, otherwise false.
+        '''
+        return self.cache is not None or self.baseline is not None or \
+                self.index is not None
+
+
+    def lookup_file(self, path, entry):
+        '''
+        Return (signature, known) tuple for the file. The known item is
+        a (comments,) tuple if the results are known without searching
+        the file, otherwise None. The signature is the stat signature to store
+        the results to the cache or None.
+        '''
+        if self.is_file_skipped(path):
+            return None, (None,)
+
+        if self.baseline is not None:
+            hit, results = self.baseline.lookup(path)
+            if hit:
+                self.logger.verbose('Parsing file (baseline): {0}'.
+                        format(path))
+                return None, (self.create_comments(path, results),)
+
+        if self.cache is None and self.index is None:
+            return None, None
+
+        signature = cache.get_signature(path, entry)
+
+        if self.index is not None:
+            hit, results = self.index.lookup(path, signature)
+            if hit:
+                self.logger.verbose('Parsing file (indexed): {0}'.format(path))
+                return signature, (self.create_comments(path, results),)
+
+        if self.cache is not None:
+            hit, comments = self.lookup_cache(path, signature)
+            if hit:
+                if self.index is not None:
+                    self.store_index(path, signature, comments)
+                return signature, (comments,)
 
+        return signature, None
 
-    def process_file(self, path):
+
+    def lookup_cache(self, path, signature):
+        '''
+        Return (True, comments) if the results of the file are in the cache,
+        otherwise (False, None).
+        '''
+        hit, results = self.cache.lookup(path, signature)
+        if not hit:
+            return False, None
+
+        self.logger.verbose('Parsing file (cached): {0}'.format(path))
+
+        return True, self.create_comments(path, results)
+
+
+    def create_comments(self, path, results):
+        '''
+        Return list of the comments of the file created from the (str_pattern,
+        position, lines) tuples or None if the results are None.
+        '''
+        if results is None:
+            return None
+
+        return [Comment(str_pattern, path, position, lines,
+                self.get_before(position - 1))
+                for str_pattern, position, lines in results]
+
+
+    def get_before(self, number):
         '''
-        Process all lines of the input file.
+        Return the number of the lines before the line with the zero-based
+        number that are present in the context.
+        '''
+        return min(self.parameters.before_context, number)
+
+
+    def get_results(self, comments):
+        '''
+        Return list of the (str_pattern, position, lines) tuples of the comments
+        or None if the comments are None.
+        '''
+        if comments is None:
+            return None
+
+        return [(comment.str_pattern, comment.position, comment.lines)
+                for comment in comments]
+
+
+    def store_results(self, path, signature, comments):
+        '''
+        Store the comments found in the file to the cache and to the index.
+        '''
+        if self.cache is not None:
+            self.store_cache(path, signature, comments)
+
+        if self.index is not None:
+            self.store_index(path, signature, comments)
+
+
+    def store_cache(self, path, signature, comments):
+        '''
+        Store the comments found in the file to the cache.
+        '''
+        self.cache.store(path, signature, self.get_results(comments))
+
+
+    def store_index(self, path, signature, comments):
+        '''
+        Store the comments found in the file to the index.
+        '''
+        self.index.store(path, signature, self.get_results(comments))
+
+
+    def is_file_skipped(self, path):
+        '''
+        Return true if the file should be skipped according to its path,
+        otherwise false.
         '''
         if not self.is_file_extension_allowed(path):
             self.logger.verbose('Skipping file (file extension): {0}'.
                     format(path))
-            return
+            self.count_skipped('file extension')
+            return True
 
         if self.is_output_file(path):
             self.logger.verbose('Skipping file (output file): {0}'.format(path))
-            return
+            self.count_skipped('output file')
+            return True
 
-        if self.is_file_binary(path):
-            self.logger.verbose('Skipping file (binary file): {0}'.format(path))
-            return
+        return False
 
-        self.logger.verbose('Parsing file: {0}'.format(path))
+
+    def scan_file(self, path, entry=None):
+        '''
+        Search comments in all lines of the input file. Return list of the found
+        comments or None if the file was skipped. The file is read only once
+        and it is decoded only if it may contain a comment. The state of
+        the object is not modified so the method can be executed in a worker
+        process. The entry is the optional os.DirEntry of the file.
+        '''
+        if self.is_file_skipped(path):
+            return None
+
+        data = self.read_file(path, entry)
+        if data is None:
+            return None
 
         try:
-            with open(path, mode='r', encoding=self.parameters.encoding) as input_file:
-                lines = input_file.readlines()
+            return self.scan_data(path, data)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
 
-            self.summary.total_files += 1
-            self.summary.per_file[path] = 0
 
-            position = 0
-            for line in lines:
-                position += 1
-                self.process_line(path, position, line, lines)
-        except IOError as io_exception:
-            self.logger.warn('Reading from file failed: {0}, {1}'.
-                    format(path, io_exception))
+    def scan_data(self, path, data):
+        '''
+        Search comments in the raw content of the input file. Return list
+        of the found comments or None if the file was skipped.
+        '''
+        known = self.check_data(path, data)
+        if known is not None:
+            return known[0]
+
+        return self.search_data(path, data)
+
+
+    def check_data(self, path, data):
+        '''
+        Return (comments,) tuple if the results are known from a quick check
+        of the raw content of the input file, the comments are None for
+        a binary file and empty list for a file without any candidate.
+        Return None if the file must be searched.
+        '''
+        if self.stats is not None:
+            self.stats.counters['files read'] += 1
+            self.stats.counters['bytes read'] += len(data)
+
+        if self.is_file_binary(data):
+            self.logger.verbose('Skipping file (binary file): {0}'.
+                    format(path))
+            self.count_skipped('binary file')
+            return (None,)
+
+        if not self.prefilter.is_candidate(data):
+            self.logger.verbose('Parsing file (no candidate): {0}'.
+                    format(path))
+            if self.stats is not None:
+                self.stats.counters['files without candidate'] += 1
+            return ([],)
+
+        return None
+
+
+    def search_data(self, path, data):
+        '''
+        Decode and search the raw content of the input file that passed
+        check_data(). Return list of the found comments or None if the file
+        was skipped.
+        '''
+        if self.guard is not None:
+            return self.search_guarded(path, data)
+
+        self.logger.verbose('Parsing file: {0}'.format(path))
+
+        try:
+            if len(data) >= self.STREAM_SIZE:
+                return self.scan_stream(path, data)
+
+            buffer = self.decode(data)
         except UnicodeError as unicode_exception:
             self.logger.warn('Skipping file (unicode error): {0}, {1}'.
                     format(path, unicode_exception))
+            self.count_skipped('unicode error')
+            return None
+
+        return self.scan_buffer(path, buffer)
+
+
+    def search_guarded(self, path, data):
+        '''
+        Search the raw content of the input file in the worker process
+        of the guard. Return list of the found comments or None if the file
+        was skipped, raise TodosTimeoutError if the time budget was exceeded.
+        '''
+        results, statistics = self.guard.search(path, data)
+
+        if statistics is not None:
+            self.stats.add(statistics)
+
+        return self.create_comments(path, results)
+
+
+    def search_file(self, path, entry=None, blob_id=None):
+        '''
+        Search comments in the input file like scan_file(), but reuse
+        the results of a hardlink of the file or of a file with the same
+        content that was already searched. The hardlinks are recognised
+        by stat, the file is not read. The blob id is the hash of the content
+        if it is known from git, otherwise the content is hashed.
+        '''
+        if self.dedup is None:
+            return self.scan_file(path, entry)
+
+        if self.is_file_skipped(path):
+            return None
+
+        size, keys = self.get_dedup_keys(path, entry, blob_id)
+
+        hit, results = self.lookup_dedup(path, size, keys)
+        if hit:
+            return self.create_comments(path, results)
+
+        data = self.read_file(path, entry)
+        if data is None:
+            return None
+
+        try:
+            link_key, content_key = keys
+
+            # The quick checks are cheaper than the hash
+            known = self.check_data(path, data)
+            if known is not None:
+                comments = known[0]
+            else:
+                hit = False
+                if content_key is None:
+                    content_key = self.get_content_key(path,
+                            dedup.get_blob_id(data))
+                    hit, results = self.lookup_dedup(path, len(data),
+                            (None, content_key))
+
+                if hit:
+                    comments = self.create_comments(path, results)
+                else:
+                    comments = self.search_data(path, data)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+        self.store_dedup((link_key, content_key), comments)
+
+        return comments
+
+
+    def get_dedup_keys(self, path, entry=None, blob_id=None):
+        '''
+        Return (size, (link_key, content_key)) tuple of the file for
+        the content table. The keys are None if they are not known without
+        reading the file.
+        '''
+        if blob_id is None and self.blobs is not None:
+            blob_id = self.blobs.get(path)
+
+        content_key = None
+        if blob_id is not None:
+            content_key = self.get_content_key(path, blob_id)
+
+        try:
+            if entry is not None:
+                stat = entry.stat()
+            else:
+                stat = os.stat(path)
+        except OSError:
+            return 0, (None, content_key)
+
+        link_key = None
+        if stat.st_nlink > 1:
+            link_key = dedup.get_link_key(stat, self.get_syntax(path))
+
+        return stat.st_size, (link_key, content_key)
+
+
+    def get_content_key(self, path, blob_id):
+        '''
+        Return the key of the file with the content in the content table.
+        '''
+        return (blob_id, self.get_syntax(path))
+
+
+    def lookup_dedup(self, path, size, keys):
+        '''
+        Return (True, results) if the results of the file with the (link_key,
+        content_key) keys are in the content table, otherwise (False, None).
+        '''
+        link_key, content_key = keys
+
+        if link_key is not None:
+            hit, results = self.dedup.lookup_link(link_key, size)
+            if hit:
+                self.logger.verbose('Parsing file (hardlink): {0}'.
+                        format(path))
+                return True, results
+
+        if content_key is not None:
+            hit, results = self.dedup.lookup_content(content_key, size)
+            if hit:
+                self.logger.verbose('Parsing file (duplicate): {0}'.
+                        format(path))
+                return True, results
+
+        return False, None
+
+
+    def store_dedup(self, keys, comments):
+        '''
+        Store the comments found in the file to the content table.
+        '''
+        link_key, content_key = keys
+        results = self.get_results(comments)
+
+        if link_key is not None:
+            self.dedup.store_link(link_key, results)
+
+        if content_key is not None:
+            self.dedup.store_content(content_key, results)
+
+
+    def add_file_result(self, path, comments):
+        '''
+        Update the summary by the comments found in the input file and return
+        them. A skipped file is not counted, its comments are None.
+        '''
+        if comments is None:
+            return []
+
+        self.summary.total_files += 1
+
+        if comments:
+            self.summary.per_file[path] = len(comments)
+
+        for comment in comments:
+            self.summary.per_pattern[comment.str_pattern] += 1
+
+        return comments
+
+
+    def add_timed_out(self, path):
+        '''
+        Record the file whose search exceeded the time budget in the summary
+        and return empty list, the comments of the file are unknown.
+        '''
+        self.logger.warn('Skipping file (timed out): {0}'.format(path))
+        self.summary.timed_out.append(path)
+        self.count_skipped('timed out')
+
+        return []
+
+
+    def create_automaton(self):
+        '''
+        Return the automaton of the comment markers with COMMENT_MASK and of
+        the required literals with the masks of their patterns. The folded
+        literals are not added, a line must be folded to find them.
+        '''
+        keywords = [(comment, self.COMMENT_MASK)
+                for comment in self.parameters.comments]
+
+        if self.literals.literals is not None and \
+                not self.parameters.ignore_case:
+            for index, literal in enumerate(self.literals.literals):
+                keywords.append((literal, self.get_pattern_mask(index)))
+
+        return automaton.Automaton(keywords)
+
+
+    def get_pattern_mask(self, index):
+        '''
+        Return the mask of the pattern with the index in the automaton.
+        '''
+        return self.COMMENT_MASK << (index + 1)
 
 
     def contains_comment(self, line):
         """
         Return true if the input line contains a comment, otherwise false.
         """
-        for comment in self.parameters.comments:
-            if line.count(comment) > 0:
-                return True
-
-        return False
+        return bool(self.automaton.scan(line) & self.COMMENT_MASK)
 
 
-    def process_line(self, path, position, line, lines):
+    def match_line(self, line):
         '''
         Process the input line, search comment with one of the specified
-        patterns.
+        patterns. Return the matching pattern or None.
+        '''
+        found = self.automaton.scan(line)
+        if not found & self.COMMENT_MASK:
+            return None
+
+        return self.match_found(line, found)
+
+
+    def match_spans(self, spans, line_index, number):
+        '''
+        Search the patterns only in the comments found by the lexer
+        in the line. Return the matching pattern or None.
+        '''
+        text = spans.get_text(line_index.starts[number],
+                line_index.get_line_end(number))
+        if text is None:
+            return None
+
+        return self.match_found(text, self.automaton.scan(text))
+
+
+    def match_found(self, text, found):
+        '''
+        Search the patterns in the text, the found mask is the result
+        of the automaton. Only the patterns whose required literals were
+        found are searched. Return the matching pattern or None.
+        '''
+        if self.literals.atoms is None:
+            return self.matcher.search(text)
+
+        if self.parameters.ignore_case:
+            if not self.literals.is_candidate(text):
+                return None
+            return self.matcher.search(text)
+
+        # The bit 0 is COMMENT_MASK, the patterns follow it
+        candidates = found >> 1
+        if not candidates:
+            return None
+
+        return self.matcher.search(text, candidates)
+
+
+    def get_syntax(self, path):
+        '''
+        Return the syntax of the file for the lexer or None if the comments
+        are detected by the comment characters.
+        '''
+        if not self.parameters.lexer:
+            return None
+
+        return lexer.get_syntax(path)
+
+
+    def scan_buffer(self, path, buffer):
+        '''
+        Search comments in the content of the input file. Return list of the
+        found comments.
+        '''
+        search_candidate = self.create_candidate_search(buffer)
+
+        # Build the index lazily, most files contain no match at all
+        if search_candidate is not None and search_candidate(0) == -1:
+            return []
+
+        line_index = LineIndex(buffer)
+
+        spans = None
+        syntax = self.get_syntax(path)
+        if syntax is not None:
+            spans = lexer.CommentSpans(buffer, syntax)
+
+        comments = []
+
+        for number, pattern in self.find_matches(line_index, spans,
+                search_candidate):
+            before = self.get_before(number)
+            comments.append(Comment(pattern.str_pattern, path, number + 1,
+                    line_index.get_lines(number - before,
+                            before + self.parameters.num_lines), before))
+
+        return comments
+
+
+    def scan_stream(self, path, data):
+        '''
+        Search comments in a large file block by block. Only the current
+        block, the last lines for the before-context and the comments
+        waiting for the rest of the after-context are kept in memory,
+        the decoded content of the whole file never is. Return list
+        of the found comments.
         '''
-        if not self.contains_comment(line):
+        syntax = self.get_syntax(path)
+        state = None
+
+        previous = collections.deque(maxlen=self.parameters.before_context)
+        waiting = []
+        comments = []
+        first = 0
+
+        for block in stream.iterate_blocks(data, self.parameters.encoding,
+                self.CHUNK_SIZE):
+            line_index = LineIndex(block, first)
+
+            spans = None
+            if syntax is not None:
+                spans = lexer.CommentSpans(block, syntax, state)
+                state = spans.state
+
+            # The after-context continues in this block
+            for comment, missing in waiting:
+                comment.lines.extend(line_index.get_lines(0, missing))
+            waiting = [(comment, missing - line_index.count)
+                    for comment, missing in waiting
+                    if missing > line_index.count]
+
+            for number, pattern in self.find_matches(line_index, spans,
+                    self.create_candidate_search(block)):
+                before = self.get_before(first + number)
+                lines = line_index.get_lines(number, self.parameters.num_lines)
+
+                if number < before:
+                    # The before-context starts in the previous blocks
+                    lines = list(previous)[len(previous) - before + number:] + \
+                            line_index.get_lines(0, number) + lines
+                else:
+                    lines = line_index.get_lines(number - before, before) + \
+                            lines
+
+                comment = Comment(pattern.str_pattern, path,
+                        first + number + 1, lines, before)
+                comments.append(comment)
+
+                missing = self.parameters.num_lines - \
+                        (line_index.count - number)
+                if missing > 0:
+                    waiting.append((comment, missing))
+
+            previous.extend(line_index.get_lines(
+                    max(0, line_index.count - previous.maxlen),
+                    previous.maxlen))
+            first += line_index.count
+
+        return comments
+
+
+    def create_candidate_search(self, buffer):
+        '''
+        Return function that returns offset of the first possible match
+        in the buffer at or after the position or -1 if there is none.
+        Return None if all lines of the buffer must be examined.
+        '''
+        # The required literals are found by str.find, much faster than
+        # by the combined regular expression
+        scanner = self.literals.create_scanner(buffer)
+        if scanner is not None:
+            return scanner.search_candidate
+
+        if self.matcher.buffer_expression is not None:
+            return functools.partial(self.matcher.search_candidate, buffer)
+
+        return None
+
+
+    def find_matches(self, line_index, spans, search_candidate):
+        '''
+        Generate (number, pattern) tuples of the matching lines with
+        the zero-based numbers. Only the lines with a candidate are examined
+        if the candidate search is specified. The patterns are searched only
+        in the comments found by the lexer if the spans are specified.
+        '''
+        if search_candidate is None:
+            for number in range(line_index.count):
+                pattern = self.match_number(line_index, number, spans)
+                if pattern is not None:
+                    yield number, pattern
             return
 
-        for pattern in self.parameters.compiled_patterns:
-            if pattern.re_pattern.search(line):
-                lines_to_store = self.get_lines(lines, position-1,
-                        self.parameters.num_lines)
-                self.comments.append(Comment(pattern.str_pattern, path,
-                        position, lines_to_store))
-                self.summary.per_pattern[pattern.str_pattern] += 1
-                self.summary.per_file[path] += 1
+        last = -1
+        pos = search_candidate(0)
+        while pos != -1:
+            if spans is not None:
+                # Skip the candidates outside of the comments, e.g. in strings
+                next_pos = spans.get_next(pos)
+                if next_pos == -1:
+                    break
+                if next_pos != pos:
+                    pos = search_candidate(next_pos)
+                    continue
+
+            number = line_index.get_line_number(pos)
+            if number >= line_index.count or number <= last:
+                # Empty match at the end of the buffer, no line is there or
+                # it is the last line without a new line examined before
                 break
+            last = number
+
+            pattern = self.match_number(line_index, number, spans)
+            if pattern is not None:
+                yield number, pattern
 
+            pos = search_candidate(line_index.get_line_end(number))
 
-    def get_lines(self, lines, position, count):
+
+    def match_number(self, line_index, number, spans):
         '''
-        Return content of the specified number of lines.
+        Process the line with the specified zero-based number. Return
+        the matching pattern or None.
         '''
-        last_line = position+count
-        if last_line >= len(lines):
-            last_line = len(lines)
-
-        result = []
-        for i in range(position, last_line):
-            result.append(lines[i].rstrip())
+        if spans is None:
+            return self.match_line(line_index.get_line(number))
 
-        return result
+        return self.match_spans(spans, line_index, number)
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Long-running server with the search results kept in memory and its client.
+
+The client connects to the Unix socket of the server and sends one request,
+a JSON object on a single line:
+
+    {"format": "txt", "path": "/abs/prefix", "pattern": "\\\\bTODO\\\\b"}
+
+All keys are optional, the path and the pattern filter the comments. The server
+answers with a JSON status line, {"status": "ok"} or {"status": "error",
+"message": "..."}, followed by the output in the requested format encoded
+in UTF-8 and closes the connection.
+"""
+
+
+###############################################################################
+####
+
+import copy
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+
+from . import cache
+from . import exceptions
+from . import output_json
+from . import output_txt
+from . import output_xml
+from . import search
+
+
+###############################################################################
+####
+
+FORMATTERS = {
+    'txt': output_txt.TxtFormatter,
+    'xml': output_xml.XmlFormatter,
+    'json': output_json.JsonFormatter,
+}
+# """ The output formats supported by the server. """
+
+ENCODING = 'utf-8'
+# """ Encoding of the messages and of the output. """
+
+ERRORS = 'surrogateescape'
+# """ Undecodable characters of the paths are transferred unchanged. """
+
+MAX_REQUEST = 64 * 1024
+# """ Maximal length of a request line. """
+
+
+###############################################################################
+####
+
+class IndexedCommentsSearch(search.CommentsSearch):
+    """
+    Search that keeps the results of all files in memory. Each refresh
+    walks the directories again, but only the files whose stat signature
+    changed are searched. The queries are answered from the last complete
+    snapshot, they never wait for a running refresh.
+    """
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor, the persistent cache, the baseline, the index,
+        the content table, the statistics and the profiler are not used.
+        """
+        parameters = copy.copy(parameters)
+        parameters.cache_dir = None
+        parameters.baseline = None
+        parameters.index = None
+        parameters.dedup = False
+        parameters.stats = False
+        parameters.profile = False
+
+        search.CommentsSearch.__init__(self, parameters, logger)
+
+        self.snapshot = ({}, 0)
+        # """ The (files, total_directories) tuple of the last refresh. The files
+        # map the paths to (signature, abs_path, comments) tuples in the order
+        # of traversal, the comments are None for a skipped file. The tuple
+        # is replaced at once, so it can be read without locking. """
+
+        self.files = None
+        # """ The files of the running refresh. """
+
+        self.start_ns = 0
+        # """ The time when the running refresh started. """
+
+        self.modified = False
+        # """ Flag that the running refresh searched a file. """
+
+
+    def refresh(self):
+        '''
+        Walk the directories, search the new and the changed files
+        and replace the snapshot. Return true if a file was searched
+        or removed, otherwise false.
+        '''
+        previous = self.snapshot[0]
+
+        self.files = {}
+        self.modified = False
+        self.start_ns = time.time_ns()
+        self.summary = search.Summary(self.parameters)
+
+        for comment in self.process_directories():
+            pass
+
+        modified = self.modified or len(self.files) != len(previous)
+
+        self.snapshot = (self.files, self.summary.total_directories)
+        self.files = None
+
+        return modified
+
+
+    def process_file(self, path, entry=None):
+        '''
+        Return the comments of the file, search it only if its signature
+        differs from the previous refresh.
+        '''
+        if self.is_file_skipped(path):
+            return []
+
+        signature = cache.get_signature(path, entry)
+
+        known = self.snapshot[0].get(path)
+        if signature is not None and known is not None and \
+                known[0] == signature:
+            abs_path, comments = known[1], known[2]
+        else:
+            abs_path, comments = os.path.abspath(path), self.scan_file(path)
+            self.modified = True
+
+        # A racy file may change again without changing its signature
+        racy_ns = self.start_ns - cache.ResultCache.RACY_INTERVAL_NS
+        if signature is not None and signature[1] >= racy_ns:
+            signature = None
+
+        self.files[path] = (signature, abs_path, comments)
+
+        return self.add_file_result(path, comments)
+
+
+    def query(self, path=None, pattern=None):
+        '''
+        Return (comments, summary) tuple with the comments from the last
+        snapshot. Only the files under the absolute path prefix and only
+        the comments of the pattern are returned if they are specified.
+        '''
+        if pattern is not None and pattern not in self.parameters.patterns:
+            raise exceptions.TodosFatalError('Pattern not searched: {0}'.
+                    format(pattern))
+
+        files, total_directories = self.snapshot
+
+        summary = search.Summary(self.parameters)
+        summary.total_directories = total_directories
+        comments = []
+
+        directory = None
+        if path is not None:
+            directory = os.path.join(path, '')
+
+        for file_path, (signature, abs_path, file_comments) in files.items():
+            if file_comments is None:
+                continue
+
+            if path is not None and abs_path != path and \
+                    not abs_path.startswith(directory):
+                continue
+
+            summary.total_files += 1
+
+            if pattern is not None:
+                file_comments = [comment for comment in file_comments
+                        if comment.str_pattern == pattern]
+
+            if file_comments:
+                summary.per_file[file_path] = len(file_comments)
+
+            for comment in file_comments:
+                summary.per_pattern[comment.str_pattern] += 1
+
+            comments.extend(file_comments)
+
+        return comments, summary
+
+
+    def render(self, out_format, comments, summary):
+        '''
+        Return the comments and the summary formatted in the output format.
+        '''
+        formatter = FORMATTERS[out_format](self.parameters)
+        out_stream = io.StringIO()
+
+        formatter.write_header(out_stream)
+        for comment in comments:
+            formatter.write_comment(out_stream, comment)
+        formatter.write_footer(out_stream, summary)
+
+        return out_stream.getvalue()
+
+
+###############################################################################
+####
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    """
+    Handler of one client connection, it answers one query.
+    """
+
+    def handle(self):
+        """
+        Read the request, send the status line and the output.
+        """
+        try:
+            output = self.answer(self.rfile.readline(MAX_REQUEST))
+            status = {'status': 'ok'}
+        except exceptions.TodosFatalError as todos_exception:
+            output = ''
+            status = {'status': 'error', 'message': todos_exception.value}
+
+        try:
+            self.wfile.write(json.dumps(status).encode(ENCODING) + b'\n')
+            self.wfile.write(output.encode(ENCODING, ERRORS))
+        except (BrokenPipeError, ConnectionResetError):
+            # The client disconnected, e.g. the check of a running server
+            pass
+
+
+    def answer(self, line):
+        """
+        Return the output for the request line.
+        """
+        try:
+            request = json.loads(line.decode(ENCODING, ERRORS))
+        except ValueError as value_exception:
+            raise exceptions.TodosFatalError('Invalid request: {0}'.
+                    format(value_exception))
+
+        if not isinstance(request, dict):
+            raise exceptions.TodosFatalError('Invalid request: {0}'.
+                    format(request))
+
+        for key in ['format', 'path', 'pattern']:
+            value = request.get(key)
+            if value is not None and not isinstance(value, str):
+                raise exceptions.TodosFatalError('Invalid request: {0}'.
+                        format(request))
+
+        out_format = request.get('format', 'txt')
+        if out_format not in FORMATTERS:
+            raise exceptions.TodosFatalError('Unknown format: {0}'.
+                    format(out_format))
+
+        comments_search = self.server.comments_search
+        comments, summary = comments_search.query(request.get('path'),
+                request.get('pattern'))
+
+        return comments_search.render(out_format, comments, summary)
+
+
+###############################################################################
+####
+
+class CommentsServer(socketserver.ThreadingMixIn,
+        socketserver.UnixStreamServer):
+    """
+    Server answering the queries on a Unix socket while the search results
+    are refreshed in a background thread.
+    """
+
+    daemon_threads = True
+
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor, search all files and bind the socket.
+        """
+        self.parameters = parameters
+        # """ The input parameters. """
+
+        self.logger = logger
+        # """ The logger to output messages. """
+
+        self.comments_search = IndexedCommentsSearch(parameters, logger)
+        # """ The search with the results in memory. """
+
+        self.stopped = threading.Event()
+        # """ Signal to stop the refresh thread. """
+
+        start = time.perf_counter()
+        self.comments_search.refresh()
+        self.logger.verbose('Initial search: {0:.3f} s'.format(
+                time.perf_counter() - start))
+
+        remove_stale_socket(parameters.socket)
+
+        try:
+            socketserver.UnixStreamServer.__init__(self, parameters.socket,
+                    QueryHandler)
+        except OSError as os_exception:
+            raise exceptions.TodosFatalError('Binding socket failed: {0}, {1}'.
+                    format(parameters.socket, os_exception))
+
+        self.refresh_thread = threading.Thread(target=self.refresh_loop,
+                daemon=True)
+        # """ The thread refreshing the search results. """
+
+
+    def refresh_loop(self):
+        """
+        Refresh the search results periodically until the server is stopped.
+        A failed refresh keeps the previous snapshot.
+        """
+        while not self.stopped.wait(self.parameters.refresh_interval):
+            try:
+                self.comments_search.refresh()
+            except exceptions.TodosFatalError as todos_exception:
+                self.logger.warn('Refresh failed: {0}'.format(
+                        todos_exception.value))
+            except Exception as exception:
+                # The thread must not die, the results would be never updated
+                self.logger.warn('Refresh failed: {0}: {1}'.format(
+                        type(exception).__name__, exception))
+
+
+    def run(self):
+        """
+        Serve the queries until the process is interrupted or terminated.
+        """
+        self.refresh_thread.start()
+        self.logger.verbose('Serving on: {0}'.format(self.parameters.socket))
+
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stopped.set()
+            self.server_close()
+
+
+    def server_close(self):
+        """
+        Close and remove the socket.
+        """
+        socketserver.UnixStreamServer.server_close(self)
+
+        try:
+            os.unlink(self.parameters.socket)
+        except OSError:
+            pass
+
+
+###############################################################################
+####
+
+def check_unix_sockets():
+    """
+    Raise fatal error if the platform doesn't support Unix sockets.
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        raise exceptions.TodosFatalError(
+                'Unix sockets are not supported on this platform')
+
+
+def remove_stale_socket(path):
+    """
+    Remove the socket left by a server that doesn't run anymore. Raise fatal
+    error if a server is still listening on it.
+    """
+    if not os.path.exists(path):
+        return
+
+    client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client_socket.connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    finally:
+        client_socket.close()
+
+    raise exceptions.TodosFatalError('Server is already running: {0}'.
+            format(path))
+
+
+def serve(parameters, logger):
+    """
+    Run the server, it exits on SIGINT or SIGTERM.
+    """
+    check_unix_sockets()
+
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    CommentsServer(parameters, logger).run()
+
+
+def query(parameters, out_stream):
+    """
+    Send the query to the server and write its output to the binary stream.
+    """
+    check_unix_sockets()
+
+    path = parameters.query_path
+    if path is not None:
+        path = os.path.abspath(path)
+
+    request = {
+        'format': parameters.query_format,
+        'path': path,
+        'pattern': parameters.query_pattern,
+    }
+
+    client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            client_socket.connect(parameters.socket)
+            client_socket.sendall(json.dumps(request).encode(ENCODING, ERRORS) +
+                    b'\n')
+
+            with client_socket.makefile('rb') as in_stream:
+                status = json.loads(in_stream.readline().decode(ENCODING))
+
+                if status.get('status') != 'ok':
+                    raise exceptions.TodosFatalError('Query failed: {0}'.
+                            format(status.get('message')))
+
+                while True:
+                    data = in_stream.read(io.DEFAULT_BUFFER_SIZE)
+                    if not data:
+                        break
+                    out_stream.write(data)
+        except BrokenPipeError:
+            # The reader of the output exited
+            raise
+        except (OSError, ValueError) as exception:
+            raise exceptions.TodosFatalError('Query failed: {0}, {1}'.
+                    format(parameters.socket, exception))
+    finally:
+        client_socket.close()
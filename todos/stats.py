@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Instrumentation of the search, the time spent in its phases and the counters
+of the processed data.
+"""
+
+
+###############################################################################
+####
+
+import collections
+import json
+import time
+
+from . import version
+
+
+###############################################################################
+####
+
+class ScanStatistics(object):
+    """
+    Container to store the wall and CPU time and the number of calls of each
+    phase of the search and the counters of the processed data. The phases
+    are the methods wrapped by the timers, the methods are wrapped only
+    if the statistics are enabled, so the disabled statistics cost nothing.
+    The time of a phase includes the nested phases. The statistics of the
+    worker processes are added to the ones of the main process, their time
+    is the sum over all workers.
+    """
+
+    def __init__(self):
+        """
+        Class constructor, initialize all members to zero.
+        """
+        self.wall = collections.Counter()
+        # """ The wall time of the phases in seconds. """
+
+        self.cpu = collections.Counter()
+        # """ The CPU time of the phases in seconds. """
+
+        self.calls = collections.Counter()
+        # """ The number of the calls of the phases. """
+
+        self.counters = collections.Counter()
+        # """ The counters of the processed data, e.g. the bytes read. """
+
+        self.skipped = collections.Counter()
+        # """ The number of the skipped files and directories per reason. """
+
+
+    def record(self, phase, wall, cpu, calls=1):
+        """
+        Add the wall and CPU time of one call of the phase.
+        """
+        self.wall[phase] += wall
+        self.cpu[phase] += cpu
+        self.calls[phase] += calls
+
+
+    def time_function(self, phase, function):
+        """
+        Return the function wrapped by a timer of the phase.
+        """
+        perf_counter = time.perf_counter
+        process_time = time.process_time
+
+        def timed(*args, **kwargs):
+            wall = perf_counter()
+            cpu = process_time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(phase, perf_counter() - wall,
+                        process_time() - cpu)
+
+        return timed
+
+
+    def time_generator(self, phase, function):
+        """
+        Return the generator function wrapped by a timer of the phase. Only
+        the time spent in the generator is measured, not the time spent
+        by the consumer of the generated items.
+        """
+        perf_counter = time.perf_counter
+        process_time = time.process_time
+
+        def timed(*args, **kwargs):
+            generator = function(*args, **kwargs)
+            calls = 1
+
+            try:
+                while True:
+                    wall = perf_counter()
+                    cpu = process_time()
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        return
+                    finally:
+                        self.record(phase, perf_counter() - wall,
+                                process_time() - cpu, calls)
+                        calls = 0
+
+                    yield item
+            finally:
+                generator.close()
+
+        return timed
+
+
+    def count_calls(self, counter, function):
+        """
+        Return the function wrapped by an increment of the counter.
+        """
+        counters = self.counters
+
+        def counted(*args, **kwargs):
+            counters[counter] += 1
+            return function(*args, **kwargs)
+
+        return counted
+
+
+    def time_walker(self, directory_walker):
+        """
+        Wrap the traversal of the walker by a timer, the suppressed
+        and the ignored entries are counted as skipped at its end.
+        """
+        walk = self.time_generator('walk', directory_walker.walk)
+
+        def timed(*args, **kwargs):
+            yield from walk(*args, **kwargs)
+
+            statistics = directory_walker.statistics
+            if statistics.suppressed:
+                self.skipped['suppressed directory'] += statistics.suppressed
+            if statistics.ignored:
+                self.skipped['ignored entry'] += statistics.ignored
+
+        directory_walker.walk = timed
+
+
+    def add(self, other):
+        """
+        Add the statistics of a worker process.
+        """
+        self.wall.update(other.wall)
+        self.cpu.update(other.cpu)
+        self.calls.update(other.calls)
+        self.counters.update(other.counters)
+        self.skipped.update(other.skipped)
+
+
+    def take(self):
+        """
+        Return copy of the statistics and reset them to zero.
+        """
+        statistics = ScanStatistics()
+        statistics.add(self)
+
+        for counter in [self.wall, self.cpu, self.calls, self.counters,
+                self.skipped]:
+            counter.clear()
+
+        return statistics
+
+
+    def get_phases(self):
+        """
+        Return the phases sorted by their wall time, the longest one first.
+        """
+        return sorted(self.calls, key=lambda phase: (-self.wall[phase], phase))
+
+
+    def format_table(self):
+        """
+        Return the statistics formatted as a text table.
+        """
+        lines = ['{0:<32} {1:>10} {2:>12} {3:>12}'.format('Phase', 'Calls',
+                'Wall [s]', 'CPU [s]')]
+
+        for phase in self.get_phases():
+            lines.append('{0:<32} {1:>10} {2:>12.3f} {3:>12.3f}'.format(phase,
+                    self.calls[phase], self.wall[phase], self.cpu[phase]))
+
+        lines.append('')
+        lines.append('{0:<32} {1:>10}'.format('Counter', 'Value'))
+
+        for counter, value in sorted(self.counters.items()):
+            lines.append('{0:<32} {1:>10}'.format(counter, value))
+
+        for reason, value in sorted(self.skipped.items()):
+            lines.append('{0:<32} {1:>10}'.format('skipped ' + reason, value))
+
+        return '\n'.join(lines) + '\n'
+
+
+    def to_json(self):
+        """
+        Return the statistics in the form of the JSON document.
+        """
+        return {
+            'version': version.TodosVersion.VERSION,
+            'phases': dict((phase, {
+                'calls': self.calls[phase],
+                'wall': round(self.wall[phase], 6),
+                'cpu': round(self.cpu[phase], 6),
+            }) for phase in self.get_phases()),
+            'counters': dict(sorted(self.counters.items())),
+            'skipped': dict(sorted(self.skipped.items())),
+        }
+
+
+    def write_json(self, path):
+        """
+        Write the statistics to the JSON file.
+        """
+        with open(path, 'w', encoding='utf-8') as out_stream:
+            json.dump(self.to_json(), out_stream, indent=2)
+            out_stream.write('\n')
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Compact storage of the found comments.
+"""
+
+
+###############################################################################
+####
+
+import array
+
+from . import search
+
+
+###############################################################################
+####
+
+class InternTable(object):
+    """
+    Table of unique strings, each of them is stored only once and identified
+    by its index.
+    """
+
+    def __init__(self):
+        """
+        Class constructor, create an empty table.
+        """
+        self.values = []
+        # """ The strings, the index is their identifier. """
+
+        self.ids = {}
+        # """ Mapping of the strings to their identifiers. """
+
+
+    def intern(self, value):
+        """
+        Return identifier of the string, add it to the table if needed.
+        """
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self.values.append(value)
+            self.ids[value] = value_id
+
+        return value_id
+
+
+    def __getitem__(self, value_id):
+        """
+        Return the string with the identifier.
+        """
+        return self.values[value_id]
+
+
+    def __len__(self):
+        """
+        Return the number of the strings.
+        """
+        return len(self.values)
+
+
+###############################################################################
+####
+
+class CommentStore(object):
+    """
+    List of the comments stored in columns of machine integers instead of
+    one object per comment. Paths and patterns are interned, the lines of all
+    comments are encoded in one shared buffer. The items are returned as
+    newly created search.Comment objects, they are not kept in the store.
+    """
+
+    ENCODING = 'utf-8'
+    # """ Encoding of the lines in the shared buffer. """
+
+    ERRORS = 'surrogateescape'
+    # """ Lone surrogates from the decoded files are stored unchanged. """
+
+
+    def __init__(self):
+        """
+        Class constructor, create an empty store.
+        """
+        self.paths = InternTable()
+        # """ The paths of the files with a comment. """
+
+        self.patterns = InternTable()
+        # """ The patterns that were found. """
+
+        self.path_ids = array.array('L')
+        # """ Column of the path identifiers. """
+
+        self.pattern_ids = array.array('L')
+        # """ Column of the pattern identifiers. """
+
+        self.positions = array.array('L')
+        # """ Column of the line numbers. """
+
+        self.num_lines = array.array('L')
+        # """ Column of the numbers of the stored lines. """
+
+        self.befores = array.array('L')
+        # """ Column of the numbers of the lines before the matching line. """
+
+        self.offsets = array.array('Q', [0])
+        # """ Offsets of the lines of each comment in the text buffer, the last
+        # item is the end of the buffer. """
+
+        self.text = bytearray()
+        # """ The lines of all comments joined by new lines. """
+
+
+    def append(self, comment):
+        """
+        Append the comment to the store.
+        """
+        self.path_ids.append(self.paths.intern(comment.path))
+        self.pattern_ids.append(self.patterns.intern(comment.str_pattern))
+        self.positions.append(comment.position)
+        self.num_lines.append(len(comment.lines))
+        self.befores.append(comment.before)
+
+        self.text += '\n'.join(comment.lines).encode(self.ENCODING, self.ERRORS)
+        self.offsets.append(len(self.text))
+
+
+    def extend(self, comments):
+        """
+        Append all comments to the store.
+        """
+        for comment in comments:
+            self.append(comment)
+
+
+    def __len__(self):
+        """
+        Return the number of the comments.
+        """
+        return len(self.positions)
+
+
+    def __getitem__(self, index):
+        """
+        Return the comment with the index as a search.Comment object.
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Comment index out of range: {0}'.format(index))
+
+        lines = []
+        if self.num_lines[index] > 0:
+            lines = self.text[self.offsets[index]:self.offsets[index + 1]].\
+                    decode(self.ENCODING, self.ERRORS).split('\n')
+
+        return search.Comment(self.patterns[self.pattern_ids[index]],
+                self.paths[self.path_ids[index]], self.positions[index], lines,
+                self.befores[index])
+
+
+    def __iter__(self):
+        """
+        Iterate over the comments in the insertion order.
+        """
+        for index in range(len(self)):
+            yield self[index]
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Decoding of large files in blocks of whole lines.
+"""
+
+
+###############################################################################
+####
+
+import codecs
+
+
+###############################################################################
+####
+
+def iterate_blocks(data, encoding, chunk_size):
+    """
+    Decode the raw content of a file chunk by chunk and generate blocks
+    of whole lines, each of them ends with '\\n' except the last one. The new
+    lines are translated to '\\n' like in the text mode of the files. Only
+    one chunk and the unfinished line are kept in memory, the data are bytes
+    or a memory mapped file. Raise UnicodeError if decoding fails.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    size = len(data)
+
+    parts = []
+    carriage = ''
+
+    for offset in range(0, size, chunk_size):
+        final = offset + chunk_size >= size
+        text = carriage + decoder.decode(data[offset:offset + chunk_size],
+                final)
+        carriage = ''
+
+        # '\r\n' may be split between the chunks
+        if text.endswith('\r') and not final:
+            text, carriage = text[:-1], '\r'
+
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+        end = text.rfind('\n') + 1
+
+        if final:
+            parts.append(text)
+        elif end == 0:
+            # A long line, no block is complete yet
+            parts.append(text)
+            continue
+        else:
+            parts.append(text[:end])
+
+        block = ''.join(parts)
+        parts = [text[end:]]
+
+        if block:
+            yield block
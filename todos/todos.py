@@ -33,10 +33,17 @@ import sys
 import codecs
 import os
 
+from . import history
+from . import index
 from . import logger
 from . import search
+from . import parallel
+from . import revision
 from . import output
+from . import output_history
+from . import server
 from . import version
+from . import watch
 from . import exceptions
 
 
@@ -50,7 +57,16 @@ PATTERNS = [r'\bTODO\b', r'\bFIXME\b']
 SUPPRESSED = ['.git', '.svn', 'CVS']
 DIRECTORIES = ['.']
 NUM_LINES = 1
+BEFORE_CONTEXT = 0
 ENCODING = 'utf-8'
+JOBS = 1
+CACHE_SIZE = 1000000
+SOCKET = '.todos.sock'
+REFRESH_INTERVAL = 2.0
+QUERY_FORMAT = 'txt'
+WATCH_DELAY = 0.5
+PROFILE_TOP = 10
+PROFILE_THRESHOLD = 0.1
 
 
 ###############################################################################
@@ -76,15 +92,111 @@ class Todos(object):
         """
         Enter the application.
         """
+        if argv[:1] == ['query']:
+            self.query(argv[1:])
+            return
+
+        if argv[:1] == ['history']:
+            self.history(argv[1:])
+            return
+
         parameters = self.parse_command_line_arguments(argv)
         self.logger = logger.Logger(parameters.verbose)
         self.dump_parameters(parameters)
 
-        comments_search = search.CommentsSearch(parameters, self.logger)
-        comments_search.search()
+        if parameters.serve:
+            server.serve(parameters, self.logger)
+            return
+
+        if parameters.watch:
+            watch.watch(parameters, self.logger)
+            return
+
+        if parameters.query:
+            sys.stdout.flush()
+            server.query(parameters, sys.stdout.buffer)
+            return
+
+        if parameters.git_rev is not None:
+            comments_search = revision.RevisionCommentsSearch(parameters,
+                    self.logger)
+        elif parameters.jobs == 1:
+            comments_search = search.CommentsSearch(parameters, self.logger)
+        else:
+            comments_search = parallel.ParallelCommentsSearch(parameters,
+                    self.logger)
+
+        if parameters.index is not None and parameters.out_txt is None and \
+                parameters.out_xml is None and parameters.out_html is None:
+            # Only update the index
+            for comment in comments_search.iterate():
+                pass
+        else:
+            output_writer = output.OutputWriter(parameters, self.logger)
+            output_writer.stats = comments_search.stats
+            output_writer.profiler = comments_search.profiler
+            output_writer.output(comments_search)
+
+        if comments_search.stats is not None:
+            self.write_statistics(parameters, comments_search.stats)
+
+        if comments_search.profiler is not None:
+            sys.stdout.flush()
+            sys.stderr.write(comments_search.profiler.format_report())
+
+
+    def write_statistics(self, parameters, statistics):
+        """
+        Write the statistics of the search to the standard error stream
+        and to the JSON file.
+        """
+        if parameters.stats_table:
+            sys.stdout.flush()
+            sys.stderr.write(statistics.format_table())
+
+        if parameters.stats_json is not None:
+            try:
+                statistics.write_json(parameters.stats_json)
+            except IOError as io_exception:
+                raise exceptions.TodosFatalError('Output failed: {0}, {1}'.
+                        format(parameters.stats_json, io_exception))
+
+
+    def query(self, argv):
+        """
+        Query the index and write the results.
+        """
+        parameters = self.parse_query_arguments(argv)
+        self.logger = logger.Logger(parameters.verbose)
+
+        index_query = index.IndexQuery(parameters, self.logger)
+
+        try:
+            if parameters.count_by is not None:
+                for key, count in index_query.count_by(parameters.count_by):
+                    print('{0:7d} {1}'.format(count, key))
+                return
+
+            output_writer = output.OutputWriter(parameters, self.logger)
+            output_writer.output(index_query)
+        finally:
+            index_query.close()
+
+
+    def history(self, argv):
+        """
+        Count the comments in the commits of the repository and write
+        the history.
+        """
+        parameters = self.parse_history_arguments(argv)
+        self.logger = logger.Logger(parameters.verbose)
 
-        output_writer = output.OutputWriter(parameters, self.logger)
-        output_writer.output(comments_search)
+        history_search = history.HistorySearch(parameters, self.logger)
+        points = list(history_search.iterate())
+
+        output_writer = output_history.HistoryOutputWriter(parameters,
+                self.logger)
+        output_writer.output(points)
 
 
     def parse_command_line_arguments(self, argv):
@@ -115,7 +227,8 @@ class Todos(object):
         parser.add_argument(
                 '-c', '--comment',
                 nargs='+',
-                help='the comment characters',
+                help='the comment characters; used for the files of unknown '
+                        'types and if the lexer is disabled',
                 metavar='COMMENT',
                 dest='comments',
                 default=COMMENTS
@@ -141,6 +254,44 @@ class Todos(object):
                 default=NUM_LINES
         )
 
+        parser.add_argument(
+                '-B', '--before-context',
+                type=int,
+                metavar='NUM',
+                dest='before_context',
+                help='number of lines before the matching line that are sent '
+                        'to the output',
+                default=BEFORE_CONTEXT
+        )
+
+        parser.add_argument(
+                '-C', '--context',
+                type=int,
+                metavar='NUM',
+                dest='context',
+                help='number of lines before and after the matching line that '
+                        'are sent to the output; overrides -A and -B',
+                default=None
+        )
+
+        parser.add_argument(
+                '--no-lexer',
+                action='store_true',
+                dest='no_lexer',
+                help='detect the comments only by the comment characters '
+                        'instead of the language syntax of the files',
+                default=False
+        )
+
+        parser.add_argument(
+                '--no-dedup',
+                action='store_true',
+                dest='no_dedup',
+                help='search every file even if a hardlink of it or a file '
+                        'with the same content was already searched',
+                default=False
+        )
+
         parser.add_argument(
                 '-t', '--file-ext',
                 metavar='EXT',
@@ -157,6 +308,47 @@ class Todos(object):
                 default=SUPPRESSED
         )
 
+        parser.add_argument(
+                '--respect-gitignore',
+                action='store_true',
+                dest='respect_gitignore',
+                help='skip files and directories matching .gitignore and '
+                        '.ignore files',
+                default=False
+        )
+
+        parser.add_argument(
+                '--git-tracked',
+                action='store_true',
+                dest='git_tracked',
+                help='search only files tracked in the git index instead of '
+                        'walking the directories',
+                default=False
+        )
+
+        parser.add_argument(
+                '--git-rev',
+                metavar='REV',
+                dest='git_rev',
+                help='search the files in the tree of the git revision; '
+                        'they are read from the repository without a checkout'
+        )
+
+        parser.add_argument(
+                '--since',
+                metavar='REV',
+                help='search only files changed since the git revision, '
+                        'comments of the other files are taken from the '
+                        'baseline report; use with --baseline'
+        )
+
+        parser.add_argument(
+                '--baseline',
+                metavar='XML',
+                help='XML report created for the --since revision with the '
+                        'same parameters and working directory'
+        )
+
         parser.add_argument(
                 '-n', '--encoding',
                 help='the files encoding',
@@ -171,12 +363,193 @@ class Todos(object):
                 default=False
         )
 
+        parser.add_argument(
+                '-j', '--jobs',
+                type=int,
+                metavar='NUM',
+                help='number of worker processes searching the files in '
+                        'parallel; 0 to use all processors',
+                default=JOBS
+        )
+
+        parser.add_argument(
+                '--cache-dir',
+                metavar='DIR',
+                dest='cache_dir',
+                help='directory to store the results of the searched files; '
+                        'unchanged files are not searched again'
+        )
+
+        parser.add_argument(
+                '--no-cache',
+                action='store_true',
+                dest='no_cache',
+                help='do not use the cache even if the cache directory is '
+                        'specified',
+                default=False
+        )
+
+        parser.add_argument(
+                '--cache-size',
+                type=int,
+                metavar='NUM',
+                dest='cache_size',
+                help='maximal number of the files in the cache, the least '
+                        'recently used ones are removed',
+                default=CACHE_SIZE
+        )
+
+        parser.add_argument(
+                '--serve',
+                action='store_true',
+                help='run as a server keeping the results in memory and '
+                        'answering the queries on the socket',
+                default=False
+        )
+
+        parser.add_argument(
+                '--query',
+                action='store_true',
+                help='query the running server and write its output to '
+                        'the standard output',
+                default=False
+        )
+
+        parser.add_argument(
+                '--socket',
+                metavar='PATH',
+                help='Unix socket of the server',
+                default=SOCKET
+        )
+
+        parser.add_argument(
+                '--refresh-interval',
+                type=float,
+                metavar='SEC',
+                dest='refresh_interval',
+                help='interval of the server and of the polling watch to '
+                        'search the changed files',
+                default=REFRESH_INTERVAL
+        )
+
+        parser.add_argument(
+                '--watch',
+                action='store_true',
+                help='watch the directories and rewrite the outputs when '
+                        'the files change',
+                default=False
+        )
+
+        parser.add_argument(
+                '--watch-delay',
+                type=float,
+                metavar='SEC',
+                dest='watch_delay',
+                help='the changes following each other in less than the delay '
+                        'are processed together',
+                default=WATCH_DELAY
+        )
+
+        parser.add_argument(
+                '--query-path',
+                metavar='PATH',
+                dest='query_path',
+                help='return only the comments of the files under the path'
+        )
+
+        parser.add_argument(
+                '--query-pattern',
+                metavar='PATTERN',
+                dest='query_pattern',
+                help='return only the comments of the pattern'
+        )
+
+        parser.add_argument(
+                '--query-format',
+                choices=sorted(server.FORMATTERS),
+                dest='query_format',
+                help='output format of the query',
+                default=QUERY_FORMAT
+        )
+
+        parser.add_argument(
+                '--index',
+                metavar='DB',
+                help='update the index of the comments in the SQLite '
+                        'database, only changed files are searched; query it '
+                        'by "todos.sh query"'
+        )
+
+        parser.add_argument(
+                '--file-timeout',
+                type=float,
+                metavar='SECONDS',
+                dest='file_timeout',
+                help='search the files in a supervised worker process '
+                        'and skip the file whose search takes longer, '
+                        'it is reported as timed out'
+        )
+
+        parser.add_argument(
+                '--line-timeout',
+                type=float,
+                metavar='SECONDS',
+                dest='line_timeout',
+                help='like --file-timeout, but the time of the search '
+                        'of one line is limited'
+        )
+
+        parser.add_argument(
+                '--stats',
+                action='store_true',
+                dest='stats_table',
+                help='write the time spent in the phases of the search and '
+                        'the counters of the processed files and lines '
+                        'to the standard error output',
+                default=False
+        )
+
+        parser.add_argument(
+                '--stats-json',
+                metavar='JSON',
+                dest='stats_json',
+                help='write the statistics of --stats to the JSON file'
+        )
+
+        parser.add_argument(
+                '--profile',
+                action='store_true',
+                help='search each pattern separately and write the slowest '
+                        'files, the most expensive patterns and the slow lines '
+                        'to the standard error output and to the HTML output',
+                default=False
+        )
+
+        parser.add_argument(
+                '--profile-top',
+                type=int,
+                metavar='NUM',
+                dest='profile_top',
+                help='number of the slowest files and lines in the profile',
+                default=PROFILE_TOP
+        )
+
+        parser.add_argument(
+                '--profile-threshold',
+                type=float,
+                metavar='SECONDS',
+                dest='profile_threshold',
+                help='minimal time of one search of a pattern in a line '
+                        'to report the line in the profile',
+                default=PROFILE_THRESHOLD
+        )
+
         parser.add_argument(
                 '-o', '--out-txt',
                 metavar='TXT',
                 dest='out_txt',
                 help='output text file; standard output will be used if '
-                        'no output file is specified'
+                        'no output file and no index is specified'
         )
 
         parser.add_argument(
@@ -220,6 +593,297 @@ class Todos(object):
         return parameters
 
 
+    def parse_query_arguments(self, argv):
+        """
+        Parse the arguments of the query subcommand and return them in object
+        form.
+        """
+        parser = argparse.ArgumentParser(
+                prog='todos.sh query',
+                description='Query the comments in the index created '
+                        'by --index.',
+                formatter_class=argparse.ArgumentDefaultsHelpFormatter
+        )
+
+        parser.add_argument(
+                '-v', '--verbose',
+                help='increase output verbosity',
+                action='store_true',
+                default=False
+        )
+
+        parser.add_argument(
+                '--index',
+                metavar='DB',
+                required=True,
+                help='the SQLite database with the index'
+        )
+
+        parser.add_argument(
+                '-e', '--regexp',
+                nargs='+',
+                metavar='PATTERN',
+                dest='query_patterns',
+                help='return only the comments found by the indexed pattern'
+        )
+
+        parser.add_argument(
+                '--path',
+                metavar='PATH',
+                dest='query_path',
+                help='return only the comments of the files under the path'
+        )
+
+        parser.add_argument(
+                '--match',
+                metavar='REGEXP',
+                dest='query_match',
+                help='return only the comments whose lines match the regular '
+                        'expression'
+        )
+
+        parser.add_argument(
+                '-i', '--ignore-case',
+                action='store_true',
+                dest='query_ignore_case',
+                help='ignore case distinctions in --match',
+                default=False
+        )
+
+        parser.add_argument(
+                '--count-by',
+                choices=['file', 'pattern'],
+                dest='count_by',
+                help='write only the numbers of the comments per file '
+                        'or per pattern'
+        )
+
+        parser.add_argument(
+                '--limit',
+                type=int,
+                metavar='NUM',
+                dest='query_limit',
+                help='return at most the specified number of results'
+        )
+
+        parser.add_argument(
+                '-o', '--out-txt',
+                metavar='TXT',
+                dest='out_txt',
+                help='output text file; standard output will be used if '
+                        'no output file is specified'
+        )
+
+        parser.add_argument(
+                '-x', '--out-xml',
+                metavar='XML',
+                dest='out_xml',
+                help='output XML file'
+        )
+
+        parser.add_argument(
+                '-m', '--out-html',
+                metavar='HTML',
+                dest='out_html',
+                help='output HTML file'
+        )
+
+        parser.add_argument(
+                '-f', '--force',
+                action='store_true',
+                default=False,
+                help='override existing output files'
+        )
+
+        parameters = parser.parse_args(argv)
+
+        if parameters.query_limit is not None and parameters.query_limit < 0:
+            raise exceptions.TodosFatalError(
+                'Limit must not be negative: {0}'.
+                    format(parameters.query_limit))
+
+        self.verify_output_files(parameters)
+
+        return parameters
+
+
+    def parse_history_arguments(self, argv):
+        """
+        Parse the arguments of the history subcommand and return them
+        in object form.
+        """
+        parser = argparse.ArgumentParser(
+                prog='todos.sh history',
+                description='Count the comments in the commits of a git '
+                        'repository and write them as a time series.',
+                formatter_class=argparse.ArgumentDefaultsHelpFormatter
+        )
+
+        parser.add_argument(
+                '-v', '--verbose',
+                help='increase output verbosity',
+                action='store_true',
+                default=False
+        )
+
+        parser.add_argument(
+                '-c', '--comment',
+                nargs='+',
+                help='the comment characters; used for the files of unknown '
+                        'types and if the lexer is disabled',
+                metavar='COMMENT',
+                dest='comments',
+                default=COMMENTS
+        )
+
+        parser.add_argument(
+                '-e', '--regexp',
+                nargs='+',
+                help='pattern to search; see Python re module for '
+                        'proper syntax',
+                metavar='PATTERN',
+                dest='patterns',
+                default=PATTERNS
+        )
+
+        parser.add_argument(
+                '--no-lexer',
+                action='store_true',
+                dest='no_lexer',
+                help='detect the comments only by the comment characters '
+                        'instead of the language syntax of the files',
+                default=False
+        )
+
+        parser.add_argument(
+                '-t', '--file-ext',
+                metavar='EXT',
+                nargs='+',
+                help='check only files with the specified extension',
+                dest='extensions'
+        )
+
+        parser.add_argument(
+                '-D', '--suppressed',
+                metavar='DIR',
+                nargs='+',
+                help='suppress the specified directory; directory name or path',
+                default=SUPPRESSED
+        )
+
+        parser.add_argument(
+                '-n', '--encoding',
+                help='the files encoding',
+                default=ENCODING
+        )
+
+        parser.add_argument(
+                '-i', '--ignore-case',
+                action='store_true',
+                help='ignore case distinctions',
+                dest='ignore_case',
+                default=False
+        )
+
+        parser.add_argument(
+                '--range',
+                metavar='REV',
+                dest='history_range',
+                help='the commits to search, a revision or a range like '
+                        'v1.0..HEAD; the first parents are followed',
+                default='HEAD'
+        )
+
+        parser.add_argument(
+                '--after',
+                metavar='DATE',
+                dest='history_after',
+                help='search only the commits newer than the date, e.g. '
+                        '"2 years ago"'
+        )
+
+        parser.add_argument(
+                '--period',
+                choices=history.PERIODS,
+                help='search only the last commit of each period',
+                default='commit'
+        )
+
+        parser.add_argument(
+                '--depth',
+                type=int,
+                metavar='NUM',
+                help='the depth of the directories in the counts, the deeper '
+                        'ones are counted in their parents',
+                default=1
+        )
+
+        parser.add_argument(
+                '--csv',
+                metavar='CSV',
+                dest='out_csv',
+                help='output CSV file; standard output will be used if '
+                        'no output file is specified'
+        )
+
+        parser.add_argument(
+                '--json',
+                metavar='JSON',
+                dest='out_json',
+                help='output JSON file'
+        )
+
+        parser.add_argument(
+                '-m', '--out-html',
+                metavar='HTML',
+                dest='out_html',
+                help='output HTML file with a chart'
+        )
+
+        parser.add_argument(
+                '-f', '--force',
+                action='store_true',
+                default=False,
+                help='override existing output files'
+        )
+
+        parser.add_argument(
+                'directory',
+                metavar='DIRECTORY',
+                nargs='?',
+                help='directory inside of the git repository',
+                default='.'
+        )
+
+        # The parameters of the search that the history doesn't change
+        parser.set_defaults(num_lines=NUM_LINES, before_context=BEFORE_CONTEXT,
+                cache_dir=None, baseline=None, index=None, dedup=False,
+                git_tracked=False, respect_gitignore=False, out_txt=None,
+                out_xml=None, stats=False, profile=False, file_timeout=None,
+                line_timeout=None)
+
+        parameters = parser.parse_args(argv)
+        parameters.directories = [parameters.directory]
+        parameters.lexer = not parameters.no_lexer
+
+        if parameters.depth < 0:
+            raise exceptions.TodosFatalError(
+                'Depth must not be negative: {0}'.format(parameters.depth))
+
+        self.verify_extensions(parameters)
+
+        if not parameters.force:
+            for path in [parameters.out_csv, parameters.out_json]:
+                if path is not None and os.path.exists(path):
+                    raise exceptions.TodosFatalError(
+                        'Output file exists, use force parameter to '
+                            'override: {0}'.format(path))
+
+        self.verify_output_files(parameters)
+
+        return parameters
+
+
     def dump_parameters(self, parameters):
         """
         Dump values of parameters if a verbose output is enabled.
@@ -232,12 +896,45 @@ class Todos(object):
         self.logger.verbose('verbose: {0}'.format(parameters.verbose))
         self.logger.verbose('comments: {0}'.format(parameters.comments))
         self.logger.verbose('patterns: {0}'.format(parameters.patterns))
+        self.logger.verbose('lexer: {0}'.format(parameters.lexer))
+        self.logger.verbose('dedup: {0}'.format(parameters.dedup))
         self.logger.verbose('extensions: {0}'.format(parameters.extensions))
         self.logger.verbose('suppressed-dirs: {0}'.format(
         parameters.suppressed))
+        self.logger.verbose('respect-gitignore: {0}'.format(
+                parameters.respect_gitignore))
+        self.logger.verbose('git-tracked: {0}'.format(parameters.git_tracked))
+        self.logger.verbose('git-rev: {0}'.format(parameters.git_rev))
+        self.logger.verbose('since: {0}'.format(parameters.since))
+        self.logger.verbose('baseline: {0}'.format(parameters.baseline))
         self.logger.verbose('encoding: {0}'.format(parameters.encoding))
         self.logger.verbose('ignore-case: {0}'.format(parameters.ignore_case))
         self.logger.verbose('num-lines: {0}'.format(parameters.num_lines))
+        self.logger.verbose('before-context: {0}'.format(
+                parameters.before_context))
+        self.logger.verbose('jobs: {0}'.format(parameters.jobs))
+        self.logger.verbose('cache-dir: {0}'.format(parameters.cache_dir))
+        self.logger.verbose('cache-size: {0}'.format(parameters.cache_size))
+        self.logger.verbose('serve: {0}'.format(parameters.serve))
+        self.logger.verbose('query: {0}'.format(parameters.query))
+        self.logger.verbose('socket: {0}'.format(parameters.socket))
+        self.logger.verbose('refresh-interval: {0}'.format(
+                parameters.refresh_interval))
+        self.logger.verbose('watch: {0}'.format(parameters.watch))
+        self.logger.verbose('watch-delay: {0}'.format(parameters.watch_delay))
+        self.logger.verbose('query-path: {0}'.format(parameters.query_path))
+        self.logger.verbose('query-pattern: {0}'.format(
+                parameters.query_pattern))
+        self.logger.verbose('query-format: {0}'.format(parameters.query_format))
+        self.logger.verbose('index: {0}'.format(parameters.index))
+        self.logger.verbose('file-timeout: {0}'.format(parameters.file_timeout))
+        self.logger.verbose('line-timeout: {0}'.format(parameters.line_timeout))
+        self.logger.verbose('stats: {0}'.format(parameters.stats_table))
+        self.logger.verbose('stats-json: {0}'.format(parameters.stats_json))
+        self.logger.verbose('profile: {0}'.format(parameters.profile))
+        self.logger.verbose('profile-top: {0}'.format(parameters.profile_top))
+        self.logger.verbose('profile-threshold: {0}'.format(
+                parameters.profile_threshold))
         self.logger.verbose('out-txt: {0}'.format(parameters.out_txt))
         self.logger.verbose('out-xml: {0}'.format(parameters.out_xml))
         self.logger.verbose('out-html: {0}'.format(parameters.out_html))
@@ -258,6 +955,122 @@ class Todos(object):
                     format(ENCODING))
             parameters.encoding = ENCODING
 
+        if parameters.context is not None:
+            parameters.before_context = parameters.context
+            parameters.num_lines = parameters.context + 1
+
+        if parameters.before_context < 0:
+            raise exceptions.TodosFatalError(
+                'Number of lines before context must not be negative: {0}'.
+                    format(parameters.before_context))
+
+        if parameters.jobs < 0:
+            raise exceptions.TodosFatalError(
+                'Number of jobs must not be negative: {0}'.
+                    format(parameters.jobs))
+
+        if parameters.cache_size < 0:
+            raise exceptions.TodosFatalError(
+                'Cache size must not be negative: {0}'.
+                    format(parameters.cache_size))
+
+        if parameters.since is not None and parameters.index is not None:
+            raise exceptions.TodosFatalError(
+                'Index can not be used with --since and --baseline')
+
+        if (parameters.since is None) != (parameters.baseline is None):
+            raise exceptions.TodosFatalError(
+                'Both --since and --baseline must be specified')
+
+        if parameters.serve + parameters.query + parameters.watch > 1:
+            raise exceptions.TodosFatalError(
+                'Options --serve, --query and --watch are mutually exclusive')
+
+        if (parameters.serve or parameters.watch) and \
+                parameters.since is not None:
+            raise exceptions.TodosFatalError(
+                'Options --serve and --watch can not be used with --since '
+                    'and --baseline')
+
+        if parameters.git_rev is not None and (parameters.git_tracked or
+                parameters.since is not None or parameters.serve or
+                parameters.watch):
+            raise exceptions.TodosFatalError(
+                'Option --git-rev can not be used with --git-tracked, --since, '
+                    '--serve and --watch')
+
+        if parameters.git_rev is not None and parameters.jobs != 1:
+            raise exceptions.TodosFatalError(
+                'Option --git-rev can not be used with --jobs, the blobs are '
+                    'read by one git process')
+
+        if parameters.refresh_interval <= 0:
+            raise exceptions.TodosFatalError(
+                'Refresh interval must be positive: {0}'.
+                    format(parameters.refresh_interval))
+
+        if parameters.watch_delay < 0:
+            raise exceptions.TodosFatalError(
+                'Watch delay must not be negative: {0}'.
+                    format(parameters.watch_delay))
+
+        if parameters.no_cache:
+            parameters.cache_dir = None
+
+        parameters.lexer = not parameters.no_lexer
+        parameters.dedup = not parameters.no_dedup
+
+        parameters.stats = parameters.stats_table or \
+                parameters.stats_json is not None
+
+        if parameters.stats and (parameters.serve or parameters.query or
+                parameters.watch):
+            raise exceptions.TodosFatalError(
+                'Options --stats and --stats-json can not be used with '
+                    '--serve, --query and --watch')
+
+        if parameters.profile and (parameters.serve or parameters.query or
+                parameters.watch or parameters.jobs != 1):
+            raise exceptions.TodosFatalError(
+                'Option --profile can not be used with --serve, --query, '
+                    '--watch and --jobs')
+
+        for timeout in [parameters.file_timeout, parameters.line_timeout]:
+            if timeout is not None and timeout <= 0:
+                raise exceptions.TodosFatalError(
+                    'Timeout must be positive: {0}'.format(timeout))
+
+        if (parameters.file_timeout is not None or
+                parameters.line_timeout is not None) and (parameters.serve or
+                parameters.query or parameters.watch or parameters.profile):
+            raise exceptions.TodosFatalError(
+                'Options --file-timeout and --line-timeout can not be used '
+                    'with --serve, --query, --watch and --profile')
+
+        if parameters.profile_top < 0:
+            raise exceptions.TodosFatalError(
+                'Number of profiled files and lines must not be negative: {0}'.
+                    format(parameters.profile_top))
+
+        if parameters.profile_threshold < 0:
+            raise exceptions.TodosFatalError(
+                'Profile threshold must not be negative: {0}'.
+                    format(parameters.profile_threshold))
+
+        self.verify_extensions(parameters)
+        self.verify_output_files(parameters)
+
+        if not parameters.force and parameters.stats_json is not None and \
+                os.path.exists(parameters.stats_json):
+            raise exceptions.TodosFatalError(
+                'Output file exists, use force parameter to override: {0}'.
+                    format(parameters.stats_json))
+
+
+    def verify_extensions(self, parameters):
+        """
+        Prepend the dot to the file extensions that don't start with it.
+        """
         if parameters.extensions is not None:
             tmp_extensions = []
 
@@ -269,6 +1082,11 @@ class Todos(object):
 
             parameters.extensions = tmp_extensions
 
+
+    def verify_output_files(self, parameters):
+        """
+        Verify the output files don't exist unless they may be overridden.
+        """
         if not parameters.force:
             if parameters.out_txt is not None:
                 if os.path.exists(parameters.out_txt):
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Traversal of the input directories.
+"""
+
+
+###############################################################################
+####
+
+import os
+import time
+
+from . import ignore
+
+
+###############################################################################
+####
+
+class WalkStatistics(object):
+    """
+    Container to store counters of the directory traversal.
+    """
+
+    def __init__(self):
+        """
+        Class constructor, initialize all members to zero.
+        """
+        self.directories = 0
+        # """ The number of the listed directories. """
+
+        self.files = 0
+        # """ The number of the regular files that were found. """
+
+        self.suppressed = 0
+        # """ The number of the pruned directories. """
+
+        self.ignored = 0
+        # """ The number of the entries matching an ignore file. """
+
+        self.skipped = 0
+        # """ The number of the entries that are neither files nor directories. """
+
+        self.errors = 0
+        # """ The number of the directories that could not be listed. """
+
+        self.time = 0.0
+        # """ The wall time spent in the traversal, in seconds. """
+
+
+    def __str__(self):
+        """
+        Return a string representation of the statistics.
+        """
+        return ('directories: {0}, files: {1}, suppressed: {2}, '
+                'ignored: {3}, skipped: {4}, errors: {5}, time: {6:.3f} s'.
+                format(self.directories, self.files, self.suppressed,
+                self.ignored, self.skipped, self.errors, self.time))
+
+
+###############################################################################
+####
+
+class DirectoryWalker(object):
+    """
+    Iterative traversal of the directory trees based on os.scandir(). The type
+    of each entry is taken from the directory listing, no extra stat() call
+    is needed to distinguish files from directories. If enabled, the entries
+    matching .gitignore or .ignore files are pruned before they are listed.
+    """
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor.
+        """
+        self.parameters = parameters
+        # """ The input parameters. """
+
+        self.logger = logger
+        # """ The logger to output messages. """
+
+        self.statistics = WalkStatistics()
+        # """ The counters of the traversal. """
+
+        self.listed = None
+        # """ List to append the listed directories to or None. """
+
+
+    def is_directory_suppressed(self, directory):
+        """
+        Return true if the input directory should be skipped, otherwise false.
+        """
+        if self.parameters.suppressed is None:
+            return False
+
+        # Add slash at the end, the suppresed one from user may contain it
+        directory_with_slash = os.path.join(directory, '')
+
+        for dir in self.parameters.suppressed:
+            if dir in directory_with_slash:
+                return True
+
+        return False
+
+
+    def get_directory_key(self, path):
+        """
+        Return the (st_dev, st_ino) tuple identifying the directory or None
+        if it is not available. The symbolic links are followed.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        return (stat.st_dev, stat.st_ino)
+
+
+    def walk(self, directories):
+        """
+        Generate (path, entry) tuples for all files in the input directories
+        and their subdirectories. The entry is the os.DirEntry of the file and
+        it may be used to get its cached stat data. The files are generated
+        in the depth-first order, the entries of each directory are sorted
+        by name.
+        """
+        # Stack of the pending items, (path, entry, chain, parents) tuples;
+        # entry is None for a directory from the command line, chain is
+        # the list of the ignore rules of the parent directories, parents
+        # is the set of the keys of the directories on the walked path
+        stack = [(directory, None, None, frozenset())
+                for directory in reversed(directories)]
+
+        while stack:
+            path, entry, chain, parents = stack.pop()
+
+            if entry is None:
+                if not os.path.isdir(path):
+                    self.logger.verbose('Skipping directory (not a directory): '
+                            '{0}'.format(path))
+                    self.statistics.skipped += 1
+                    continue
+
+                if self.is_directory_suppressed(path):
+                    self.logger.verbose('Skipping directory (suppressed): {0}'.
+                            format(path))
+                    self.statistics.suppressed += 1
+                    continue
+
+                if self.parameters.respect_gitignore:
+                    chain = ignore.get_parent_chain(path, self.logger)
+            elif entry.is_file():
+                self.statistics.files += 1
+                yield path, entry
+                continue
+
+            # A symbolic link to a directory on the walked path, possibly
+            # through other links, would be listed forever
+            key = self.get_directory_key(path)
+            if key in parents:
+                self.logger.verbose('Skipping directory (symlink loop): {0}'.
+                        format(path))
+                self.statistics.skipped += 1
+                continue
+
+            if key is not None:
+                parents = parents | {key}
+
+            stack.extend((item_path, item_entry, item_chain, parents)
+                    for item_path, item_entry, item_chain
+                    in reversed(self.list_directory(path, chain)))
+
+
+    def list_directory(self, directory, chain=None):
+        """
+        Return the sorted list of (path, entry, chain) tuples of the input
+        directory. Entries that are neither files nor directories, suppressed
+        directories and entries ignored by the chain of the ignore rules
+        extended by the ignore files of the directory are pruned.
+        """
+        start = time.perf_counter()
+        result = []
+
+        try:
+            with os.scandir(directory) as iterator:
+                entries = list(iterator)
+        except OSError as os_exception:
+            self.logger.warn('Reading directory failed: {0}, {1}'.
+                    format(directory, os_exception))
+            self.statistics.errors += 1
+            self.statistics.time += time.perf_counter() - start
+            return result
+
+        self.statistics.directories += 1
+        entries.sort(key=lambda entry: entry.name)
+
+        if self.listed is not None:
+            self.listed.append(directory)
+
+        if chain is not None and any(entry.name in ignore.IGNORE_FILES
+                for entry in entries):
+            rules = ignore.IgnoreRules.load(directory, self.logger)
+            if rules is not None:
+                chain = chain + [rules]
+
+        for entry in entries:
+            if chain and ignore.is_ignored(chain, entry.path, entry.name,
+                    entry.is_dir()):
+                self.logger.verbose('Skipping entry (ignored): {0}'.
+                        format(entry.path))
+                self.statistics.ignored += 1
+            elif entry.is_file():
+                result.append((entry.path, entry, chain))
+            elif not entry.is_dir():
+                self.logger.verbose('Skipping directory (not a directory): {0}'.
+                        format(entry.path))
+                self.statistics.skipped += 1
+            elif self.is_directory_suppressed(entry.path):
+                self.logger.verbose('Skipping directory (suppressed): {0}'.
+                        format(entry.path))
+                self.statistics.suppressed += 1
+            else:
+                result.append((entry.path, entry, chain))
+
+        self.statistics.time += time.perf_counter() - start
+        return result
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Watching of the input directories and rewriting of the outputs on changes.
+"""
+
+
+###############################################################################
+####
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import signal
+import stat
+import struct
+import sys
+import tempfile
+import time
+
+from . import cache
+from . import exceptions
+from . import ignore
+from . import output
+from . import server
+
+
+###############################################################################
+####
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+# """ The inotify event masks, see inotify(7). """
+
+EVENT_HEADER = struct.Struct('iIII')
+# """ The fixed part of struct inotify_event, the name follows. """
+
+
+###############################################################################
+####
+
+class InotifyMonitor(object):
+    """
+    Monitor of the changes in the watched directories based on Linux inotify.
+    The process sleeps in select() until an event arrives.
+    """
+
+    MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | \
+            IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | \
+            IN_MOVE_SELF | IN_ONLYDIR
+    # """ The events of the watched directories. """
+
+
+    def __init__(self, logger):
+        """
+        Class constructor, create the inotify instance. Raise OSError if
+        inotify is not available.
+        """
+        self.logger = logger
+        # """ The logger to output messages. """
+
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, 'inotify is available only on Linux')
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        # """ The C library with the inotify functions. """
+
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        # """ The inotify file descriptor. """
+
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1() failed')
+
+        self.paths = {}
+        # """ Mapping of the watch descriptors to the directories. """
+
+        self.descriptors = {}
+        # """ Mapping of the directories to the watch descriptors. """
+
+
+    def update(self, directories):
+        """
+        Watch exactly the directories, add the new ones and remove the others.
+        Raise OSError if a watch can't be added, e.g. the limit is reached.
+        """
+        directories = set(directories)
+
+        for path in list(self.descriptors):
+            if path not in directories:
+                self.libc.inotify_rm_watch(self.fd, self.descriptors.pop(path))
+
+        for path in directories:
+            if path in self.descriptors:
+                continue
+
+            descriptor = self.libc.inotify_add_watch(self.fd,
+                    os.fsencode(path), self.MASK)
+
+            if descriptor < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    # Removed in the meantime, the next refresh knows it
+                    continue
+                raise OSError(error, 'inotify_add_watch() failed: {0}'.
+                        format(path))
+
+            self.paths[descriptor] = path
+            self.descriptors[path] = descriptor
+
+
+    def wait(self, timeout=None):
+        """
+        Wait for the changes at most timeout seconds or forever if it is
+        None. Return (paths, structural) tuple, the paths are the changed
+        files and the structural flag means that the directories must be
+        walked again.
+        """
+        readable, writable, exceptional = select.select([self.fd], [], [],
+                timeout)
+        if not readable:
+            return set(), False
+
+        paths = set()
+        structural = False
+
+        for descriptor, mask, name in self.read_events():
+            if mask & IN_Q_OVERFLOW:
+                self.logger.verbose('Watch: event queue overflow')
+                structural = True
+                continue
+
+            if mask & IN_IGNORED:
+                # The watch was removed, the directory is gone
+                path = self.paths.pop(descriptor, None)
+                if self.descriptors.get(path) == descriptor:
+                    del self.descriptors[path]
+                continue
+
+            directory = self.paths.get(descriptor)
+            if directory is None:
+                continue
+
+            if mask & (IN_ISDIR | IN_DELETE_SELF | IN_MOVE_SELF) or \
+                    name in ignore.IGNORE_FILES:
+                structural = True
+            else:
+                paths.add(os.path.join(directory, name))
+
+        return paths, structural
+
+
+    def read_events(self):
+        """
+        Generate (descriptor, mask, name) tuples of all pending events.
+        """
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return
+
+            offset = 0
+            while offset < len(data):
+                descriptor, mask, cookie, length = \
+                        EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+
+                name = os.fsdecode(data[offset:offset+length].rstrip(b'\0'))
+                offset += length
+
+                yield descriptor, mask, name
+
+
+    def close(self):
+        """
+        Close the inotify file descriptor.
+        """
+        os.close(self.fd)
+
+
+###############################################################################
+####
+
+class PollingMonitor(object):
+    """
+    Monitor that reports a possible change of all files periodically,
+    the directories are walked and the files are compared by stat.
+    """
+
+    def __init__(self, interval):
+        """
+        Class constructor.
+        """
+        self.interval = interval
+        # """ The interval of the polling in seconds. """
+
+
+    def update(self, directories):
+        """
+        Nothing to update, all directories are walked.
+        """
+        pass
+
+
+    def wait(self, timeout=None):
+        """
+        Sleep for the polling interval and report a structural change.
+        No more changes are reported during the debouncing.
+        """
+        if timeout is not None:
+            return set(), False
+
+        time.sleep(self.interval)
+        return set(), True
+
+
+    def close(self):
+        """
+        Nothing to close.
+        """
+        pass
+
+
+###############################################################################
+####
+
+class WatchedCommentsSearch(server.IndexedCommentsSearch):
+    """
+    Search with the results in memory that can update the results of single
+    files. The comments are generated from the memory, the files are not
+    searched by iterate().
+    """
+
+    def __init__(self, parameters, logger):
+        """
+        Class constructor.
+        """
+        server.IndexedCommentsSearch.__init__(self, parameters, logger)
+
+        self.directories = []
+        # """ The directories listed by the last refresh. """
+
+
+    def create_walker(self):
+        """
+        Return the walker generating the input files, it records
+        the listed directories.
+        """
+        directory_walker = server.IndexedCommentsSearch.create_walker(self)
+        directory_walker.listed = self.directories
+        return directory_walker
+
+
+    def refresh(self):
+        '''
+        Walk the directories and update the results of the changed files.
+        Return true if a file was searched or removed, otherwise false.
+        '''
+        self.directories = []
+        return server.IndexedCommentsSearch.refresh(self)
+
+
+    def iterate(self):
+        '''
+        Generate the comments of all files from the memory.
+        '''
+        for signature, abs_path, comments in self.snapshot[0].values():
+            if comments is not None:
+                yield from comments
+
+
+    def update_files(self, paths):
+        '''
+        Update the results and the summary of the changed files in place.
+        Return None if a new file was found and the directories must be
+        walked again, otherwise true if a result changed.
+        '''
+        files = self.snapshot[0]
+        self.start_ns = time.time_ns()
+        modified = False
+
+        for path in sorted(paths):
+            known = files.get(path)
+            signature = cache.get_signature(path)
+
+            if known is None:
+                # Temporary or skipped file, or a new one to be placed
+                # in the order of the traversal
+                if signature is None or self.is_file_skipped(path):
+                    continue
+                return None
+
+            if signature is not None and signature == known[0]:
+                continue
+
+            self.remove_file_result(path, known[2])
+            modified = True
+
+            if signature is None:
+                self.logger.verbose('Removing file: {0}'.format(path))
+                del files[path]
+                continue
+
+            comments = self.scan_file(path)
+
+            racy_ns = self.start_ns - cache.ResultCache.RACY_INTERVAL_NS
+            if signature[1] >= racy_ns:
+                signature = None
+
+            files[path] = (signature, known[1], comments)
+            self.add_file_result(path, comments)
+
+        return modified
+
+
+    def remove_file_result(self, path, comments):
+        '''
+        Remove the comments of the file from the summary.
+        '''
+        if comments is None:
+            return
+
+        self.summary.total_files -= 1
+        self.summary.per_file.pop(path, None)
+
+        for comment in comments:
+            self.summary.per_pattern[comment.str_pattern] -= 1
+
+
+###############################################################################
+####
+
+class AtomicOutputWriter(output.OutputWriter):
+    """
+    Writer that replaces the output files atomically, a reader never sees
+    a partially written file.
+    """
+
+    def open_output(self, exit_stack, outputs, path, formatter):
+        """
+        Open a temporary file next to the output file and append it to
+        the outputs. It replaces the output file when it is closed without
+        an error.
+        """
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                    dir=os.path.dirname(os.path.abspath(path)), prefix='.tmp-')
+        except OSError as os_exception:
+            raise exceptions.TodosFatalError('Output failed: {0}, {1}'.format(
+                    path, os_exception))
+
+        def replace(exc_type, exc_value, traceback):
+            if exc_type is None:
+                # The temporary file is readable only by its owner
+                os.chmod(tmp_path, self.get_mode(path))
+                os.replace(tmp_path, path)
+            else:
+                os.unlink(tmp_path)
+
+        # Registered first, so it is executed after the file is closed
+        exit_stack.push(replace)
+
+        out_stream = exit_stack.enter_context(os.fdopen(fd, mode='w',
+                encoding=self.parameters.encoding))
+
+        outputs.append((path, out_stream, formatter))
+
+
+    def get_mode(self, path):
+        """
+        Return the permissions of the existing output file or the default
+        permissions of a new file according to the umask.
+        """
+        try:
+            return stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+
+###############################################################################
+####
+
+def create_monitor(parameters, logger):
+    """
+    Return inotify monitor if it is available, otherwise polling monitor.
+    """
+    try:
+        return InotifyMonitor(logger)
+    except (OSError, AttributeError) as exception:
+        # AttributeError: the C library has no inotify functions
+        logger.verbose('Watch: inotify not available, polling: {0}'.
+                format(exception))
+        return PollingMonitor(parameters.refresh_interval)
+
+
+def update_monitor(monitor, comments_search, parameters, logger):
+    """
+    Watch the directories listed by the last refresh. Return the monitor,
+    polling monitor replaces inotify one if the watches can't be added.
+    """
+    try:
+        monitor.update(comments_search.directories)
+    except OSError as os_exception:
+        logger.warn('Watching directories failed, polling: {0}'.
+                format(os_exception))
+        monitor.close()
+        monitor = PollingMonitor(parameters.refresh_interval)
+
+    return monitor
+
+
+def watch(parameters, logger):
+    """
+    Search the directories, write the outputs and rewrite them after each
+    batch of changes. The changes following each other in less than
+    the delay are processed together. Exit on SIGINT or SIGTERM.
+    """
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    comments_search = WatchedCommentsSearch(parameters, logger)
+    output_writer = AtomicOutputWriter(parameters, logger)
+
+    monitor = create_monitor(parameters, logger)
+
+    comments_search.refresh()
+    monitor = update_monitor(monitor, comments_search, parameters, logger)
+    output_writer.output(comments_search)
+
+    try:
+        while True:
+            paths, structural = monitor.wait()
+
+            while True:
+                more_paths, more_structural = monitor.wait(
+                        parameters.watch_delay)
+                if not more_paths and not more_structural:
+                    break
+
+                paths |= more_paths
+                structural = structural or more_structural
+
+            modified = None
+            if not structural:
+                modified = comments_search.update_files(paths)
+
+            if modified is None:
+                modified = comments_search.refresh()
+                monitor = update_monitor(monitor, comments_search, parameters,
+                        logger)
+
+            if modified:
+                logger.verbose('Watch: rewriting outputs')
+                output_writer.output(comments_search)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.close()
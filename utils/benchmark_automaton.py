@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Compare the automaton with the per-marker loops as the number of the comment
+# markers and the literal tags grows.
+# Usage: python3 utils/benchmark_automaton.py [NUM_LINES]
+
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import todos.automaton
+
+
+NUM_LINES = 100000
+
+MARKERS = ['#', '//', '/*', '<!--', '--', ';', '%', 'REM']
+
+LINES = [
+    '    total += compute(value, other) * factor',
+    '    for (index = 0; index < count; index++) {',
+    '    // TODO: handle the overflow',
+    '    return "http://example.com/page";',
+    '    # the values are checked by the caller',
+]
+
+
+def get_keywords(count):
+    """
+    Return the base markers extended by generated tags to the count.
+    """
+    keywords = list(MARKERS)
+    index = 0
+    while len(keywords) < count:
+        keywords.append('TAG{0}:'.format(index))
+        index += 1
+    return keywords[:count]
+
+
+def count_loop(keywords, lines):
+    # The masks of all keywords are needed, the loop can't stop early
+    found = 0
+    for line in lines:
+        for keyword, mask in keywords:
+            if line.count(keyword) > 0:
+                found |= mask
+    return found
+
+
+def automaton_scan(keywords, lines, substrings):
+    automaton = todos.automaton.Automaton(keywords)
+    automaton.substrings = substrings
+    found = 0
+    for line in lines:
+        found |= automaton.scan(line)
+    return found
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    found = function(*args)
+    return time.perf_counter() - start, found
+
+
+num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_LINES
+lines = [LINES[index % len(LINES)] for index in range(num_lines)]
+
+for count in [4, 8, 12, 16, 32, 64]:
+    keywords = [(keyword, 1 << index)
+            for index, keyword in enumerate(get_keywords(count))]
+    results = [
+        measure(count_loop, keywords, lines),
+        measure(automaton_scan, keywords, lines, True),
+        measure(automaton_scan, keywords, lines, False),
+    ]
+    assert len(set(found for duration, found in results)) == 1
+
+    print('{0:2} markers: count {1:.3f} s, substrings {2:.3f} s, '
+            'automaton {3:.3f} s'.format(count,
+                    *[duration for duration, found in results]))
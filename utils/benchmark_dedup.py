@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Compare the search of a tree with vendored copies and hardlinks of the same
+# sources with and without reusing the results of the identical content.
+# Usage: python3 utils/benchmark_dedup.py [DIRECTORY] [COPIES]
+
+
+import os
+import shutil
+import sys
+import sysconfig
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import todos.logger
+import todos.search
+import todos.todos
+
+
+COPIES = 4
+
+
+def generate(source, directory, copies):
+    for index in range(copies):
+        shutil.copytree(source, os.path.join(directory, 'copy{0}'.format(index)),
+                ignore=shutil.ignore_patterns('__pycache__', 'site-packages'))
+    shutil.copytree(os.path.join(directory, 'copy0'),
+            os.path.join(directory, 'links'), copy_function=os.link)
+
+
+def measure(directory, argv):
+    parameters = todos.todos.Todos().parse_command_line_arguments(
+            argv + ['-A', '2', directory])
+    comments_search = todos.search.CommentsSearch(parameters,
+            todos.logger.Logger(False))
+
+    start = time.perf_counter()
+    comments_search.search()
+    duration = time.perf_counter() - start
+
+    return duration, comments_search
+
+
+source = sys.argv[1] if len(sys.argv) > 1 else \
+        os.path.join(sysconfig.get_paths()['stdlib'], 'idlelib')
+copies = int(sys.argv[2]) if len(sys.argv) > 2 else COPIES
+
+with tempfile.TemporaryDirectory() as directory:
+    generate(source, directory, copies)
+
+    for name, argv in [('no dedup', ['--no-dedup']), ('dedup', [])]:
+        duration, comments_search = measure(directory, argv)
+        print('{0:8} {1:.3f} s, comments: {2}, files: {3}'.format(name,
+                duration, len(comments_search.comments),
+                comments_search.summary.total_files))
+        if comments_search.dedup is not None:
+            print('         {0}'.format(comments_search.dedup.statistics))
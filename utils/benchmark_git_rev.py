@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Compare the search of a git revision in a temporary worktree with the search
+# of the blobs read from the object store, and the search of the next revision
+# with the results of the unchanged blobs in the cache.
+# Usage: python3 utils/benchmark_git_rev.py [REPOSITORY] [REV]
+
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import todos.logger
+import todos.revision
+import todos.search
+import todos.todos
+
+
+def git(root, *args):
+    subprocess.run(['git', '-C', root] + list(args), check=True)
+
+
+def measure(argv, search_class):
+    parameters = todos.todos.Todos().parse_command_line_arguments(argv)
+    comments_search = search_class(parameters, todos.logger.Logger(False))
+    comments_search.search()
+    return len(comments_search.comments)
+
+
+def checkout(repository, rev):
+    with tempfile.TemporaryDirectory() as directory:
+        worktree = os.path.join(directory, 'worktree')
+        git(repository, 'worktree', 'add', '-q', '--detach', worktree, rev)
+        try:
+            return measure(['-D', '.git', '--', worktree],
+                    todos.search.CommentsSearch)
+        finally:
+            git(repository, 'worktree', 'remove', '--force', worktree)
+
+
+repository = sys.argv[1] if len(sys.argv) > 1 else \
+        os.path.join(os.path.dirname(__file__), '..')
+rev = sys.argv[2] if len(sys.argv) > 2 else 'HEAD~1'
+
+with tempfile.TemporaryDirectory() as cache_dir:
+    for name, function in [
+            ('worktree', lambda: checkout(repository, rev)),
+            ('object store', lambda: measure(['--git-rev', rev, '--',
+                    repository], todos.revision.RevisionCommentsSearch)),
+            ('cache cold', lambda: measure(['--cache-dir', cache_dir,
+                    '--git-rev', rev, '--', repository],
+                    todos.revision.RevisionCommentsSearch)),
+            ('next revision', lambda: measure(['--cache-dir', cache_dir,
+                    '--git-rev', rev + '^', '--', repository],
+                    todos.revision.RevisionCommentsSearch))]:
+        start = time.perf_counter()
+        comments = function()
+        print('{0:14} {1:6} comments {2:8.3f} s'.format(name, comments,
+                time.perf_counter() - start))
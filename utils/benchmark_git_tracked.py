@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Compare the directory traversal with the list of the files tracked by git
+# in a repository with a large untracked build directory.
+# Usage: python3 utils/benchmark_git_tracked.py [NUM_UNTRACKED_FILES]
+
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import todos.logger
+import todos.search
+import todos.todos
+
+
+NUM_TRACKED_FILES = 500
+NUM_UNTRACKED_FILES = 20000
+FILES_PER_DIRECTORY = 50
+CONTENT = 'x = 1\n# TODO: something\n' * 20
+
+
+def create_files(root, count):
+    for index in range(count):
+        directory = os.path.join(root, 'd{0}'.format(index // FILES_PER_DIRECTORY))
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'f{0}.c'.format(index)), 'w') as output_file:
+            output_file.write(CONTENT)
+
+
+def git(root, *args):
+    subprocess.run(['git', '-C', root] + list(args), check=True)
+
+
+def measure(argv):
+    parameters = todos.todos.Todos().parse_command_line_arguments(argv)
+    comments_search = todos.search.CommentsSearch(parameters,
+            todos.logger.Logger(False))
+    start = time.perf_counter()
+    comments_search.search()
+    return time.perf_counter() - start, comments_search.summary.total_files
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_UNTRACKED_FILES
+
+with tempfile.TemporaryDirectory() as root:
+    create_files(os.path.join(root, 'src'), NUM_TRACKED_FILES)
+    git(root, 'init', '-q')
+    git(root, 'add', 'src')
+    create_files(os.path.join(root, 'build'), count)
+
+    for argv in [[root], ['--git-tracked', root]]:
+        seconds, files = measure(argv)
+        print('{0:16} {1:6} files {2:8.3f} s'.format(
+                ' '.join(argv[:-1]) or 'directory walk', files, seconds))
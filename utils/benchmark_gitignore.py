@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Compare the search of a tree with large ignored directories with and
+# without --respect-gitignore.
+# Usage: python3 utils/benchmark_gitignore.py [NUM_IGNORED_FILES]
+
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import todos.logger
+import todos.search
+import todos.todos
+
+
+NUM_SOURCE_FILES = 500
+NUM_IGNORED_FILES = 20000
+FILES_PER_DIRECTORY = 50
+CONTENT = 'x = 1\n# TODO: something\n' * 20
+
+
+def create_files(root, count):
+    for index in range(count):
+        directory = os.path.join(root, 'd{0}'.format(index // FILES_PER_DIRECTORY))
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'f{0}.js'.format(index)), 'w') as output_file:
+            output_file.write(CONTENT)
+
+
+def measure(argv):
+    parameters = todos.todos.Todos().parse_command_line_arguments(argv)
+    comments_search = todos.search.CommentsSearch(parameters,
+            todos.logger.Logger(False))
+    start = time.perf_counter()
+    comments_search.search()
+    return time.perf_counter() - start, comments_search.summary.total_files
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_IGNORED_FILES
+
+with tempfile.TemporaryDirectory() as root:
+    os.mkdir(os.path.join(root, '.git'))
+    create_files(os.path.join(root, 'src'), NUM_SOURCE_FILES)
+    create_files(os.path.join(root, 'node_modules'), count // 2)
+    create_files(os.path.join(root, 'build'), count // 2)
+
+    with open(os.path.join(root, '.gitignore'), 'w') as output_file:
+        output_file.write('node_modules/\n/build/\n')
+
+    for argv in [[root], ['--respect-gitignore', root]]:
+        seconds, files = measure(argv)
+        print('{0:22} {1:6} files {2:8.3f} s'.format(
+                ' '.join(argv[:-1]) or 'all files', files, seconds))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Compare the history of the comments counted by searching each commit
+# separately from the object store with the history mode that searches each
+# distinct blob once and reuses the counts of the unchanged trees.
+# Usage: python3 utils/benchmark_history.py [REPOSITORY] [COMMITS]
+
+
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import todos.history
+import todos.logger
+import todos.revision
+import todos.todos
+
+
+def per_commit(repository, commits):
+    revs = subprocess.run(['git', '-C', repository, 'log', '--first-parent',
+            '--format=%H', '-n', str(commits)], check=True,
+            stdout=subprocess.PIPE).stdout.decode().split()
+
+    totals = []
+    for rev in reversed(revs):
+        parameters = todos.todos.Todos().parse_command_line_arguments(
+                ['--no-dedup', '--git-rev', rev, '--', repository])
+        comments_search = todos.revision.RevisionCommentsSearch(parameters,
+                todos.logger.Logger(False))
+        comments_search.search()
+        totals.append(len(comments_search.comments))
+
+    return totals
+
+
+def history(repository, commits):
+    parameters = todos.todos.Todos().parse_history_arguments(
+            ['--range', 'HEAD~{0}..HEAD'.format(commits), repository])
+    history_search = todos.history.HistorySearch(parameters,
+            todos.logger.Logger(False))
+    totals = [point.get_total() for point in history_search.iterate()]
+    print(history_search.statistics)
+    return totals
+
+
+repository = sys.argv[1] if len(sys.argv) > 1 else \
+        os.path.join(os.path.dirname(__file__), '..')
+commits = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+results = []
+for name, function in [('per commit', per_commit), ('history', history)]:
+    start = time.perf_counter()
+    results.append(function(repository, commits))
+    print('{0:12} {1:4} commits {2:8.3f} s'.format(name, len(results[-1]),
+            time.perf_counter() - start))
+
+print('Same totals: {0}'.format(results[0] == results[1]))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Compare the search of code-heavy C++ files with and without the lexer.
+# Usage: python3 utils/benchmark_lexer.py [NUM_FILES]
+
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import todos.logger
+import todos.search
+import todos.todos
+
+
+NUM_FILES = 200
+LINES_PER_FILE = 2000
+
+LINES = [
+    '    url = "http://example.com/TODO/page"; // fetch',
+    '    printf("# TODO: %d\\n", count);',
+    '    total += compute(value, "/* not a comment */");',
+    '    /* TODO: handle the overflow',
+    '       FIXME: and the underflow */',
+    '    return total;',
+]
+
+
+def generate(directory, count):
+    for index in range(count):
+        path = os.path.join(directory, 'file{0}.cpp'.format(index))
+        with open(path, 'w') as output_file:
+            for line in range(LINES_PER_FILE):
+                output_file.write(LINES[line % len(LINES)] + '\n')
+
+
+def measure(directory, argv):
+    parameters = todos.todos.Todos().parse_command_line_arguments(
+            argv + [directory])
+    comments_search = todos.search.CommentsSearch(parameters,
+            todos.logger.Logger(False))
+
+    start = time.perf_counter()
+    comments_search.search()
+    return time.perf_counter() - start, len(comments_search.comments)
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_FILES
+
+with tempfile.TemporaryDirectory() as directory:
+    generate(directory, count)
+
+    # Lines per file / lines per cycle, comments on lines 4 and 5 are expected
+    expected = count * (LINES_PER_FILE // len(LINES)) * 2
+
+    for name, argv in [('markers', ['--no-lexer']), ('lexer', [])]:
+        duration, found = measure(directory, argv)
+        print('{0:8} {1:.3f} s, comments: {2}, expected: {3}'.format(name,
+                duration, found, expected))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Compare the search with and without the rejection of the lines by
+# the required literals of the patterns.
+# Usage: python3 utils/benchmark_literals.py [NUM_FILES]
+
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import todos.logger
+import todos.search
+import todos.todos
+
+
+NUM_FILES = 200
+LINES_PER_FILE = 2000
+
+CODE = [
+    'def compute(values, total=0):  # accumulate the values',
+    '    for value in values:',
+    '        total += value  # see TODOS.txt and the HACKING guide',
+    '    return total',
+    '',
+]
+
+COMMENTS = [
+    '    # TODO: handle the overflow',
+    '    # FIXME: rounding, reported as JIRA-1234',
+]
+
+CYCLE = 50
+# """ One comment per cycle of lines, the rest is code. """
+
+CASES = [
+    ('default', []),
+    ('default -i', ['-i']),
+    ('JIRA', ['-e', r'\bJIRA-\d+', '--']),
+    ('JIRA -i', ['-i', '-e', r'\bJIRA-\d+', '--']),
+    ('XXX, HACK', ['-e', 'XXX', r'\bHACK\b', '--']),
+]
+
+
+def generate(directory, count):
+    for index in range(count):
+        path = os.path.join(directory, 'file{0}.py'.format(index))
+        with open(path, 'w') as output_file:
+            for line in range(LINES_PER_FILE):
+                if line % CYCLE == 0:
+                    text = COMMENTS[line // CYCLE % len(COMMENTS)]
+                else:
+                    text = CODE[line % len(CODE)]
+                output_file.write(text + '\n')
+
+
+def measure(directory, argv, literals):
+    parameters = todos.todos.Todos().parse_command_line_arguments(
+            ['--no-lexer', '-j', '1'] + argv + [directory])
+    comments_search = todos.search.CommentsSearch(parameters,
+            todos.logger.Logger(False))
+
+    if not literals:
+        comments_search.literals.atoms = None
+
+    start = time.perf_counter()
+    comments_search.search()
+    return time.perf_counter() - start, len(comments_search.comments)
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_FILES
+
+with tempfile.TemporaryDirectory() as directory:
+    generate(directory, count)
+
+    for name, argv in CASES:
+        regex, regex_found = measure(directory, argv, False)
+        literals, literals_found = measure(directory, argv, True)
+        assert regex_found == literals_found
+
+        print('{0:12} regex {1:.3f} s, literals {2:.3f} s, speedup {3:.2f}x, '
+                'comments: {4}'.format(name, regex, literals,
+                        regex / literals, literals_found))
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Compare the search without the statistics with the search that measures
+# the time of the phases and counts the processed data (--stats).
+# Usage: python3 utils/benchmark_stats.py [DIRECTORY]
+
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import todos.logger
+import todos.search
+import todos.todos
+
+
+def measure(argv):
+    parameters = todos.todos.Todos().parse_command_line_arguments(argv)
+    comments_search = todos.search.CommentsSearch(parameters,
+            todos.logger.Logger(False))
+
+    start = time.perf_counter()
+    comments_search.search()
+    return time.perf_counter() - start, comments_search
+
+
+directory = sys.argv[1] if len(sys.argv) > 1 else \
+        os.path.join(os.path.dirname(__file__), '..')
+
+for name, argv in [('disabled', []), ('stats', ['--stats'])]:
+    # The best of several runs, the files are in the page cache
+    seconds, comments_search = min((measure(argv + ['--', directory])
+            for run in range(5)), key=lambda item: item[0])
+    print('{0:10} {1:6} comments {2:8.3f} s'.format(name,
+            len(comments_search.comments), seconds))
+
+    if comments_search.stats is not None:
+        print(comments_search.stats.format_table())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Compare memory used by a list of Comment objects and by CommentStore.
+# Usage: python3 utils/benchmark_store.py [NUM_COMMENTS]
+
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import todos.search
+import todos.store
+
+
+PATTERNS = [r'\bTODO\b', r'\bFIXME\b']
+NUM_COMMENTS = 200000
+COMMENTS_PER_FILE = 5
+
+
+def generate(count):
+    # Paths and lines are built per comment like in the search
+    for index in range(count):
+        path = 'project/module{0}/file{1}.py'.format(
+                index // 1000, index // COMMENTS_PER_FILE)
+        yield todos.search.Comment(PATTERNS[index % 2], path, index % 500 + 1,
+                ['    # TODO: refactor this function {0}'.format(index)])
+
+
+def measure(container, count):
+    tracemalloc.start()
+    container.extend(generate(count))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_COMMENTS
+
+list_size = measure([], count)
+store_size = measure(todos.store.CommentStore(), count)
+
+print('comments:      {0}'.format(count))
+print('list:          {0:.1f} MB'.format(list_size / 1024 / 1024))
+print('CommentStore:  {0:.1f} MB'.format(store_size / 1024 / 1024))
+print('saved:         {0:.0f} %'.format(100 - 100 * store_size / list_size))
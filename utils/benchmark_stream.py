@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2013 Michal Turek
+#
+# This file is part of TODOs.
+# http://todos.sourceforge.net/
+#
+# TODOs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3 of the License.
+#
+# TODOs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with TODOs.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Compare the memory peak of the search of a large file decoded at once
+# and decoded in chunks.
+# Usage: python3 utils/benchmark_stream.py [SIZE_MB]
+
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import todos.logger
+import todos.search
+import todos.todos
+
+
+SIZE_MB = 32
+
+LINES = [
+    "INSERT INTO items VALUES (1, 'name', 'description of the item');",
+    "INSERT INTO items VALUES (2, 'other', 'http://example.com/--');",
+    '-- TODO: split the fixture',
+] + ["INSERT INTO items VALUES (3, 'x', 'y');"] * 97
+
+
+def generate(path, size):
+    with open(path, 'w') as output_file:
+        written = 0
+        while written < size:
+            for line in LINES:
+                written += output_file.write(line + '\n')
+
+
+def measure(directory, stream_size):
+    parameters = todos.todos.Todos().parse_command_line_arguments(
+            ['-C', '2', directory])
+    comments_search = todos.search.CommentsSearch(parameters,
+            todos.logger.Logger(False))
+    comments_search.STREAM_SIZE = stream_size
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    comments_search.search()
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return duration, peak, len(comments_search.comments)
+
+
+size = int(sys.argv[1]) if len(sys.argv) > 1 else SIZE_MB
+
+with tempfile.TemporaryDirectory() as directory:
+    generate(os.path.join(directory, 'fixture.sql'), size * 1024 * 1024)
+
+    for name, stream_size in [('at once', sys.maxsize),
+            ('chunks', todos.search.CommentsSearch.STREAM_SIZE)]:
+        duration, peak, found = measure(directory, stream_size)
+        print('{0:8} {1:.3f} s, peak {2:.1f} MB, comments: {3}'.format(name,
+                duration, peak / 1024 / 1024, found))